@@ -0,0 +1,114 @@
+"""
+Benchmark przekazywania danych do workerów CV (src/parallel.py, config.CV_DATA_MODE).
+
+Porównuje run_cv z data_mode="pickle" (X/y serializowane do każdego zadania joblib)
+i "memmap" (X/y zapisane raz do .npy, workery dostają referencję + indeksy foldu).
+Dla każdego trybu: czas ściany i szczytowa pamięć całego drzewa procesów
+(suma PSS rodzica i workerów loky, próbkowana co 50 ms – strony memmap współdzielone
+między procesami liczone są raz). Pomiar pamięci wymaga Linuksa (/proc).
+
+Uruchomienie (z katalogu głównego projektu):
+    python -m benchmarks.bench_cv_data --rows 4000000 --model logreg --n-jobs 8
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from joblib.externals.loky import get_reusable_executor
+
+from benchmarks.synthetic import generate_orders
+from src.cv import MODEL_FACTORIES, run_cv
+from src.feature_engineering import build_features_transaction_level
+from src.parallel import DATA_MODES
+
+
+def _children(pid: int) -> list[int]:
+    out = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        children = (task / "children").read_text().split()
+        out += [int(c) for c in children]
+    return out
+
+
+def _tree_pss_mb(root: int) -> float:
+    """Suma PSS [MB] procesu root i wszystkich potomków."""
+    total, stack = 0, [root]
+    while stack:
+        pid = stack.pop()
+        try:
+            for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+                if line.startswith("Pss:"):
+                    total += int(line.split()[1])
+                    break
+            stack += _children(pid)
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue
+    return total / 1024
+
+
+class PeakMemory:
+    """Wątek próbkujący PSS drzewa procesów; .peak_mb po wyjściu z kontekstu."""
+
+    def __init__(self, interval_s: float = 0.05):
+        self.interval_s = interval_s
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, _tree_pss_mb(os.getpid()))
+            self._stop.wait(self.interval_s)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run(n_rows: int, model_name: str, n_jobs: int, n_splits: int = 10, seed: int = 42) -> list[dict]:
+    tx = build_features_transaction_level(generate_orders(n_rows, seed=seed))
+    X, y = tx.drop(columns=["Returned", "Transaction ID"]), tx["Returned"].astype(int)
+    del tx
+    print(json.dumps({"transactions": len(X), "X_mb": round(X.memory_usage(deep=True).sum() / 2**20, 1)}))
+
+    results = []
+    for mode in DATA_MODES:
+        get_reusable_executor().shutdown(wait=True)  # każdy tryb startuje ze świeżymi workerami
+        baseline = _tree_pss_mb(os.getpid())
+        model = MODEL_FACTORIES[model_name](n_jobs=1)
+        with PeakMemory() as mem:
+            t0 = time.perf_counter()
+            summary = run_cv(model, X, y, random_state=seed, n_splits=n_splits, n_jobs=n_jobs, data_mode=mode)
+            seconds = time.perf_counter() - t0
+        row = {
+            "data_mode": mode,
+            "model": model_name,
+            "n_jobs": n_jobs,
+            "seconds": round(seconds, 2),
+            "peak_pss_mb": round(mem.peak_mb, 1),
+            "peak_over_parent_mb": round(mem.peak_mb - baseline, 1),
+            "roc_auc": round(summary["roc_auc"]["mean"], 4),
+        }
+        print(json.dumps(row))
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--model", default="logreg", choices=sorted(MODEL_FACTORIES))
+    parser.add_argument("--n-jobs", type=int, default=4)
+    parser.add_argument("--n-splits", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.rows, args.model, args.n_jobs, n_splits=args.n_splits, seed=args.seed)
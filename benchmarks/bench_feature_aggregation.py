@@ -0,0 +1,157 @@
+"""
+Benchmark agregacji cech na poziomie transakcji:
+obecne build_features_transaction_level (jedno przejście groupby.agg)
+vs poprzednia implementacja (osobne g[...] + drugi groupby dla targetu).
+
+Uruchomienie (z katalogu głównego projektu):
+    python -m benchmarks.bench_feature_aggregation --sizes 1000000 10000000 50000000
+
+Dla każdego rozmiaru generuje syntetyczne dane (benchmarks/synthetic.py),
+mierzy najlepszy z `--repeats` czasów i sprawdza, że obie wersje dają tę samą ramkę.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_orders
+from src.feature_engineering import _frequency_encoding_map, build_features_transaction_level
+
+
+def legacy_build_features_transaction_level(df: pd.DataFrame) -> pd.DataFrame:
+    """Poprzednia implementacja (referencja do porównań czasu i wyników)."""
+    df = df.copy()
+
+    # Usuwamy duplikaty całych wierszy
+    df = df.drop_duplicates()
+
+    # Target Returned na poziomie transakcji
+    # Wiersz zwrotu rozpoznajemy po ujemnych wartościach
+    is_refund_row = (df["Refunded Item Count"] < 0) | (df["Refunds"] < 0)
+    returned_by_tx = (
+        df.assign(_refund=is_refund_row)
+        .groupby("Transaction ID")["_refund"]
+        .any()
+        .astype(int)
+    )
+
+    # Bierzemy tylko wiersze zakupowe do liczenia cech
+    purchases = df[df["Purchased Item Count"] > 0].copy()
+
+    # Parsowanie daty
+    dt = pd.to_datetime(purchases["Date"], errors="coerce", dayfirst=True)
+    purchases["_date"] = dt
+
+    # Frequency encoding dla Category i Version
+    cat_freq_map = _frequency_encoding_map(purchases["Category"])
+    ver_freq_map = _frequency_encoding_map(purchases["Version"])
+
+    purchases["Category_freq"] = purchases["Category"].map(cat_freq_map).astype(float).fillna(0.0)
+    purchases["Version_freq"] = purchases["Version"].map(ver_freq_map).astype(float).fillna(0.0)
+
+    # prefix z Item Code i jego freq encoding
+    if "Item Code" in purchases.columns:
+        purchases["ItemCodePrefix"] = purchases["Item Code"].astype(str).str.split("-").str[0]
+        prefix_map = _frequency_encoding_map(purchases["ItemCodePrefix"])
+        purchases["ItemCodePrefix_freq"] = purchases["ItemCodePrefix"].map(prefix_map).astype(float).fillna(0.0)
+
+    # Agregacje po Transaction ID
+    g = purchases.groupby("Transaction ID")
+
+    tx = pd.DataFrame({
+        "Transaction ID": g.size().index,
+
+        # daty (bierzemy najwcześniejszą datę zakupu w transakcji)
+        "PurchaseDate": g["_date"].min(),
+
+        # wolumen
+        "ItemsPurchased_sum": g["Purchased Item Count"].sum(),
+        "FinalQuantity_sum": g["Final Quantity"].sum(),
+        "UniqueItems_n": g["Item ID"].nunique(),
+        "UniqueCategories_n": g["Category"].nunique(),
+
+        # kasa
+        "TotalRevenue_sum": g["Total Revenue"].sum(),
+        "PriceReductions_sum": g["Price Reductions"].sum(),
+        "SalesTax_sum": g["Sales Tax"].sum(),
+
+        # agregacje z FE
+        "Category_freq_mean": g["Category_freq"].mean(),
+        "Version_freq_mean": g["Version_freq"].mean(),
+    })
+
+    if "ItemCodePrefix_freq" in purchases.columns:
+        tx["ItemCodePrefix_freq_mean"] = g["ItemCodePrefix_freq"].mean()
+
+    # Cechy pochodne
+    # Uwaga: dzielenie przez 0 zabezpieczamy
+    tx["DiscountRatio"] = tx["PriceReductions_sum"] / tx["TotalRevenue_sum"].replace(0, np.nan)
+    tx["DiscountRatio"] = tx["DiscountRatio"].fillna(0.0)
+
+    tx["TaxRatio"] = tx["SalesTax_sum"] / tx["TotalRevenue_sum"].replace(0, np.nan)
+    tx["TaxRatio"] = tx["TaxRatio"].fillna(0.0)
+
+    tx["UnitPrice"] = tx["TotalRevenue_sum"] / tx["FinalQuantity_sum"].replace(0, np.nan)
+    tx["UnitPrice"] = tx["UnitPrice"].fillna(0.0)
+
+    # Rozbijamy datę na proste cechy
+    tx["Year"] = tx["PurchaseDate"].dt.year.fillna(0).astype(int)
+    tx["Month"] = tx["PurchaseDate"].dt.month.fillna(0).astype(int)
+    tx["DayOfWeek"] = tx["PurchaseDate"].dt.weekday.fillna(0).astype(int)
+    tx["IsWeekend"] = tx["DayOfWeek"].isin([5, 6]).astype(int)
+    tx["Quarter"] = tx["PurchaseDate"].dt.quarter.fillna(0).astype(int)
+
+    # surową datę można wywalić
+    tx = tx.drop(columns=["PurchaseDate"])
+
+    # Dołączamy target
+    tx["Returned"] = tx["Transaction ID"].map(returned_by_tx).fillna(0).astype(int)
+
+    tx = tx.replace([np.inf, -np.inf], np.nan).fillna(0.0)
+
+    return tx
+
+
+def _best_time(fn, df: pd.DataFrame, repeats: int) -> tuple[float, pd.DataFrame]:
+    best = np.inf
+    out = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn(df)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def run(sizes: list[int], repeats: int = 3, seed: int = 42) -> list[dict]:
+    results = []
+    for n in sizes:
+        df = generate_orders(n, seed=seed)
+
+        t_legacy, tx_legacy = _best_time(legacy_build_features_transaction_level, df, repeats)
+        t_fused, tx_fused = _best_time(build_features_transaction_level, df, repeats)
+
+        pd.testing.assert_frame_equal(tx_fused, tx_legacy, check_exact=False, rtol=1e-9)
+
+        row = {
+            "n_rows": n,
+            "n_transactions": int(len(tx_fused)),
+            "legacy_s": round(t_legacy, 3),
+            "fused_s": round(t_fused, 3),
+            "speedup": round(t_legacy / t_fused, 2),
+        }
+        print(json.dumps(row))
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000, 50_000_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.sizes, repeats=args.repeats, seed=args.seed)
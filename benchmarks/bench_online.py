@@ -0,0 +1,93 @@
+"""
+Benchmark scoringu online: latencja p50/p99 pojedynczego zamówienia.
+
+Mierzy osobno:
+- features + inplace_predict w procesie (OnlineScorer.score),
+- build_features_transaction_level + predict_proba na DataFrame (dotychczasowa ścieżka),
+- pełne żądanie HTTP przez ScoringServer z mikro-partiami (--concurrency połączeń keep-alive).
+
+Model: artefakt z rejestru (--model) albo, gdy go brak, mały XGBoost uczony na danych syntetycznych.
+
+Uruchomienie (z katalogu głównego projektu):
+    python -m benchmarks.bench_online --requests 5000 --concurrency 8
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.synthetic import generate_orders
+from src.config import MODEL_REGISTRY_DIR
+from src.feature_engineering import FeatureEncoder, build_features_transaction_level
+from src.models import xgb_model
+from src.online import OnlineScorer
+from src.registry import ModelArtifact, load_artifact
+from src.serving import ScoringServer, latency_summary, load_test
+
+
+def _orders(n: int, seed: int) -> list[list[dict]]:
+    raw = generate_orders(n * 4, seed=seed)
+    # tylko zamówienia z pozycjami zakupowymi (checkout)
+    raw = raw[raw.groupby("Transaction ID")["Purchased Item Count"].transform("max") > 0]
+    return [group.to_dict("records") for _, group in raw.groupby("Transaction ID")][:n]
+
+
+def _artifact(model_name: str | None, seed: int) -> ModelArtifact:
+    if model_name is not None:
+        return load_artifact(model_name, root=MODEL_REGISTRY_DIR)
+    raw = generate_orders(200_000, seed=seed)
+    encoder = FeatureEncoder().fit(raw)
+    tx = build_features_transaction_level(raw, encoder=encoder)
+    X = tx.drop(columns=["Returned", "Transaction ID"])
+    model = xgb_model(override_params={"n_estimators": 300}).fit(X, tx["Returned"])
+    return ModelArtifact(model, list(X.columns), encoder)
+
+
+def _timed(fn, orders) -> dict:
+    latencies = []
+    for items in orders:
+        t0 = time.perf_counter()
+        fn(items)
+        latencies.append(time.perf_counter() - t0)
+    return latency_summary(latencies)
+
+
+async def _http(scorer: OnlineScorer, orders, concurrency: int) -> dict:
+    server = ScoringServer(scorer)
+    port = await server.start("127.0.0.1", 0)
+    try:
+        client = await load_test("127.0.0.1", port, orders, concurrency=concurrency)
+        return {"client": client, "server": server.stats()}
+    finally:
+        await server.stop()
+
+
+def run(n_requests: int, concurrency: int, model_name: str | None = None, seed: int = 42) -> dict:
+    artifact = _artifact(model_name, seed)
+    scorer = OnlineScorer(artifact)
+    orders = _orders(n_requests, seed + 1)
+
+    def pandas_path(items):
+        import pandas as pd
+        tx = build_features_transaction_level(pd.DataFrame(items), encoder=artifact.encoder)
+        return artifact.predict_proba(tx)
+
+    results = {
+        "in_process": _timed(scorer.score, orders),
+        "pandas": _timed(pandas_path, orders[: min(len(orders), 500)]),
+        "http": asyncio.run(_http(scorer, orders, concurrency)),
+    }
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--model", default=None, help="nazwa modelu w rejestrze (domyślnie model syntetyczny)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.requests, args.concurrency, model_name=args.model, seed=args.seed)
@@ -0,0 +1,74 @@
+"""
+Benchmark polityk równoległości (src/parallel.py) dla CV modeli.
+
+Dla każdej polityki liczy k-krotne CV (cross_validate) z podziałem
+(foldy równolegle, wątki na model) z parallel_budget i porównuje z dawnym
+ustawieniem "oversubscribed" (n_jobs=-1 zarówno dla foldów, jak i modelu).
+
+Uruchomienie (z katalogu głównego projektu):
+    python -m benchmarks.bench_parallel --rows 2000000 --models xgb rf --n-cores 64
+
+Cechy budowane są z syntetycznych danych (benchmarks/synthetic.py).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from sklearn.model_selection import StratifiedKFold, cross_validate
+
+from benchmarks.synthetic import generate_orders
+from src.cv import MODEL_FACTORIES
+from src.feature_engineering import build_features_transaction_level
+from src.parallel import POLICIES, parallel_budget
+
+
+def _features(n_rows: int, seed: int):
+    tx = build_features_transaction_level(generate_orders(n_rows, seed=seed))
+    return tx.drop(columns=["Returned", "Transaction ID"]), tx["Returned"].astype(int)
+
+
+def run(
+    n_rows: int,
+    models: list[str],
+    policies: list[str],
+    n_splits: int = 10,
+    n_cores: int | None = None,
+    seed: int = 42,
+) -> list[dict]:
+    X, y = _features(n_rows, seed)
+    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+
+    settings = [("oversubscribed", -1, -1)]
+    settings += [(p, *parallel_budget(n_splits, policy=p, n_cores=n_cores)) for p in policies]
+
+    results = []
+    for name in models:
+        for label, outer, inner in settings:
+            model = MODEL_FACTORIES[name](n_jobs=inner)
+            t0 = time.perf_counter()
+            scores = cross_validate(model, X, y, cv=cv, scoring="roc_auc", n_jobs=outer)
+            row = {
+                "model": name,
+                "policy": label,
+                "outer_jobs": outer,
+                "inner_jobs": inner,
+                "seconds": round(time.perf_counter() - t0, 2),
+                "roc_auc": round(float(scores["test_score"].mean()), 4),
+            }
+            print(json.dumps(row))
+            results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--models", nargs="+", default=["xgb", "rf"], choices=sorted(MODEL_FACTORIES))
+    parser.add_argument("--policies", nargs="+", default=list(POLICIES), choices=POLICIES)
+    parser.add_argument("--n-splits", type=int, default=10)
+    parser.add_argument("--n-cores", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.rows, args.models, args.policies, n_splits=args.n_splits, n_cores=args.n_cores, seed=args.seed)
@@ -0,0 +1,260 @@
+"""
+Benchmark całego pipeline'u dane -> cechy -> trening -> scoring na danych syntetycznych.
+
+Dla każdej skali (liczba wierszy surowych, 10^4 ... 10^8) zapisuje CSV w schemacie
+order_dataset.csv (benchmarks/synthetic.py, kawałkami – także pliki większe niż RAM)
+i mierzy etapy przez RunProfiler (src/profiling.py: czas ściany, CPU, szczyt RSS):
+
+- load      – load_data(typed=True, bez cache)
+- audit     – preprocessing_pipeline
+- features  – FeatureEncoder.fit + build_features_transaction_level + FeatureMatrix
+- cv        – run_cv(XGBoost, --cv-folds)
+- tuning    – tune_xgb_optuna(native, --n-trials)
+- fit       – XGBoost na tych samych transakcjach (model do scoringu)
+- score     – score_file: cechy strumieniowo z CSV + predykcje partiami
+
+cv / tuning / fit używają co najwyżej --max-train-rows transakcji (przy 10^8 wierszy
+pełne CV trwałoby godziny); wynik zawiera faktyczną liczbę wierszy.
+
+Wyniki: JSON (--out) z czasem (minimum z --repeats) i pamięcią każdego etapu.
+Z --baseline porównuje czasy i szczyt RSS z zapisanym wynikiem i kończy się kodem 1,
+gdy któryś etap jest wolniejszy / cięższy o więcej niż --tolerance (regresja).
+Baseline zależy od maszyny i ustawień – zapisz własny przez --update-baseline.
+Porównanie wymaga zgodnych pól meta (COMPARABLE_META: cv_folds, n_trials, max_train_rows,
+repeats, seed, cpu_count); przy różnicy suite kończy się kodem 2 zamiast raportować
+regresje z nieporównywalnych liczb (--allow-meta-mismatch: tylko ostrzeżenie).
+Dołączony benchmarks/baseline.json pochodzi z hosta z 1 rdzeniem (meta.cpu_count).
+
+Uruchomienie (z katalogu głównego projektu):
+    python -m benchmarks.suite --scales 10000 100000 --repeats 2 --baseline benchmarks/baseline.json
+    python -m benchmarks.suite --scales 10000 100000 --update-baseline
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import optuna
+
+from benchmarks.synthetic import write_orders_csv
+from src.cv import run_cv
+from src.data_loader import load_data
+from src.feature_engineering import FeatureEncoder, build_features_transaction_level
+from src.feature_matrix import FeatureMatrix
+from src.models import xgb_model
+from src.preprocessing import preprocessing_pipeline
+from src.profiling import RunProfiler
+from src.registry import ModelArtifact, score_file
+from src.tuning import tune_xgb_optuna
+
+STAGES = ("load", "audit", "features", "cv", "tuning", "fit", "score")
+DEFAULT_BASELINE = Path("benchmarks/baseline.json")
+DEFAULT_OUT_DIR = Path("outputs/benchmarks")
+
+# Różnice czasu poniżej tej wartości [s] traktujemy jako szum (małe skale)
+MIN_SECONDS_DELTA = 0.25
+# ...i pamięci [MB]
+MIN_MB_DELTA = 50.0
+# Pola meta, które muszą się zgadzać, żeby czasy były porównywalne
+COMPARABLE_META = ("cv_folds", "n_trials", "max_train_rows", "repeats", "seed", "cpu_count")
+
+
+def _run_scale(
+    csv_path: Path,
+    stages: tuple[str, ...],
+    cv_folds: int,
+    n_trials: int,
+    max_train_rows: int,
+    seed: int,
+) -> list[dict]:
+    """Jedno przejście wszystkich etapów na jednym pliku; zwraca rekordy RunProfiler."""
+    profiler = RunProfiler()
+    info: dict[str, dict] = {}
+
+    with profiler.stage("load"):
+        df = load_data(csv_path, typed=True, cache=False)
+    info["load"] = {"rows": len(df)}
+    with profiler.stage("audit"):
+        df, _ = preprocessing_pipeline(df)
+    with profiler.stage("features"):
+        encoder = FeatureEncoder().fit(df)
+        tx = build_features_transaction_level(df, encoder=encoder, deduplicated=True)
+        columns = [c for c in tx.columns if c not in ("Transaction ID", "Returned")]
+        X = FeatureMatrix.from_frame(tx, columns, index_col="Transaction ID")
+        y = tx["Returned"].to_numpy()
+    info["features"] = {"rows": len(X)}
+    del df, tx
+
+    n_train = min(len(X), max_train_rows)
+    X_train, y_train = X[:n_train], y[:n_train]
+    if "cv" in stages:
+        with profiler.stage("cv"):
+            run_cv(xgb_model(), X_train, y_train, random_state=seed, n_splits=cv_folds)
+        info["cv"] = {"rows": n_train}
+    if "tuning" in stages:
+        with profiler.stage("tuning"):
+            tune_xgb_optuna(X_train, y_train, n_trials=n_trials, random_state=seed, n_splits=cv_folds, native=True)
+        info["tuning"] = {"rows": n_train}
+
+    if "fit" in stages or "score" in stages:
+        with profiler.stage("fit"):
+            model = xgb_model().fit(X_train, y_train)
+        info["fit"] = {"rows": n_train}
+    if "score" in stages:
+        artifact = ModelArtifact(model, columns, encoder)
+        with profiler.stage("score"):
+            n_scored = score_file(artifact, csv_path, csv_path.with_name("scores.csv"))
+        info["score"] = {"rows": n_scored}
+
+    return [{**s, **info.get(s["name"], {})} for s in profiler.stages if s["name"] in stages]
+
+
+def run(
+    scales: list[int],
+    stages: tuple[str, ...] = STAGES,
+    repeats: int = 1,
+    cv_folds: int = 3,
+    n_trials: int = 3,
+    max_train_rows: int = 1_000_000,
+    seed: int = 42,
+    data_dir: Path | None = None,
+) -> dict:
+    """
+    Mierzy etapy dla każdej skali. Czas = minimum z `repeats` przejść,
+    pamięć = maksimum szczytowego RSS etapu.
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_suite_", dir=data_dir) as tmp:
+        for n_rows in scales:
+            csv_path = write_orders_csv(Path(tmp) / f"orders_{n_rows}.csv", n_rows, seed=seed)
+            runs = [_run_scale(csv_path, stages, cv_folds, n_trials, max_train_rows, seed) for _ in range(repeats)]
+            for records in zip(*runs):
+                row = {
+                    "scale": n_rows,
+                    "stage": records[0]["name"],
+                    "rows": records[0].get("rows"),
+                    "seconds": min(r["seconds"] for r in records),
+                    "cpu_seconds": min(r["cpu_seconds"] for r in records),
+                    "peak_rss_mb": max((r["peak_rss_mb"] or 0.0) for r in records),
+                }
+                print(json.dumps(row))
+                results.append(row)
+            csv_path.unlink()
+
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "repeats": repeats,
+            "cv_folds": cv_folds,
+            "n_trials": n_trials,
+            "max_train_rows": max_train_rows,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def meta_mismatches(current: dict, baseline: dict) -> dict[str, tuple]:
+    """Pola COMPARABLE_META różne w current i baseline: {pole: (baseline, current)}."""
+    cur, ref = current.get("meta", {}), baseline.get("meta", {})
+    return {k: (ref.get(k), cur.get(k)) for k in COMPARABLE_META if ref.get(k) != cur.get(k)}
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2, allow_meta_mismatch: bool = False) -> list[dict]:
+    """
+    Regresje względem baseline: etap (ta sama skala) wolniejszy albo z wyższym szczytem RSS
+    o więcej niż `tolerance` (względnie) i więcej niż MIN_SECONDS_DELTA / MIN_MB_DELTA (bezwzględnie).
+    Etapy bez odpowiednika w baseline są pomijane.
+    Różne pola COMPARABLE_META -> ValueError (allow_meta_mismatch=True: porównanie mimo to).
+    """
+    mismatched = meta_mismatches(current, baseline)
+    if mismatched and not allow_meta_mismatch:
+        raise ValueError(f"Wynik nieporównywalny z baseline (baseline, bieżący): {mismatched}")
+    reference = {(r["scale"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        ref = reference.get((row["scale"], row["stage"]))
+        if ref is None:
+            continue
+        for metric, min_delta in (("seconds", MIN_SECONDS_DELTA), ("peak_rss_mb", MIN_MB_DELTA)):
+            old, new = ref[metric], row[metric]
+            if new > old * (1 + tolerance) and new - old > min_delta:
+                regressions.append({
+                    "scale": row["scale"],
+                    "stage": row["stage"],
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "ratio": round(new / old, 2) if old else None,
+                })
+    return regressions
+
+
+def _write_json(data: dict, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", type=int, default=[10_000, 100_000])
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--cv-folds", type=int, default=3)
+    parser.add_argument("--n-trials", type=int, default=3)
+    parser.add_argument("--max-train-rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", type=Path, default=None, help="katalog na syntetyczne CSV (domyślnie tymczasowy)")
+    parser.add_argument("--out", type=Path, default=None, help="plik wyników (domyślnie outputs/benchmarks/<czas>.json)")
+    parser.add_argument("--baseline", type=Path, default=None, help="porównaj z zapisanym wynikiem")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="dopuszczalny względny wzrost czasu / pamięci")
+    parser.add_argument("--update-baseline", action="store_true", help=f"zapisz wynik jako {DEFAULT_BASELINE}")
+    parser.add_argument(
+        "--allow-meta-mismatch", action="store_true", help="porównaj mimo różnych ustawień / liczby rdzeni (ostrzeżenie)"
+    )
+    args = parser.parse_args()
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+
+    result = run(
+        args.scales,
+        stages=tuple(args.stages),
+        repeats=args.repeats,
+        cv_folds=args.cv_folds,
+        n_trials=args.n_trials,
+        max_train_rows=args.max_train_rows,
+        seed=args.seed,
+        data_dir=args.data_dir,
+    )
+    out = args.out or DEFAULT_OUT_DIR / f"suite_{time.strftime('%Y%m%dT%H%M%S')}.json"
+    print("Zapisano", _write_json(result, out))
+    if args.update_baseline:
+        print("Zapisano baseline", _write_json(result, DEFAULT_BASELINE))
+
+    if args.baseline is not None:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        mismatched = meta_mismatches(result, baseline)
+        if mismatched:
+            print("UWAGA: inne ustawienia niż baseline (baseline, bieżący):", json.dumps(mismatched))
+            if not args.allow_meta_mismatch:
+                print("Porównanie pominięte – zapisz baseline dla tych ustawień (--update-baseline)")
+                sys.exit(2)
+        regressions = compare(result, baseline, tolerance=args.tolerance, allow_meta_mismatch=True)
+        for r in regressions:
+            print("REGRESJA:", json.dumps(r))
+        if regressions:
+            sys.exit(1)
+        print(f"Brak regresji względem {args.baseline} (tolerancja {args.tolerance:.0%})")
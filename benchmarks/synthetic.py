@@ -0,0 +1,104 @@
+"""
+Generator syntetycznych danych zamówień w schemacie order_dataset.csv.
+
+Rozkłady są proste (jednostajne / dyskretne), ale struktura odpowiada danym
+produkcyjnym: kilka wierszy na transakcję, wiersze zwrotu z ujemnymi
+wartościami, powtarzające się daty i kody produktów, trochę duplikatów.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES = np.array(["Games", "Software", "Hardware", "Accessories", "Books", "Music", "Video"])
+VERSIONS = np.array(["1", "2", "3", "v1", "v2", "Deluxe", "Standard"])
+ITEM_PREFIXES = np.array(["GAM", "SOF", "HAR", "ACC", "BOO", "MUS", "VID", "SUB"])
+
+
+def generate_orders(
+    n_rows: int,
+    seed: int = 42,
+    rows_per_tx: float = 3.0,
+    refund_rate: float = 0.08,
+    duplicate_rate: float = 0.01,
+    tx_offset: int = 0,
+) -> pd.DataFrame:
+    """
+    Zwraca DataFrame z n_rows wierszami (pozycjami zamówień).
+
+    :param rows_per_tx: średnia liczba wierszy na transakcję
+    :param refund_rate: udział wierszy zwrotu (ujemne Refunds / Refunded Item Count)
+    :param duplicate_rate: udział zduplikowanych całych wierszy
+    :param tx_offset: przesunięcie numeracji Transaction ID (do generowania kolejnych plików)
+    """
+    rng = np.random.default_rng(seed)
+    n_tx = max(int(n_rows / rows_per_tx), 1)
+
+    tx_idx = np.sort(rng.integers(0, n_tx, size=n_rows))
+    tx_ids = tx_idx + tx_offset + 1
+    # dzień per transakcja tego kawałka (rozmiar n_tx, niezależny od tx_offset)
+    tx_day = rng.integers(0, 730, size=n_tx)
+    days = pd.Timestamp("2019-01-01") + pd.to_timedelta(tx_day[tx_idx], unit="D")
+
+    n_items = 5000
+    item_ids = rng.integers(1, n_items, size=n_rows)
+    prefix = ITEM_PREFIXES[item_ids % len(ITEM_PREFIXES)]
+    item_code = np.char.add(np.char.add(prefix, "-"), (item_ids % 1000).astype(str))
+
+    is_refund = rng.random(n_rows) < refund_rate
+    qty = rng.integers(1, 4, size=n_rows)
+    price = np.round(rng.gamma(2.0, 20.0, size=n_rows), 2)
+    revenue = np.round(qty * price, 2)
+    reductions = -np.round(revenue * rng.choice([0.0, 0.0, 0.1, 0.2], size=n_rows), 2)
+    tax = np.round(revenue * 0.2, 2)
+
+    df = pd.DataFrame({
+        "Date": days.strftime("%d/%m/%Y"),
+        "Week": days.isocalendar().week.to_numpy(),
+        "Buyer ID": rng.integers(1, max(n_tx // 2, 2), size=n_rows),
+        "Transaction ID": tx_ids,
+        "Item Code": item_code,
+        "Item Name": np.char.add("Item ", item_ids.astype(str)),
+        "Category": CATEGORIES[item_ids % len(CATEGORIES)],
+        "Version": VERSIONS[(item_ids // 7) % len(VERSIONS)],
+        "Sales Tax": np.where(is_refund, -tax, tax),
+        "Price Reductions": np.where(is_refund, 0.0, reductions),
+        "Refunds": np.where(is_refund, -revenue, 0.0),
+        "Final Revenue": np.where(is_refund, -revenue, revenue + reductions),
+        "Overall Revenue": np.where(is_refund, -revenue, revenue + reductions + tax),
+        "Refunded Item Count": np.where(is_refund, -qty, 0),
+        "Purchased Item Count": np.where(is_refund, 0, qty),
+        "Final Quantity": np.where(is_refund, -qty, qty),
+        "Total Revenue": np.where(is_refund, 0.0, revenue),
+        "Official Retail Price": price,
+        "Item ID": item_ids,
+    })
+
+    n_dup = int(n_rows * duplicate_rate)
+    if n_dup > 0:
+        dup_idx = rng.choice(n_rows, size=n_dup, replace=False)
+        df = pd.concat([df, df.iloc[dup_idx]], ignore_index=True)
+        df = df.sort_values("Transaction ID", kind="stable", ignore_index=True)
+
+    return df
+
+
+def write_orders_csv(path: Path, n_rows: int, seed: int = 42, chunk_rows: int = 2_000_000) -> Path:
+    """Zapisuje syntetyczny CSV kawałkami (pozwala wygenerować pliki większe niż RAM)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    part = 0
+    tx_offset = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        while written < n_rows:
+            n = min(chunk_rows, n_rows - written)
+            df = generate_orders(n, seed=seed + part, tx_offset=tx_offset)
+            df.to_csv(f, index=False, header=(part == 0))
+            tx_offset = int(df["Transaction ID"].max())
+            written += n
+            part += 1
+    return path
@@ -1,23 +1,46 @@
+import argparse
+
+import numpy as np
+import pandas as pd
 from sklearn.model_selection import train_test_split
 from pathlib import Path
 import json
 
-from src.config import DATA_PATH
-from src.data_loader import load_data
+from src.config import (
+    CV_FOLDS,
+    DATA_PATH,
+    OPTUNA_STORAGE,
+    OPTUNA_STUDY_NAME,
+    OPTUNA_WORKERS,
+    RUN_REPORT_PATH,
+    THRESHOLD_OBJECTIVE,
+    TYPED_INGESTION,
+    XGB_EARLY_STOPPING_ROUNDS,
+    XGB_NATIVE_CV,
+    XGB_PRUNER,
+)
+from src.data_loader import file_content_hash, load_data
 from src.preprocessing import preprocessing_pipeline
-from src.feature_engineering import build_features_transaction_level
-
-from src.models import baseline_model, xgb_model, logreg_model
-from src.train import train_and_evaluate, undersample_train
-from src.cv import run_cv
+from src.feature_engineering import FeatureEncoder, transaction_targets
+from src.feature_store import find_feature_store, load_or_build_feature_store, open_feature_store
+
+from src.train import apply_threshold, undersample_train
+from src.cv import FoldEngine
+from src.parallel import POLICIES, configure, parallel_budget
+from src.profiling import PROFILERS, RunProfiler
+from src.registry import save_artifact
 from src.tuning import tune_xgb_optuna
 
-from src.model_viz import (
-    plot_roc_curves,
-    plot_pr_curves,
-    plot_confusion_matrices,
-    plot_feature_importance,
-)
+from src.model_viz import holdout_figure_jobs
+from src.rendering import render_figures
+
+
+# Etapy mierzone przez RunProfiler (kolejność jak w run_pipeline)
+STAGES = ("load", "audit", "split", "features", "cv", "holdout", "tuning", "tuned", "thresholds", "registry", "plots")
+
+# Hold-out split transakcji; magazyn cech pamięta go w manifeście (encoder uczony na tym train)
+HOLDOUT_SPLIT = {"test_size": 0.2, "random_state": 42}
+STORE_META = {"encoder_fit": "train", **HOLDOUT_SPLIT}
 
 
 def print_comparison_table(title: str, before: dict, after: dict) -> None:
@@ -52,81 +75,151 @@ def print_comparison_table(title: str, before: dict, after: dict) -> None:
                     print(f"{m:<10} | {str(b):<18} | {str(a):<18}")
 
 
-def _extract_model(res: dict, fallback_model):
-    """
-    Jeżeli train_and_evaluate zwraca 'model' -> użyj.
-    Jeśli nie -> fallback_model (już dopasowany gdzie indziej) albo dopasuj ręcznie.
-    """
-    if isinstance(res, dict) and "model" in res and res["model"] is not None:
-        return res["model"]
-    return fallback_model
-
-
 def main():
-    # 1) Dane
-    df = load_data(DATA_PATH)
-    df, report = preprocessing_pipeline(df)
-    print("AUDYT:", report)
-
-    tx = build_features_transaction_level(df)
-    X = tx.drop(columns=["Returned", "Transaction ID"])
-    y = tx["Returned"].astype(int)
+    parser = argparse.ArgumentParser(description="Pipeline: dane -> cechy -> CV -> tuning -> hold-out -> wykresy.")
+    parser.add_argument("--parallel-policy", choices=POLICIES, default=None,
+                        help="podział rdzeni między foldy a wątki modeli (domyślnie config.PARALLEL_POLICY)")
+    parser.add_argument("--n-cores", type=int, default=None, help="liczba rdzeni (domyślnie config.N_CORES / wszystkie)")
+    parser.add_argument("--report", type=Path, default=RUN_REPORT_PATH, help="raport JSON z czasem i pamięcią etapów")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="tracemalloc: szczyt alokacji i najcięższe linie kodu w każdym etapie (wolniej)")
+    parser.add_argument("--profile-stage", choices=STAGES, default=None, help="profiluj wybrany etap")
+    parser.add_argument("--profiler", choices=PROFILERS, default="cprofile")
+    args = parser.parse_args()
+    configure(args.parallel_policy, args.n_cores)
+    print("Budżet równoległości (foldy x wątki):", parallel_budget(CV_FOLDS))
+
+    profiler = RunProfiler(trace_memory=args.trace_memory, profile_stage=args.profile_stage, profiler=args.profiler)
+    try:
+        run_pipeline(profiler)
+    finally:
+        profiler.print_summary()
+        print("Raport etapów:", profiler.write_report(args.report))
+
+
+def run_pipeline(profiler: RunProfiler) -> None:
+    # 1) Dane. Hash pliku liczony raz: klucz magazynu cech i cache Parquet loadera.
+    # Gdy magazyn dla tych danych i tego splitu już jest, wczytanie i audyt są pomijane:
+    # target per transakcja (do splitu) i encoder bierzemy z magazynu
+    with profiler.stage("load"):
+        source_hash = file_content_hash(DATA_PATH)
+        store_path = find_feature_store(source_hash, meta=STORE_META)
+        if store_path is None:
+            df = load_data(DATA_PATH, typed=TYPED_INGESTION, cache=TYPED_INGESTION, source_hash=source_hash)
+    if store_path is None:
+        with profiler.stage("audit"):
+            df, report = preprocessing_pipeline(df)
+        print("AUDYT:", report)
+    else:
+        print("Magazyn cech dla tych danych już istnieje – wczytanie CSV, audyt i budowa cech pominięte")
 
     # 2) Hold-out split (test zawsze w naturalnym rozkładzie)
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
-
+    # Dzielimy transakcje przed budową cech, żeby FeatureEncoder uczył się tylko na train.
+    # Target z magazynu to ten sam transaction_targets(df) (te same transakcje, ta sama kolejność),
+    # więc split jest identyczny, a encoder magazynu – uczony na tym samym train
+    with profiler.stage("split"):
+        if store_path is None:
+            targets = transaction_targets(df)
+        else:
+            store = open_feature_store(store_path)
+            targets = pd.Series(np.asarray(store.y, dtype=int), index=pd.Index(store.index, name="Transaction ID"))
+        train_ids, test_ids = train_test_split(targets.index, **HOLDOUT_SPLIT, stratify=targets)
+        if store_path is None:
+            encoder = FeatureEncoder().fit(df[df["Transaction ID"].isin(train_ids)])
+        else:
+            encoder = store.encoder
+        encoder.save("outputs/feature_encoder.json")
+
+    # Magazyn cech (mmap): budowany raz dla (dane, encoder, wersja cech), potem tylko otwierany.
+    # X to jedna tablica float32 dla wszystkich modeli i foldów (bez konwersji w każdym fit)
+    with profiler.stage("features"):
+        if store_path is None:
+            store = load_or_build_feature_store(df, encoder, source_hash, deduplicated=True, meta=STORE_META)
+            del df
+        X = store.X
+        y = store.target()
+
+        is_train = np.isin(store.index, train_ids)
+        X_train, X_test = X[is_train], X[~is_train]
+        y_train, y_test = y[is_train], y[~is_train]
+
+        # 3) Zbalansowany train (undersampling 1:1) – tylko do uczenia
+        X_train_bal, y_train_bal = undersample_train(X_train, y_train, random_state=42)
+
+    print("Magazyn cech:", store.path)
     print("X_train shape:", X_train.shape)
     print("X_test shape:", X_test.shape)
     print("y_train mean (pos rate):", float(y_train.mean()))
     print("y_test mean (pos rate):", float(y_test.mean()))
-
-    # 3) Zbalansowany train (undersampling 1:1) – tylko do uczenia
-    X_train_bal, y_train_bal = undersample_train(X_train, y_train, random_state=42)
     print("X_train_bal shape:", X_train_bal.shape)
     print("y_train_bal mean (pos rate):", float(y_train_bal.mean()))
 
     # 4) 10-fold CV (na pełnych danych – realistycznie i stabilnie)
+    # Foldy liczone raz; modele foldów i predykcje OOF są cache'owane w silniku
     print("\n=== 10-fold CV (na pełnych danych, bez strojenia) ===")
-    lr_cv = run_cv(logreg_model(), X, y)
-    rf_cv = run_cv(baseline_model(), X, y)
-
     pos = int((y == 1).sum())
     neg = int((y == 0).sum())
     spw = neg / max(pos, 1)
-    xgb_cv_before = run_cv(xgb_model(scale_pos_weight=spw), X, y)
+    # XGBoost bez strojenia: early stopping na odłożonych VAL_SIZE wierszach train każdego fitu
+    xgb_base = {"scale_pos_weight": spw, "early_stopping_rounds": XGB_EARLY_STOPPING_ROUNDS}
+
+    with profiler.stage("cv"):
+        engine = FoldEngine(X, y, n_splits=CV_FOLDS, random_state=42, xgb_native=XGB_NATIVE_CV)
+        lr_cv = engine.cv_summary("logreg")
+        rf_cv = engine.cv_summary("rf")
+        xgb_cv_before = engine.cv_summary("xgb", xgb_base)
 
     print("CV LogisticRegression:", lr_cv)
     print("CV RandomForest:", rf_cv)
     print("scale_pos_weight:", spw)
     print("CV XGBoost:", xgb_cv_before)
 
-    # 5) Hold-out (SCENARIUSZ A: trening na pełnym train)
-    print("\n=== Hold-out (train pełny) ===")
-    lr_hold_full = train_and_evaluate(logreg_model(), X_train, X_test, y_train, y_test)
-    rf_hold_full = train_and_evaluate(baseline_model(), X_train, X_test, y_train, y_test)
-    xgb_hold_full = train_and_evaluate(xgb_model(scale_pos_weight=spw), X_train, X_test, y_train, y_test)
+    with profiler.stage("holdout"):
+        # 5) Hold-out (SCENARIUSZ A: trening na pełnym train)
+        full_split = (X_train, X_test, y_train, y_test)
+        lr_hold_full = engine.holdout("logreg", None, *full_split, split="full")
+        rf_hold_full = engine.holdout("rf", None, *full_split, split="full")
+        xgb_hold_full = engine.holdout("xgb", xgb_base, *full_split, split="full")
+
+        # 6) Hold-out (SCENARIUSZ B: trening na zbalansowanym train)
+        bal_split = (X_train_bal, X_test, y_train_bal, y_test)
+        lr_hold_bal = engine.holdout("logreg", None, *bal_split, split="balanced")
+        rf_hold_bal = engine.holdout("rf", None, *bal_split, split="balanced")
+        # przy undersamplingu zwykle scale_pos_weight = 1.0
+        xgb_hold_bal = engine.holdout(
+            "xgb", {"scale_pos_weight": 1.0, "early_stopping_rounds": XGB_EARLY_STOPPING_ROUNDS}, *bal_split, split="balanced"
+        )
+
+        # Bagging undersamplingu: 5 zbalansowanych próbek z pełnego train, średnia z modeli
+        xgb_hold_bagged = engine.holdout("xgb_bagged", None, *full_split, split="full")
 
+    print("\n=== Hold-out (train pełny) ===")
     print("LogisticRegression:", lr_hold_full)
     print("RandomForest:", rf_hold_full)
     print("XGBoost:", xgb_hold_full)
 
-    # 6) Hold-out (SCENARIUSZ B: trening na zbalansowanym train)
     print("\n=== Hold-out (train zbalansowany 1:1) ===")
-    lr_hold_bal = train_and_evaluate(logreg_model(), X_train_bal, X_test, y_train_bal, y_test)
-    rf_hold_bal = train_and_evaluate(baseline_model(), X_train_bal, X_test, y_train_bal, y_test)
-
-    # przy undersamplingu zwykle scale_pos_weight = 1.0
-    xgb_hold_bal = train_and_evaluate(xgb_model(scale_pos_weight=1.0), X_train_bal, X_test, y_train_bal, y_test)
-
     print("LogisticRegression (balanced):", lr_hold_bal)
     print("RandomForest (balanced):", rf_hold_bal)
     print("XGBoost (balanced):", xgb_hold_bal)
+    print("XGBoost (bagged undersampling x5):", xgb_hold_bagged)
 
     # 7) Strojenie Optuna (trzymamy na pełnych danych; cel: ROC-AUC w CV)
     print("\n=== Optuna tuning (XGBoost, na pełnych danych) ===")
-    best_params = tune_xgb_optuna(X, y, n_trials=10, random_state=42, n_splits=10)
+    with profiler.stage("tuning"):
+        best_params = tune_xgb_optuna(
+            X,
+            y,
+            n_trials=10,
+            random_state=42,
+            cv=engine.folds,
+            native=XGB_NATIVE_CV,
+            early_stopping_rounds=XGB_EARLY_STOPPING_ROUNDS,
+            pruner=XGB_PRUNER,
+            storage=OPTUNA_STORAGE,
+            study_name=OPTUNA_STUDY_NAME,
+            n_workers=OPTUNA_WORKERS,
+        )
     print("Najlepsze parametry z Optuny:")
     print(best_params)
 
@@ -136,14 +229,17 @@ def main():
     print("Zapisano outputs/best_xgb_params.json")
 
     # 8) Po tuningu: CV + hold-out (pełny train)
+    xgb_tuned = {"override_params": best_params}
+    with profiler.stage("tuned"):
+        xgb_cv_after = engine.cv_summary("xgb", xgb_tuned)
+        xgb_hold_tuned_full = engine.holdout("xgb", xgb_tuned, *full_split, split="full")
+
+    # modele foldów i hold-outu silnika CV nie są już potrzebne (wyniki hold-outu mamy w zmiennych)
+    engine.clear_cache()
+
     print("\n=== 10-fold CV (PO strojeniu) ===")
-    xgb_cv_after = run_cv(xgb_model(override_params=best_params), X, y)
     print("CV XGBoost tuned:", xgb_cv_after)
-
     print("\n=== Hold-out (PO strojeniu, train pełny) ===")
-    xgb_hold_tuned_full = train_and_evaluate(
-        xgb_model(override_params=best_params), X_train, X_test, y_train, y_test
-    )
     print("XGBoost tuned:", xgb_hold_tuned_full)
 
     print_comparison_table(
@@ -157,42 +253,64 @@ def main():
         after=xgb_hold_tuned_full,
     )
 
-    # 9) Wykresy – wybieramy jeden scenariusz do wizualizacji (polecam: train pełny + tuned)
-    Path("outputs/models").mkdir(parents=True, exist_ok=True)
-
-    # Uwaga: to wymaga, żeby train_and_evaluate zwracał też "model"
-    # Jeśli nie zwraca, to w train.py dopisz: "model": model
-    models_for_plots = {
-        "LogReg_full": _extract_model(lr_hold_full, None),
-        "RF_full": _extract_model(rf_hold_full, None),
-        "XGB_full": _extract_model(xgb_hold_full, None),
-        "XGB_tuned_full": _extract_model(xgb_hold_tuned_full, None),
+    # 9) Próg decyzji zamiast 0.5: wybrany na predykcjach OOF silnika foldów zbudowanego tylko
+    # na train (modele foldów silnika CV widziały hold-out), hold-out przeliczany z tym progiem
+    # bez ponownego uczenia
+    print(f"\n=== Próg decyzji (OOF train, cel: {THRESHOLD_OBJECTIVE}) ===")
+    registry_models = {
+        "logreg": ("logreg", None, lr_hold_full),
+        "rf": ("rf", None, rf_hold_full),
+        "xgb": ("xgb", xgb_base, xgb_hold_full),
+        "xgb_tuned": ("xgb", xgb_tuned, xgb_hold_tuned_full),
+        "xgb_bagged": ("xgb_bagged", None, xgb_hold_bagged),
     }
-
-    # Jeżeli nie masz "model" w wynikach, zrobimy szybki fallback: uczymy raz do wykresów
-    if any(v is None for v in models_for_plots.values()):
-        print("[INFO] Brak 'model' w train_and_evaluate -> fituję modele raz do wykresów.")
-        models_for_plots = {
-            "LogReg_full": logreg_model().fit(X_train, y_train),
-            "RF_full": baseline_model().fit(X_train, y_train),
-            "XGB_full": xgb_model(scale_pos_weight=spw).fit(X_train, y_train),
-            "XGB_tuned_full": xgb_model(override_params=best_params).fit(X_train, y_train),
-        }
-
-    plot_roc_curves(models_for_plots, X_test, y_test, "outputs/models/roc_holdout.png")
-    plot_pr_curves(models_for_plots, X_test, y_test, "outputs/models/pr_holdout.png")
-    plot_confusion_matrices(models_for_plots, X_test, y_test, "outputs/models")
-
-    plot_feature_importance(
-        models_for_plots["RF_full"], list(X.columns),
-        "outputs/models/fi_rf.png",
-        title="RandomForest feature importance (hold-out, train pełny)",
-    )
-    plot_feature_importance(
-        models_for_plots["XGB_tuned_full"], list(X.columns),
-        "outputs/models/fi_xgb_tuned.png",
-        title="XGBoost tuned feature importance (hold-out, train pełny)",
-    )
+    with profiler.stage("thresholds"):
+        train_engine = FoldEngine(X_train, y_train, n_splits=CV_FOLDS, random_state=42)
+        thresholds = {}
+        for name, (model_name, params, res) in registry_models.items():
+            selection = train_engine.select_threshold(model_name, params)
+            thresholds[name] = (selection, apply_threshold(res, y_test, selection["threshold"]))
+
+    for name, (selection, res) in thresholds.items():
+        before = registry_models[name][2]
+        print(
+            f"{name:<11} próg {selection['threshold']:.4f} | hold-out F1 {before['f1']:.4f} -> {res['f1']:.4f}, "
+            f"precision {before['precision']:.4f} -> {res['precision']:.4f}, recall {before['recall']:.4f} -> {res['recall']:.4f}"
+        )
+        if selection["cost"] > selection.get("cost_predict_none", np.inf):
+            print(f"  UWAGA: przy tych kosztach {name} wypada gorzej niż brak zgłoszeń (koszt {selection['cost_predict_none']:.1f})")
+
+    # 10) Rejestr modeli: estymator + kolejność cech + encoder + próg + metryki hold-outu w tym progu (score.py)
+    with profiler.stage("registry"):
+        for name, (selection, res) in thresholds.items():
+            path = save_artifact(
+                res["model"], name, list(X.columns), encoder, metrics=res,
+                threshold=selection["threshold"], threshold_selection=selection,
+            )
+            print(f"Zapisano model {name} -> {path}")
+
+    # 11) Wykresy – wybieramy jeden scenariusz do wizualizacji (polecam: train pełny + tuned)
+    # Modele bierzemy z cache hold-outu silnika – nic nie jest uczone ponownie
+    with profiler.stage("plots"):
+        # Wykresy z predykcji hold-outu (y_proba / y_pred w progu z kroku 9) – bez ponownego predict_proba;
+        # renderowane bez okien w puli procesów, niezmienione od poprzedniego uruchomienia są pomijane
+        jobs = holdout_figure_jobs(
+            {
+                "LogReg_full": thresholds["logreg"][1],
+                "RF_full": thresholds["rf"][1],
+                "XGB_full": thresholds["xgb"][1],
+                "XGB_tuned_full": thresholds["xgb_tuned"][1],
+            },
+            y_test,
+            "outputs/models",
+            feature_names=list(X.columns),
+            importance={
+                "RF_full": ("fi_rf.png", "RandomForest feature importance (hold-out, train pełny)"),
+                "XGB_tuned_full": ("fi_xgb_tuned.png", "XGBoost tuned feature importance (hold-out, train pełny)"),
+            },
+        )
+        rendered = render_figures(jobs)
+        print(f"Wykresy: {len(rendered['rendered'])} narysowanych, {len(rendered['skipped'])} bez zmian")
 
     print("Zapisano wykresy modeli do outputs/models/")
 
@@ -1,26 +1,37 @@
 from pathlib import Path
 
-from src.data_loader import load_data
+import pandas as pd
+
+from src.data_loader import file_content_hash, load_data
 from src.preprocessing import preprocessing_pipeline
-from src.feature_engineering import build_features_transaction_level
-from src.config import DATA_PATH
+from src.feature_engineering import FeatureEncoder
+from src.feature_store import find_feature_store, load_or_build_feature_store, open_feature_store
+from src.config import DATA_PATH, TYPED_INGESTION
 
-from src.eda import (
-    basic_info, descriptive_stats, target_distribution,
-    histograms, boxplots_by_target, scatter_by_target,
-    correlation_with_target, correlation_heatmap
-)
+from src.eda import basic_info, descriptive_stats, correlation_with_target, eda_figure_jobs
+from src.rendering import render_figures
 
 # Katalog na wyniki EDA
 Path("outputs/eda").mkdir(parents=True, exist_ok=True)
 
-# Wczytanie + preprocessing
-df = load_data(DATA_PATH)
-df, report = preprocessing_pipeline(df)
-print("AUDYT:", report)
+# EDA opisuje cechy z encoderem uczonym na całych danych – nie magazyn main.py (encoder ze splitu train)
+EDA_STORE_META = {"encoder_fit": "all"}
 
-# Feature engineering
-tx = build_features_transaction_level(df)
+# Cechy z magazynu (zbudowanego wcześniej przez run_eda.py dla tych samych danych);
+# jeśli go nie ma: wczytanie + preprocessing + budowa cech i zapis magazynu
+source_hash = file_content_hash(DATA_PATH)
+store_path = find_feature_store(source_hash, meta=EDA_STORE_META)
+if store_path is not None:
+    store = open_feature_store(store_path)
+else:
+    df = load_data(DATA_PATH, typed=TYPED_INGESTION, cache=TYPED_INGESTION, source_hash=source_hash)
+    df, report = preprocessing_pipeline(df)
+    print("AUDYT:", report)
+    store = load_or_build_feature_store(
+        df, FeatureEncoder().fit(df), source_hash, deduplicated=True, meta=EDA_STORE_META
+    )
+print("Magazyn cech:", store.path)
+tx = store.to_frame()
 
 # Podstawowe info
 basic_info(tx)
@@ -32,32 +43,10 @@ print("\nStatystyki opisowe (pierwsze 15 wierszy):")
 print(stats.head(15))
 print("\nZapisano: outputs/eda/descriptive_stats.csv")
 
-# Rozkład targetu
-target_distribution(tx, target_col="Returned", save_path="outputs/eda/target_distribution.png")
-
-# Histogramy
-histograms(
-    tx,
-    cols=["TotalRevenue_sum", "DiscountRatio", "UnitPrice", "UniqueItems_n", "ItemsPurchased_sum"],
-    save_dir="outputs/eda"
-)
-
-# Boxploty vs target
-boxplots_by_target(
-    tx,
-    cols=["TotalRevenue_sum", "DiscountRatio", "UnitPrice", "UniqueItems_n", "ItemsPurchased_sum"],
-    target_col="Returned",
-    save_dir="outputs/eda"
-)
-
-# Scatter: rabat vs wartość koszyka
-scatter_by_target(
-    tx,
-    x="TotalRevenue_sum",
-    y="DiscountRatio",
-    target_col="Returned",
-    save_path="outputs/eda/scatter_revenue_discount.png"
-)
+# Rozkład targetu (tabela)
+counts = tx["Returned"].value_counts().sort_index()
+print("Rozkład targetu:")
+print(pd.DataFrame({"count": counts, "percent": (counts / len(tx) * 100).round(2)}))
 
 # Korelacje (bez Transaction ID)
 tx_corr = tx.drop(columns=["Transaction ID"], errors="ignore")
@@ -66,6 +55,16 @@ corr_to_target = correlation_with_target(tx_corr, target_col="Returned", top_n=1
 corr_to_target.to_csv("outputs/eda/corr_to_target.csv")
 print("\nZapisano: outputs/eda/corr_to_target.csv")
 
-correlation_heatmap(tx_corr, save_path="outputs/eda/corr_heatmap.png")
+# Wykresy: rozkład targetu, histogramy, boxploty vs target, scatter rabat vs wartość koszyka,
+# heatmapa korelacji – bez okien, równolegle, niezmienione od poprzedniego uruchomienia są pomijane
+jobs = eda_figure_jobs(
+    tx,
+    cols=["TotalRevenue_sum", "DiscountRatio", "UnitPrice", "UniqueItems_n", "ItemsPurchased_sum"],
+    save_dir="outputs/eda",
+    target_col="Returned",
+    scatter=("TotalRevenue_sum", "DiscountRatio"),
+)
+rendered = render_figures(jobs)
+print(f"\nWykresy: {len(rendered['rendered'])} narysowanych, {len(rendered['skipped'])} bez zmian")
 
 print("\nEDA zakończone. Wykresy i CSV są w outputs/eda/")
@@ -0,0 +1,28 @@
+import argparse
+from pathlib import Path
+
+from src.config import FEATURE_STATE_DIR
+from src.data_loader import load_data
+from src.incremental import incremental_update, initialize_state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Przyrostowa budowa cech na poziomie transakcji.")
+    parser.add_argument("csv", type=Path, help="plik z nowymi wierszami (albo pełna historia przy --init)")
+    parser.add_argument("--init", action="store_true", help="zbuduj stan od zera z podanego pliku")
+    parser.add_argument("--state-dir", type=Path, default=FEATURE_STATE_DIR)
+    args = parser.parse_args()
+
+    df = load_data(args.csv, typed=True)
+
+    if args.init:
+        tx = initialize_state(df, args.state_dir)
+        print(f"Zbudowano stan od zera: {len(tx)} transakcji -> {args.state_dir}")
+    else:
+        tx = incremental_update(df, args.state_dir)
+        n_touched = df["Transaction ID"].nunique()
+        print(f"Dopisano {len(df)} wierszy ({n_touched} transakcji), przeliczono cechy {len(tx)} transakcji")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import argparse
+import time
+from pathlib import Path
+
+from src.config import MODEL_REGISTRY_DIR
+from src.feature_store import open_feature_store
+from src.registry import load_artifact, score_file, score_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scoring surowego pliku zamówień zapisanym modelem z rejestru.")
+    parser.add_argument("csv", type=Path, help="surowy plik zamówień (schemat order_dataset.csv) albo katalog magazynu cech")
+    parser.add_argument("--model", default="xgb_tuned", help="nazwa modelu w rejestrze")
+    parser.add_argument("--version", default=None, help="wersja artefaktu (domyślnie LATEST)")
+    parser.add_argument("--registry", type=Path, default=MODEL_REGISTRY_DIR)
+    parser.add_argument("--out", type=Path, default=Path("outputs/scores.csv"))
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    artifact = load_artifact(args.model, args.version, args.registry)
+    t_load = time.perf_counter() - t0
+    print(f"Model {args.model} ({artifact.meta['version']}, {artifact.meta['kind']}) wczytany w {t_load:.3f} s")
+
+    if args.csv.is_dir():
+        n = score_store(artifact, open_feature_store(args.csv), args.out, batch_size=args.batch_size)
+    else:
+        n = score_file(artifact, args.csv, args.out, batch_size=args.batch_size)
+    print(f"Oceniono {n} transakcji w {time.perf_counter() - t0:.2f} s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import argparse
+import asyncio
+from pathlib import Path
+
+from src.config import MODEL_REGISTRY_DIR
+from src.online import OnlineScorer
+from src.registry import load_artifact
+from src.serving import ScoringServer
+
+
+async def serve(args) -> None:
+    scorer = OnlineScorer(load_artifact(args.model, args.version, args.registry))
+    server = ScoringServer(scorer, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    port = await server.start(args.host, args.port)
+    print(f"Scoring {args.model} ({scorer.artifact.meta['version']}) na http://{args.host}:{port}/score")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokalny serwer HTTP do scoringu pojedynczych zamówień.")
+    parser.add_argument("--model", default="xgb_tuned", help="nazwa modelu w rejestrze")
+    parser.add_argument("--version", default=None, help="wersja artefaktu (domyślnie LATEST)")
+    parser.add_argument("--registry", type=Path, default=MODEL_REGISTRY_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch", type=int, default=64, help="maks. zamówień w jednej mikro-partii")
+    parser.add_argument("--max-wait-ms", type=float, default=0.0, help="maks. czekanie na dopełnienie partii (0 = bez czekania)")
+    args = parser.parse_args()
+    asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ TEST_SIZE = 0.2
 VAL_SIZE = 0.2
 RANDOM_STATE = 42
 
+CV_FOLDS = 10
+
 XGB_PARAMS = {
     "n_estimators": 300,
     "max_depth": 6,
@@ -16,3 +18,72 @@ XGB_PARAMS = {
     "eval_metric": "auc",
     "random_state": RANDOM_STATE
 }
+
+# Wczytywanie danych: tryb typowany (jawny schemat + cache Parquet)
+TYPED_INGESTION = True
+CACHE_DIR = Path("outputs/cache")
+CSV_CHUNKSIZE = 1_000_000
+
+# Przyrostowa budowa cech: stan (historia wierszy, tabela cech, encoder)
+FEATURE_STATE_DIR = Path("outputs/features")
+# Partycja stanu = zakres tylu kolejnych Transaction ID (nowe transakcje i późne zwroty
+# trafiają w ostatnie partycje, więc dostawa przepisuje tylko je)
+FEATURE_STATE_PARTITION_SIZE = 100_000
+
+# Magazyn cech na dysku (src/feature_store.py): pliki .npy otwierane przez mmap
+FEATURE_STORE_DIR = Path("outputs/feature_store")
+
+# Rejestr wytrenowanych modeli (src/registry.py) używany przez score.py
+MODEL_REGISTRY_DIR = Path("outputs/registry")
+# score_file: surowy CSV większy niż tyle bajtów dzielony jest na kubełki transakcji (~ten rozmiar CSV każdy)
+SCORE_BUCKET_BYTES = 256 * 2**20
+
+# Raport czasu i pamięci etapów main.py (src/profiling.py)
+RUN_REPORT_PATH = Path("outputs/run_report.json")
+
+# Hashe wejść wyrenderowanych wykresów (src/rendering.py) – niezmienione wykresy nie są rysowane ponownie
+RENDER_CACHE_PATH = Path("outputs/.render_cache.json")
+
+# Format kolumny Date (np. "%d/%m/%Y"); None -> wykrywany raz z danych
+DATE_FORMAT = None
+
+# CV i strojenie XGBoost: natywne xgb.train na foldach zbinowanych raz (src/xgb_native.py)
+XGB_NATIVE_CV = True
+XGB_EARLY_STOPPING_ROUNDS = 50
+# Siatka n_estimators w strojeniu: trial uczy max(XGB_ROUND_CUTOFFS) rund raz i ocenia AUC
+# po każdej liczbie rund z siatki (iteration_range) zamiast losować n_estimators i uczyć od nowa
+XGB_ROUND_CUTOFFS = (200, 300, 400, 500, 600, 700, 800)
+# Pruner Optuny (src/tuning.py PRUNERS): "median", "hyperband", "successive_halving", "none"
+XGB_PRUNER = "median"
+# Trwałe study Optuny: None = w pamięci; *.db -> SQLite, inna ścieżka -> plik dziennika
+# (np. Path("outputs/optuna/xgb_tuning.log")). Istniejące study jest wznawiane.
+OPTUNA_STORAGE = None
+OPTUNA_STUDY_NAME = "xgb_tuning"
+# Procesy Optuny na tej maszynie (>1 wymaga OPTUNA_STORAGE); wątki XGBoost dzielone między nie
+OPTUNA_WORKERS = 1
+
+# Równoległość (src/parallel.py): podział rdzeni między zadania (foldy, workery Optuny)
+# a wątki estymatora. "balanced" | "outer" | "inner" | "serial"
+PARALLEL_POLICY = "balanced"
+# Liczba rdzeni do wykorzystania; None -> os.cpu_count() (ustaw przy limitach cgroup/SLURM)
+N_CORES = None
+# Dane dla workerów joblib (foldy CV, workery Optuny): "memmap" -> X/y zapisane raz do pliku
+# .npy i otwierane przez mmap (worker dostaje referencję + indeksy foldu), "pickle" -> kopia w każdym zadaniu
+CV_DATA_MODE = "memmap"
+# Katalog plików memmap; None -> katalog tymczasowy systemu (np. Path("/dev/shm") = w RAM)
+SHARED_DATA_DIR = None
+
+# Krzywe ROC/PR na wykresach (src/metrics.py): powyżej tej liczby wierszy liczone z histogramu
+# wyników w METRIC_BINS przedziałach [0, 1] (strumieniowo, bez sortowania); ROC AUC w CV,
+# hold-oucie i tuningu jest zawsze dokładne (histogram tylko jawnie: roc_auc(..., exact=False))
+METRICS_EXACT_MAX_ROWS = 1_000_000
+METRIC_BINS = 10_000
+# Maksymalna liczba punktów krzywej ROC/PR na wykresie
+CURVE_MAX_POINTS = 500
+
+# Próg decyzji (src/thresholds.py) wybierany na predykcjach out-of-fold train:
+# "f1" | "cost" (koszt FP vs przeoczonego zwrotu FN) | "precision" (max recall przy precision >= cel)
+THRESHOLD_OBJECTIVE = "f1"
+THRESHOLD_COST_FP = 1.0
+THRESHOLD_COST_FN = 5.0
+THRESHOLD_TARGET_PRECISION = 0.5
@@ -1,11 +1,48 @@
+import json
+from collections import OrderedDict
+
+import joblib
 import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
 from sklearn.model_selection import StratifiedKFold, cross_validate
 
+from src.metrics import roc_auc
+from src.models import bagged_xgb_model, baseline_model, logreg_model, xgb_model
+from src.parallel import available_cores, parallel_budget, resolve_data_mode, share_arrays, shared_data, shared_folder
+from src.thresholds import select_threshold
+from src.train import _take_rows, train_and_evaluate
+from src.xgb_native import XGBFoldData, run_cv_xgb_native
+
+# Nazwy modeli używane przez FoldEngine -> fabryki z src/models.py
+MODEL_FACTORIES = {
+    "logreg": logreg_model,
+    "rf": baseline_model,
+    "xgb": xgb_model,
+    "xgb_bagged": bagged_xgb_model,
+}
+
+CV_METRICS = ["roc_auc", "f1", "precision", "recall", "accuracy"]
 
-def run_cv(model, X, y, random_state: int = 42, n_splits: int = 10) -> dict:
+
+def run_cv(
+    model,
+    X,
+    y,
+    random_state: int = 42,
+    n_splits: int = 10,
+    n_jobs: int | None = None,
+    data_mode: str | None = None,
+) -> dict:
     """
     10-krotna walidacja krzyżowa
     Zwraca średnie i odchylenia dla kilku metryk.
+
+    n_jobs: foldy liczone równolegle; None -> outer z parallel_budget (wątki samego
+            modelu ustawia jego fabryka w src/models.py)
+    data_mode: "memmap" | "pickle" (None -> config.CV_DATA_MODE); "memmap" zapisuje X/y
+            raz do pliku, a workery dostają referencję do memmap zamiast kopii (src/parallel.py)
     """
     cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
 
@@ -17,15 +54,17 @@ def run_cv(model, X, y, random_state: int = 42, n_splits: int = 10) -> dict:
         "accuracy": "accuracy",
     }
 
-    scores = cross_validate(
-        model,
-        X,
-        y,
-        cv=cv,
-        scoring=scoring,
-        n_jobs=-1,
-        return_train_score=False,
-    )
+    n_jobs = parallel_budget(n_splits)[0] if n_jobs is None else n_jobs
+    with shared_data(X, y, data_mode, n_jobs=n_jobs) as (X, y):
+        scores = cross_validate(
+            model,
+            X,
+            y,
+            cv=cv,
+            scoring=scoring,
+            n_jobs=n_jobs,
+            return_train_score=False,
+        )
 
     summary = {}
     for k, v in scores.items():
@@ -37,3 +76,186 @@ def run_cv(model, X, y, random_state: int = 42, n_splits: int = 10) -> dict:
             }
 
     return summary
+
+
+def _fit_predict_fold(model, X, y, train_idx, test_idx):
+    """Uczy model na jednym foldzie i zwraca (model, predykcje klas, prawdopodobieństwa)."""
+    model.fit(_take_rows(X, train_idx), _take_rows(y, train_idx))
+    X_test = _take_rows(X, test_idx)
+    return model, model.predict(X_test), model.predict_proba(X_test)[:, 1]
+
+
+def _fold_metrics(y_true, y_pred, y_proba) -> dict:
+    return {
+        "roc_auc": roc_auc(y_true, y_proba),
+        "f1": f1_score(y_true, y_pred, zero_division=0),
+        "precision": precision_score(y_true, y_pred, zero_division=0),
+        "recall": recall_score(y_true, y_pred, zero_division=0),
+        "accuracy": accuracy_score(y_true, y_pred),
+    }
+
+
+def data_fingerprint(X) -> str:
+    """
+    Odcisk danych do klucza cache: joblib.hash wartości (tablica float32 FeatureMatrix, wartości
+    DataFrame / Series / ndarray) razem z indeksem wierszy i nazwami kolumn, jeśli są.
+    Koszt jednego przejścia po danych – te same etykiety z innymi wartościami dają inny klucz.
+    """
+    index = getattr(X, "index", None)
+    columns = getattr(X, "columns", None)
+    return joblib.hash((
+        np.asarray(X),
+        None if index is None else np.asarray(index),
+        None if columns is None else list(columns),
+    ))
+
+
+class FoldEngine:
+    """
+    Wspólny silnik foldów dla CV, hold-outu i wykresów.
+
+    - indeksy foldów (StratifiedKFold) liczone są raz i udostępniane (np. tuningowi),
+    - wytrenowane modele foldów i predykcje out-of-fold są cache'owane pod kluczem
+      (nazwa modelu, parametry fabryki, fold), więc ten sam model nie jest uczony drugi raz,
+    - wyniki hold-outu (train_and_evaluate) cache'owane pod kluczem (model, parametry, nazwa splitu,
+      odcisk danych splitu – data_fingerprint), więc inne X/y pod tą samą nazwą nie trafiają w cache;
+      holdout_cache_size ogranicza liczbę trzymanych wyników (LRU), clear_cache zwalnia modele jawnie.
+
+    Modele podajemy nazwą z MODEL_FACTORIES i słownikiem argumentów fabryki,
+    np. ("xgb", {"scale_pos_weight": 3.0}) albo ("xgb", {"override_params": best_params}).
+
+    Rdzenie dzielimy wg parallel_budget: foldy uczone są po n_jobs naraz, każdy model
+    z inner_jobs wątkami; hold-out (jeden model) dostaje wszystkie rdzenie.
+
+    data_mode="memmap" (domyślnie config.CV_DATA_MODE): X/y zapisywane raz do pliku
+    na czas życia silnika, workery foldów dostają memmap i indeksy, nie kopię X.
+
+    xgb_native=True: cv_summary("xgb", ...) liczy CV natywnym xgb.train (run_cv_xgb_native)
+    na macierzach foldów zbinowanych raz na czas życia silnika (xgb_fold_data) zamiast
+    uczyć XGBClassifier w każdym foldzie. Modele foldów "xgb" nie trafiają wtedy do cache
+    (oof_predictions / select_threshold dalej uczą XGBClassifier).
+    """
+
+    def __init__(
+        self,
+        X,
+        y,
+        n_splits: int = 10,
+        random_state: int = 42,
+        n_jobs: int | None = None,
+        data_mode: str | None = None,
+        xgb_native: bool = False,
+        holdout_cache_size: int | None = None,
+    ):
+        outer, inner = parallel_budget(n_splits)
+        self.n_jobs = outer if n_jobs is None else n_jobs
+        self.inner_jobs = inner if n_jobs is None else max(1, available_cores() // max(1, self.n_jobs))
+        self.data_mode = resolve_data_mode(data_mode, self.n_jobs)
+        if self.data_mode == "memmap":
+            self._shared_folder = shared_folder()
+            X, y = share_arrays(X, y, self._shared_folder.name)
+        self.X = X
+        self.y = y
+        cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        self.folds = list(cv.split(X, y))
+        self._fold_cache: dict[tuple, tuple] = {}
+        self._holdout_cache: OrderedDict[tuple, dict] = OrderedDict()
+        self.holdout_cache_size = holdout_cache_size
+        self.xgb_native = xgb_native
+        self._xgb_fold_data: XGBFoldData | None = None
+
+    @staticmethod
+    def model_key(name: str, params: dict | None = None) -> tuple:
+        return name, json.dumps(params or {}, sort_keys=True, default=str)
+
+    @staticmethod
+    def make_model(name: str, params: dict | None = None, n_jobs: int | None = None):
+        return MODEL_FACTORIES[name](**(params or {}), n_jobs=n_jobs)
+
+    def fold_results(self, name: str, params: dict | None = None) -> list[tuple]:
+        """(model, predykcje klas, prawdopodobieństwa) dla każdego foldu; uczy tylko brakujące foldy."""
+        key = self.model_key(name, params)
+        missing = [k for k in range(len(self.folds)) if (*key, k) not in self._fold_cache]
+
+        if missing:
+            base = self.make_model(name, params, n_jobs=self.inner_jobs)
+            fitted = Parallel(n_jobs=self.n_jobs)(
+                delayed(_fit_predict_fold)(clone(base), self.X, self.y, *self.folds[k]) for k in missing
+            )
+            for k, res in zip(missing, fitted):
+                self._fold_cache[(*key, k)] = res
+
+        return [self._fold_cache[(*key, k)] for k in range(len(self.folds))]
+
+    def oof_predictions(self, name: str, params: dict | None = None) -> np.ndarray:
+        """Prawdopodobieństwa out-of-fold dla wszystkich wierszy X."""
+        oof = np.empty(len(self.y), dtype=float)
+        for (_, test_idx), (_, _, proba) in zip(self.folds, self.fold_results(name, params)):
+            oof[test_idx] = proba
+        return oof
+
+    def select_threshold(self, name: str, params: dict | None = None, rows=None, **kwargs) -> dict:
+        """
+        Próg decyzji (src/thresholds.select_threshold) z predykcji out-of-fold modelu.
+        rows: maska / indeksy wierszy X branych pod uwagę (np. tylko train, bez hold-outu);
+        kwargs: objective, cost_fp, cost_fn, target_precision.
+        """
+        oof = self.oof_predictions(name, params)
+        y = np.asarray(self.y)
+        if rows is not None:
+            oof, y = oof[rows], y[rows]
+        return select_threshold(y, oof, **kwargs)
+
+    def xgb_fold_data(self) -> XGBFoldData:
+        """Macierze QuantileDMatrix foldów silnika dla natywnego XGBoost (binowane raz, leniwie)."""
+        if self._xgb_fold_data is None:
+            self._xgb_fold_data = XGBFoldData(self.X, self.y, self.folds)
+        return self._xgb_fold_data
+
+    def cv_summary(self, name: str, params: dict | None = None) -> dict:
+        """Średnie i odchylenia metryk po foldach (ten sam format co run_cv)."""
+        if name == "xgb" and self.xgb_native:
+            params = dict(params or {})
+            early_stopping_rounds = params.pop("early_stopping_rounds", None)
+            model = self.make_model(name, params, n_jobs=available_cores())
+            return run_cv_xgb_native(
+                model.get_params(), fold_data=self.xgb_fold_data(), early_stopping_rounds=early_stopping_rounds,
+            )
+        y = np.asarray(self.y)
+        per_fold = [
+            _fold_metrics(y[test_idx], pred, proba)
+            for (_, test_idx), (_, pred, proba) in zip(self.folds, self.fold_results(name, params))
+        ]
+        return {
+            m: {
+                "mean": float(np.mean([f[m] for f in per_fold])),
+                "std": float(np.std([f[m] for f in per_fold])),
+            }
+            for m in CV_METRICS
+        }
+
+    def holdout(self, name: str, params: dict | None, X_train, X_test, y_train, y_test, split: str = "holdout") -> dict:
+        """
+        train_and_evaluate z cache: ten sam model na tych samych danych uczony jest raz.
+        split to tylko etykieta – klucz zawiera też odcisk X_train, X_test, y_train i y_test.
+        """
+        fingerprint = tuple(data_fingerprint(a) for a in (X_train, X_test, y_train, y_test))
+        key = (*self.model_key(name, params), split, fingerprint)
+        if key in self._holdout_cache:
+            self._holdout_cache.move_to_end(key)
+            return self._holdout_cache[key]
+
+        model = self.make_model(name, params, n_jobs=available_cores())
+        self._holdout_cache[key] = result = train_and_evaluate(model, X_train, X_test, y_train, y_test)
+        if self.holdout_cache_size is not None:
+            while len(self._holdout_cache) > self.holdout_cache_size:
+                self._holdout_cache.popitem(last=False)
+        return result
+
+    def clear_cache(self, name: str | None = None) -> None:
+        """Zwalnia modele foldów, wyniki hold-outu i macierze natywnego XGBoost (modelu name albo wszystkie)."""
+        for cache in (self._fold_cache, self._holdout_cache):
+            for key in [k for k in cache if name is None or k[0] == name]:
+                del cache[key]
+        if name in (None, "xgb"):
+            self._xgb_fold_data = None
@@ -1,15 +1,160 @@
+import hashlib
+import json
+from collections.abc import Iterator
+
 import pandas as pd
+from pandas.api.types import union_categoricals
 from pathlib import Path
 
+from src.config import CACHE_DIR, CSV_CHUNKSIZE
+from src.preprocessing import row_hashes
+
+# Jawny schemat surowych danych: tylko kolumny czytane przez
+# build_features_transaction_level, z kompaktowymi typami.
+RAW_SCHEMA = {
+    "Transaction ID": "int64",
+    "Item ID": "int64",
+    "Date": "string",
+    "Category": "category",
+    "Version": "category",
+    "Item Code": "category",
+    "Purchased Item Count": "int32",
+    "Refunded Item Count": "int32",
+    "Final Quantity": "int32",
+    "Total Revenue": "float32",
+    "Price Reductions": "float32",
+    "Sales Tax": "float32",
+    "Refunds": "float32",
+}
+# Kolumny RAW_SCHEMA, których może nie być w pliku (cechy liczone są wtedy bez nich)
+OPTIONAL_COLUMNS = ("Item Code",)
+# Hash całego surowego wiersza (wszystkie kolumny CSV, także odrzucone): dzięki niemu
+# deduplikacja po przycięciu kolumn daje to samo co drop_duplicates na pełnym pliku
+ROW_HASH_COLUMN = "Row Hash"
+
+# Zmiana wersji unieważnia cache (np. po zmianie schematu)
+SCHEMA_VERSION = 2
+
+
+def file_content_hash(path: Path, block_size: int = 1 << 20) -> str:
+    """Hash zawartości pliku (blake2b), liczony blokami bez wczytywania całości do pamięci."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _schema_key() -> str:
+    payload = json.dumps({"version": SCHEMA_VERSION, "schema": RAW_SCHEMA}, sort_keys=True)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=4).hexdigest()
+
 
-def load_data(path: Path) -> pd.DataFrame:
+def cache_path_for(path: Path, cache_dir: Path = CACHE_DIR, source_hash: str | None = None) -> Path:
+    """
+    Ścieżka pliku Parquet w cache dla danego CSV (klucz = hash treści + wersja schematu).
+    source_hash: już policzony file_content_hash(path) – plik nie jest wtedy czytany ponownie.
+    """
+    source_hash = source_hash or file_content_hash(path)
+    return Path(cache_dir) / f"{path.stem}-{source_hash}-{_schema_key()}.parquet"
+
+
+def _concat_column(parts: list[pd.Series], dtype: str) -> pd.Series:
+    """Skleja kawałki jednej kolumny, zachowując dtype category (kategorie kawałków mogą się różnić)."""
+    if dtype == "category":
+        return pd.Series(union_categoricals(parts))
+    return pd.concat(parts, ignore_index=True)
+
+
+def iter_csv_typed(path: Path, chunksize: int = CSV_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """
+    Kawałki CSV w schemacie RAW_SCHEMA (kolumny obecne w pliku) + ROW_HASH_COLUMN.
+
+    Każdy chunk jest czytany ze wszystkimi kolumnami (spoza RAW_SCHEMA jako tekst), hash
+    wiersza liczony jest z całości, a dopiero potem kolumny są przycinane – wiersze różniące
+    się tylko odrzuconymi kolumnami pozostają różne. Brak kolumny spoza OPTIONAL_COLUMNS -> ValueError.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    missing = [c for c in RAW_SCHEMA if c not in header and c not in OPTIONAL_COLUMNS]
+    if missing:
+        raise ValueError(f"Brak kolumn w {path}: {missing}")
+    keep = [c for c in RAW_SCHEMA if c in header]
+    dtype = {c: RAW_SCHEMA.get(c, "string") for c in header}
+    for chunk in pd.read_csv(path, dtype=dtype, chunksize=chunksize):
+        hashes = row_hashes(chunk)
+        chunk = chunk[keep]
+        chunk[ROW_HASH_COLUMN] = hashes
+        yield chunk
+
+
+def read_csv_typed(path: Path, chunksize: int = CSV_CHUNKSIZE) -> pd.DataFrame:
+    """
+    Wczytuje CSV kawałkami z jawnym schematem (RAW_SCHEMA) i tylko potrzebnymi kolumnami
+    (iter_csv_typed: + ROW_HASH_COLUMN, "Item Code" opcjonalny).
+
+    Każdy chunk jest od razu rozbijany na niezależne kawałki kolumn i zwalniany, a na końcu
+    kolumny są sklejane po jednej (kawałki sklejonej kolumny zwalniane od razu); ramka
+    powstaje bez konsolidacji bloków (copy=False). Szczyt pamięci: dane w typach docelowych
+    + jeden chunk podczas czytania, potem dane + jedna kolumna – zamiast ~2x danych
+    przy pd.concat listy chunków.
+    """
+    schema = {**RAW_SCHEMA, ROW_HASH_COLUMN: "uint64"}
+    parts: dict[str, list[pd.Series]] = {}
+    for chunk in iter_csv_typed(path, chunksize=chunksize):
+        for c in chunk.columns:
+            # kopia: kolumna numeryczna chunka to widok na wspólny blok 2D, który trzymałby cały chunk
+            parts.setdefault(c, []).append(chunk[c].copy())
+        del chunk
+    if not parts:
+        return pd.DataFrame({c: pd.Series(dtype=t) for c, t in schema.items()})
+
+    columns = {}
+    for c in list(parts):
+        columns[c] = _concat_column(parts.pop(c), schema[c])
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_data(
+    path: Path,
+    typed: bool = False,
+    cache: bool = False,
+    cache_dir: Path = CACHE_DIR,
+    chunksize: int = CSV_CHUNKSIZE,
+    source_hash: str | None = None,
+) -> pd.DataFrame:
     """
     Ładuje dane z pliku do DataFrame na podstawie przekazanej ścieżki.
     W przypadku nieprawidłowej ścieżku rzuca wyjątkiem
     :param path: Ścieżka do danych
+    :param typed: True -> tylko kolumny z RAW_SCHEMA, w kompaktowych typach, czytane kawałkami,
+                  + ROW_HASH_COLUMN (hash pełnego wiersza do deduplikacji)
+    :param cache: True -> wynik trybu typed jest zapisywany do Parquet w cache_dir
+                  i przy kolejnym uruchomieniu (ten sam plik, ten sam schemat) czytany z cache
+    :param cache_dir: Katalog cache
+    :param chunksize: Liczba wierszy w jednym chunku CSV
+    :param source_hash: file_content_hash(path), jeśli wywołujący już go policzył (klucz cache bez
+                        drugiego czytania pliku)
     :return: Dane w postaci DataFrame
     """
     if not path.exists():
         raise FileNotFoundError(f"File not found: {path}")
-    df = pd.read_csv(path)
+    if cache and not typed:
+        raise ValueError("cache=True wymaga typed=True (cache przechowuje dane w jawnym schemacie).")
+
+    if not typed:
+        df = pd.read_csv(path)
+        return df
+
+    if not cache:
+        return read_csv_typed(path, chunksize=chunksize)
+
+    cached = cache_path_for(path, cache_dir, source_hash)
+    if cached.exists():
+        return pd.read_parquet(cached)
+
+    df = read_csv_typed(path, chunksize=chunksize)
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cached.with_suffix(".parquet.tmp")
+    df.to_parquet(tmp, index=False)
+    tmp.replace(cached)
     return df
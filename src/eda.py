@@ -1,7 +1,10 @@
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from src.rendering import FigureJob
+
 
 def ensure_output_dir(path: str = "outputs/eda") -> Path:
     """Tworzy katalog na wykresy jeśli nie istnieje."""
@@ -22,7 +25,136 @@ def descriptive_stats(df: pd.DataFrame) -> pd.DataFrame:
     return df.describe().T
 
 
-def target_distribution(df: pd.DataFrame, target_col: str = "Returned", save_path: str | None = None) -> None:
+def _finish(fig, save_path: str | None, show: bool) -> None:
+    """Zapis (jeśli save_path) i zamknięcie figury; okno tylko na życzenie (show=True)."""
+    if save_path:
+        fig.savefig(save_path, dpi=150)
+    if show:
+        plt.show()
+    plt.close(fig)
+
+
+# --- Funkcje rysujące na gotowych danych (używane przez src/rendering.py) ---
+
+def target_distribution_figure(counts: pd.Series, target_col: str = "Returned", save_path: str | None = None, show: bool = False) -> None:
+    fig, ax = plt.subplots()
+    counts.plot(kind="bar", ax=ax)
+    ax.set_title(f"Rozkład klasy {target_col}")
+    ax.set_xlabel(target_col)
+    ax.set_ylabel("Liczba transakcji")
+    fig.tight_layout()
+    _finish(fig, save_path, show)
+
+
+def histogram_figure(values, col: str, bins: int = 30, save_path: str | None = None, show: bool = False) -> None:
+    fig, ax = plt.subplots()
+    ax.hist(values[~np.isnan(values)], bins=bins)
+    ax.grid(True)
+    ax.set_title(f"Histogram: {col}")
+    ax.set_xlabel(col)
+    ax.set_ylabel("Liczność")
+    fig.tight_layout()
+    _finish(fig, save_path, show)
+
+
+def boxplot_figure(data0, data1, col: str, target_col: str = "Returned", save_path: str | None = None, show: bool = False) -> None:
+    fig, ax = plt.subplots()
+    ax.boxplot([data0, data1], showfliers=False)
+    ax.set_xticks([1, 2], ["0", "1"])
+    ax.set_title(f"Boxplot: {col} vs {target_col}")
+    ax.set_xlabel(target_col)
+    ax.set_ylabel(col)
+    fig.tight_layout()
+    _finish(fig, save_path, show)
+
+
+def scatter_figure(points0: tuple, points1: tuple, x: str, y: str, target_col: str = "Returned",
+                   save_path: str | None = None, show: bool = False) -> None:
+    fig, ax = plt.subplots()
+    ax.scatter(*points0, alpha=0.25, label=f"{target_col}=0")
+    ax.scatter(*points1, alpha=0.25, label=f"{target_col}=1")
+    ax.set_title(f"Scatter: {x} vs {y}")
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    ax.legend()
+    fig.tight_layout()
+    _finish(fig, save_path, show)
+
+
+def correlation_heatmap_figure(corr: np.ndarray, columns: list[str], save_path: str | None = None, show: bool = False) -> None:
+    fig, ax = plt.subplots(figsize=(10, 8))
+    image = ax.imshow(corr, aspect="auto")
+    ax.set_title("Heatmapa korelacji (cechy numeryczne)")
+    fig.colorbar(image)
+    ax.set_xticks(range(len(columns)), columns, rotation=90)
+    ax.set_yticks(range(len(columns)), columns)
+    fig.tight_layout()
+    _finish(fig, save_path, show)
+
+
+def _column_values(df: pd.DataFrame, col: str) -> np.ndarray:
+    return df[col].to_numpy(dtype=float)
+
+
+def _by_target(df: pd.DataFrame, col: str, target_col: str) -> tuple[np.ndarray, np.ndarray]:
+    is_pos = df[target_col].to_numpy() == 1
+    values = _column_values(df, col)
+    return values[~is_pos], values[is_pos]
+
+
+def eda_figure_jobs(
+    df: pd.DataFrame,
+    cols: list[str],
+    save_dir: str = "outputs/eda",
+    target_col: str = "Returned",
+    scatter: tuple[str, str] | None = None,
+    bins: int = 30,
+) -> list[FigureJob]:
+    """
+    Wykresy EDA jako zadania dla render_figures: rozkład targetu, histogramy i boxploty
+    cols, scatter (x, y) oraz heatmapa korelacji. Do workerów trafiają tylko potrzebne
+    kolumny (tablice numpy) i gotowa macierz korelacji, nie cała ramka.
+    """
+    out = ensure_output_dir(save_dir)
+    cols = [c for c in cols if c in df.columns]
+
+    jobs = [FigureJob(
+        target_distribution_figure,
+        {"counts": df[target_col].value_counts().sort_index(), "target_col": target_col},
+        out / "target_distribution.png",
+    )]
+    jobs += [
+        FigureJob(histogram_figure, {"values": _column_values(df, col), "col": col, "bins": bins}, out / f"hist_{col}.png")
+        for col in cols
+    ]
+    for col in cols:
+        data0, data1 = _by_target(df, col, target_col)
+        jobs.append(FigureJob(
+            boxplot_figure,
+            {"data0": data0[~np.isnan(data0)], "data1": data1[~np.isnan(data1)], "col": col, "target_col": target_col},
+            out / f"box_{col}_by_{target_col}.png",
+        ))
+    if scatter is not None and all(c in df.columns for c in scatter):
+        x, y = scatter
+        (x0, x1), (y0, y1) = _by_target(df, x, target_col), _by_target(df, y, target_col)
+        jobs.append(FigureJob(
+            scatter_figure,
+            {"points0": (x0, y0), "points1": (x1, y1), "x": x, "y": y, "target_col": target_col},
+            out / "scatter_revenue_discount.png",
+        ))
+
+    corr = df.drop(columns=["Transaction ID"], errors="ignore").select_dtypes(include="number").corr(numeric_only=True)
+    jobs.append(FigureJob(
+        correlation_heatmap_figure,
+        {"corr": corr.to_numpy(), "columns": list(corr.columns)},
+        out / "corr_heatmap.png",
+    ))
+    return jobs
+
+
+# --- Wersje interaktywne (pojedynczy wykres z ramki; show=True otwiera okno) ---
+
+def target_distribution(df: pd.DataFrame, target_col: str = "Returned", save_path: str | None = None, show: bool = False) -> None:
     """Rozkład klasy docelowej + wykres słupkowy."""
     counts = df[target_col].value_counts().sort_index()
     perc = (counts / len(df) * 100).round(2)
@@ -30,80 +162,40 @@ def target_distribution(df: pd.DataFrame, target_col: str = "Returned", save_pat
     print("Rozkład targetu:")
     print(pd.DataFrame({"count": counts, "percent": perc}))
 
-    ax = counts.plot(kind="bar")
-    ax.set_title(f"Rozkład klasy {target_col}")
-    ax.set_xlabel(target_col)
-    ax.set_ylabel("Liczba transakcji")
-    plt.tight_layout()
+    target_distribution_figure(counts, target_col, save_path, show)
 
-    if save_path:
-        plt.savefig(save_path, dpi=150)
-    plt.show()
 
-
-def histograms(df: pd.DataFrame, cols: list[str], bins: int = 30, save_dir: str | None = None) -> None:
+def histograms(df: pd.DataFrame, cols: list[str], bins: int = 30, save_dir: str | None = None, show: bool = False) -> None:
     """Histogramy dla wybranych kolumn."""
     out = ensure_output_dir(save_dir) if save_dir else None
 
     for col in cols:
         if col not in df.columns:
             continue
-
-        plt.figure()
-        df[col].hist(bins=bins)
-        plt.title(f"Histogram: {col}")
-        plt.xlabel(col)
-        plt.ylabel("Liczność")
-        plt.tight_layout()
-
-        if out:
-            plt.savefig(out / f"hist_{col}.png", dpi=150)
-        plt.show()
+        histogram_figure(_column_values(df, col), col, bins, out / f"hist_{col}.png" if out else None, show)
 
 
-def boxplots_by_target(df: pd.DataFrame, cols: list[str], target_col: str = "Returned", save_dir: str | None = None) -> None:
+def boxplots_by_target(df: pd.DataFrame, cols: list[str], target_col: str = "Returned", save_dir: str | None = None,
+                       show: bool = False) -> None:
     """Boxploty cech w podziale na Returned (0 vs 1)."""
     out = ensure_output_dir(save_dir) if save_dir else None
 
     for col in cols:
         if col not in df.columns:
             continue
-
-        data0 = df[df[target_col] == 0][col]
-        data1 = df[df[target_col] == 1][col]
-
-        plt.figure()
-        plt.boxplot([data0, data1], labels=["0", "1"], showfliers=False)
-        plt.title(f"Boxplot: {col} vs {target_col}")
-        plt.xlabel(target_col)
-        plt.ylabel(col)
-        plt.tight_layout()
-
-        if out:
-            plt.savefig(out / f"box_{col}_by_{target_col}.png", dpi=150)
-        plt.show()
+        data0, data1 = _by_target(df, col, target_col)
+        save_path = out / f"box_{col}_by_{target_col}.png" if out else None
+        boxplot_figure(data0[~np.isnan(data0)], data1[~np.isnan(data1)], col, target_col, save_path, show)
 
 
-def scatter_by_target(df: pd.DataFrame, x: str, y: str, target_col: str = "Returned", save_path: str | None = None) -> None:
+def scatter_by_target(df: pd.DataFrame, x: str, y: str, target_col: str = "Returned", save_path: str | None = None,
+                      show: bool = False) -> None:
     """Scatter x vs y z rozróżnieniem klas."""
     if x not in df.columns or y not in df.columns:
         return
 
-    d0 = df[df[target_col] == 0]
-    d1 = df[df[target_col] == 1]
-
-    plt.figure()
-    plt.scatter(d0[x], d0[y], alpha=0.25, label=f"{target_col}=0")
-    plt.scatter(d1[x], d1[y], alpha=0.25, label=f"{target_col}=1")
-    plt.title(f"Scatter: {x} vs {y}")
-    plt.xlabel(x)
-    plt.ylabel(y)
-    plt.legend()
-    plt.tight_layout()
-
-    if save_path:
-        plt.savefig(save_path, dpi=150)
-    plt.show()
+    (x0, x1), (y0, y1) = _by_target(df, x, target_col), _by_target(df, y, target_col)
+    scatter_figure((x0, y0), (x1, y1), x, y, target_col, save_path, show)
 
 
 def correlation_with_target(df: pd.DataFrame, target_col: str = "Returned", top_n: int = 10) -> pd.Series:
@@ -124,19 +216,7 @@ def correlation_with_target(df: pd.DataFrame, target_col: str = "Returned", top_
     return corr_to_target
 
 
-def correlation_heatmap(df: pd.DataFrame, save_path: str | None = None) -> None:
+def correlation_heatmap(df: pd.DataFrame, save_path: str | None = None, show: bool = False) -> None:
     """Heatmapa korelacji dla kolumn numerycznych."""
-    num_df = df.select_dtypes(include="number")
-    corr = num_df.corr(numeric_only=True)
-
-    plt.figure(figsize=(10, 8))
-    plt.imshow(corr, aspect="auto")
-    plt.title("Heatmapa korelacji (cechy numeryczne)")
-    plt.colorbar()
-    plt.xticks(range(len(corr.columns)), corr.columns, rotation=90)
-    plt.yticks(range(len(corr.columns)), corr.columns)
-    plt.tight_layout()
-
-    if save_path:
-        plt.savefig(save_path, dpi=150)
-    plt.show()
+    corr = df.select_dtypes(include="number").corr(numeric_only=True)
+    correlation_heatmap_figure(corr.to_numpy(), list(corr.columns), save_path, show)
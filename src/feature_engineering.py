@@ -1,6 +1,17 @@
+import json
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
 
+from src.config import CSV_CHUNKSIZE, DATE_FORMAT
+from src.data_loader import ROW_HASH_COLUMN, iter_csv_typed
+from src.preprocessing import HashSet, remove_full_row_duplicates
+
+# Wersja definicji cech – podbić przy każdej zmianie, która zmienia wartości/kolumny
+# (unieważnia zapisane magazyny cech, src/feature_store.py)
+FEATURE_VERSION = 1
+
 # Kolumny, które zdradzają zwrot / powstają po zwrocie.
 # Używamy ich do stworzenia targetu, ale nie wchodzic do X.
 LEAKAGE_COLS = [
@@ -12,6 +23,26 @@ LEAKAGE_COLS = [
     "Sales Tax",
 ]
 
+# Formaty próbowane przy wykrywaniu formatu daty (dzień przed miesiącem, jak w danych źródłowych)
+DATE_FORMATS = (
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%Y-%m-%d",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+)
+
+# Cechy-sumy liczone z wierszy zakupowych (nazwa cechy -> kolumna źródłowa)
+_SUM_COLS = {
+    "ItemsPurchased_sum": "Purchased Item Count",
+    "FinalQuantity_sum": "Final Quantity",
+    "TotalRevenue_sum": "Total Revenue",
+    "PriceReductions_sum": "Price Reductions",
+    "SalesTax_sum": "Sales Tax",
+}
+
 
 def _frequency_encoding_map(series: pd.Series) -> dict:
     """Zwraca mapę: wartość -> częstość (0..1)."""
@@ -19,86 +50,157 @@ def _frequency_encoding_map(series: pd.Series) -> dict:
     return freq.to_dict()
 
 
-def build_features_transaction_level(df: pd.DataFrame) -> pd.DataFrame:
+def detect_date_format(dates, sample_size: int = 1000) -> str | None:
     """
-    Buduje dane na poziomie transakcji (Transaction ID).
+    Wykrywa format daty na próbce wartości (pierwszy z DATE_FORMATS, który parsuje całą próbkę).
+    None, jeśli żaden nie pasuje.
+    """
+    sample = pd.Series(dates).dropna()
+    sample = sample[:sample_size]
+    if len(sample) == 0:
+        return None
+    for fmt in DATE_FORMATS:
+        if pd.to_datetime(sample, format=fmt, errors="coerce").notna().all():
+            return fmt
+    return None
 
-    Logika:
-    - Target Returned (0/1):
-        Returned = 1, jeśli w transakcji wystąpił jakikolwiek zwrot
-        (Refunded Item Count < 0 lub Refunds < 0)
-    - Cechy liczymy TYLKO z wierszy zakupowych (Purchased Item Count > 0),
-      żeby model nie widział sygnałów zwrotu w feature'ach (data leakage).
-    - Kategoryczne kodujemy prostym Frequency Encoding (Category, Version),
-      bo Version może być czasem pojedynczą liczbą/tekstem.
 
-    Zwraca:
-    - DataFrame: 1 wiersz = 1 transakcja, z kolumną targetu "Returned".
+def _parse_dates(dates: pd.Series, date_format: str | None = None) -> pd.Series:
     """
+    Parsowanie daty zakupu (dzień pierwszy, błędne wartości -> NaT).
 
-    df = df.copy()
+    Daty mocno się powtarzają między pozycjami, więc parsujemy tylko unikalne
+    napisy, ze znanym formatem (podanym albo wykrytym raz) zamiast zgadywania
+    formatu per element; wynik rozkładamy z powrotem po kodach.
+    """
+    codes, uniques = pd.factorize(dates)
+    if date_format is None:
+        date_format = detect_date_format(uniques)
 
-    # Usuwamy duplikaty całych wierszy
-    df = df.drop_duplicates()
+    if date_format is not None:
+        parsed = pd.to_datetime(uniques, format=date_format, errors="coerce")
+    else:
+        parsed = pd.to_datetime(uniques, errors="coerce", dayfirst=True)
 
-    # Target Returned na poziomie transakcji
-    # Wiersz zwrotu rozpoznajemy po ujemnych wartościach
-    is_refund_row = (df["Refunded Item Count"] < 0) | (df["Refunds"] < 0)
-    returned_by_tx = (
-        df.assign(_refund=is_refund_row)
-        .groupby("Transaction ID")["_refund"]
-        .any()
-        .astype(int)
-    )
+    # kod -1 (brak daty) trafia na dopisany na końcu NaT
+    lookup = np.append(np.asarray(parsed, dtype="datetime64[ns]"), np.datetime64("NaT", "ns"))
+    return pd.Series(lookup.take(codes), index=dates.index, name=dates.name)
 
-    # Bierzemy tylko wiersze zakupowe do liczenia cech
-    purchases = df[df["Purchased Item Count"] > 0].copy()
 
-    # Parsowanie daty
-    dt = pd.to_datetime(purchases["Date"], errors="coerce", dayfirst=True)
-    purchases["_date"] = dt
+def _calendar_features(dates: pd.Series) -> dict[str, np.ndarray]:
+    """
+    Cechy kalendarzowe (Year, Month, DayOfWeek, IsWeekend, Quarter) z jednej tablicy
+    liczonej dla unikalnych dni; brak daty -> 0 we wszystkich polach.
+    """
+    inverse, days = pd.factorize(np.asarray(dates, dtype="datetime64[D]"), use_na_sentinel=False)
+    idx = pd.DatetimeIndex(days)
+    weekday = idx.weekday
+    table = np.column_stack([
+        idx.year,
+        idx.month,
+        weekday,
+        np.isin(weekday, [5, 6]),
+        idx.quarter,
+    ])
+    table = np.nan_to_num(table.astype(float), nan=0.0).astype(np.int64)
+    table[idx.isna()] = 0
 
-    # Frequency encoding dla Category i Version
-    cat_freq_map = _frequency_encoding_map(purchases["Category"])
-    ver_freq_map = _frequency_encoding_map(purchases["Version"])
+    names = ["Year", "Month", "DayOfWeek", "IsWeekend", "Quarter"]
+    return {name: table[inverse, i] for i, name in enumerate(names)}
 
-    purchases["Category_freq"] = purchases["Category"].map(cat_freq_map).fillna(0.0)
-    purchases["Version_freq"] = purchases["Version"].map(ver_freq_map).fillna(0.0)
 
-    # prefix z Item Code i jego freq encoding
-    if "Item Code" in purchases.columns:
-        purchases["ItemCodePrefix"] = purchases["Item Code"].astype(str).str.split("-").str[0]
-        prefix_map = _frequency_encoding_map(purchases["ItemCodePrefix"])
-        purchases["ItemCodePrefix_freq"] = purchases["ItemCodePrefix"].map(prefix_map).fillna(0.0)
+def _item_code_prefix(item_code: pd.Series) -> pd.Series:
+    """
+    Prefiks kodu produktu (część przed pierwszym '-').
+    Kody mocno się powtarzają, więc dzielimy tylko unikalne wartości.
+    """
+    codes, uniques = pd.factorize(item_code, use_na_sentinel=False)
+    prefixes = pd.Series(uniques).astype(str).str.split("-").str[0].to_numpy()
+    return pd.Series(prefixes[codes], index=item_code.index, name=item_code.name)
 
-    # Agregacje po Transaction ID
-    g = purchases.groupby("Transaction ID")
 
-    tx = pd.DataFrame({
-        "Transaction ID": g.size().index,
+def _categorical_sources(df: pd.DataFrame) -> dict[str, pd.Series]:
+    """Kolumny kodowane frequency encodingiem (ItemCodePrefix tylko jeśli jest Item Code)."""
+    sources = {"Category": df["Category"], "Version": df["Version"]}
+    if "Item Code" in df.columns:
+        sources["ItemCodePrefix"] = _item_code_prefix(df["Item Code"])
+    return sources
 
-        # daty (bierzemy najwcześniejszą datę zakupu w transakcji)
-        "PurchaseDate": g["_date"].min(),
 
-        # wolumen
-        "ItemsPurchased_sum": g["Purchased Item Count"].sum(),
-        "FinalQuantity_sum": g["Final Quantity"].sum(),
-        "UniqueItems_n": g["Item ID"].nunique(),
-        "UniqueCategories_n": g["Category"].nunique(),
+class FeatureEncoder:
+    """
+    Frequency encoding uczony raz (fit) i stosowany wielokrotnie (transform).
 
-        # kasa
-        "TotalRevenue_sum": g["Total Revenue"].sum(),
-        "PriceReductions_sum": g["Price Reductions"].sum(),
-        "SalesTax_sum": g["Sales Tax"].sum(),
+    Dla każdej kolumny (Category, Version, ItemCodePrefix) trzymamy tablicę
+    kategorii i równoległą tablicę częstości. transform zamienia wartości na
+    kody kategorii i robi wektorowe `take` z tablicy częstości
+    (nieznane wartości / NaN -> 0.0), bez Series.map(dict).
 
-        # agregacje z FE
-        "Category_freq_mean": g["Category_freq"].mean(),
-        "Version_freq_mean": g["Version_freq"].mean(),
-    })
+    Stan zapisuje się do JSON (save/load), obok modelu.
+    """
+
+    def __init__(self):
+        self.categories_: dict[str, np.ndarray] = {}
+        self.frequencies_: dict[str, np.ndarray] = {}
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.categories_)
+
+    def fit(self, df: pd.DataFrame) -> "FeatureEncoder":
+        """Uczy częstości na wierszach zakupowych (Purchased Item Count > 0) surowych danych."""
+        purchases = df[df["Purchased Item Count"] > 0]
+        for name, values in _categorical_sources(purchases).items():
+            freq_map = _frequency_encoding_map(values)
+            self.categories_[name] = np.array(list(freq_map), dtype=object)
+            self.frequencies_[name] = np.fromiter(freq_map.values(), dtype=float, count=len(freq_map))
+        return self
+
+    def transform_column(self, name: str, values: pd.Series) -> np.ndarray:
+        """Częstość dla każdego wiersza: jedno wyszukanie kodu + take."""
+        codes = pd.Categorical(values, categories=self.categories_[name]).codes
+        # kod -1 (nieznana wartość / NaN) trafia na dopisane na końcu 0.0
+        lookup = np.append(self.frequencies_[name], 0.0)
+        return lookup.take(codes)
+
+    def frequency_series(self, name: str) -> pd.Series:
+        """Tablica częstości jako Series indeksowana kategoriami."""
+        return pd.Series(self.frequencies_[name], index=pd.Index(self.categories_[name], dtype=object))
+
+    def to_dict(self) -> dict:
+        return {
+            name: {
+                "categories": self.categories_[name].tolist(),
+                "frequencies": self.frequencies_[name].tolist(),
+            }
+            for name in self.categories_
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "FeatureEncoder":
+        encoder = cls()
+        for name, table in state.items():
+            encoder.categories_[name] = np.array(table["categories"], dtype=object)
+            encoder.frequencies_[name] = np.asarray(table["frequencies"], dtype=float)
+        return encoder
 
-    if "ItemCodePrefix_freq" in purchases.columns:
-        tx["ItemCodePrefix_freq_mean"] = g["ItemCodePrefix_freq"].mean()
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
 
+    @classmethod
+    def load(cls, path: str | Path) -> "FeatureEncoder":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def _finalize_transaction_features(tx: pd.DataFrame, returned_by_tx: pd.Series) -> pd.DataFrame:
+    """
+    Wspólny koniec budowy cech: z agregatów na poziomie transakcji
+    (z kolumną PurchaseDate) liczy cechy pochodne, kalendarzowe i dołącza target.
+    """
     # Cechy pochodne
     # Uwaga: dzielenie przez 0 zabezpieczamy
     tx["DiscountRatio"] = tx["PriceReductions_sum"] / tx["TotalRevenue_sum"].replace(0, np.nan)
@@ -111,11 +213,8 @@ def build_features_transaction_level(df: pd.DataFrame) -> pd.DataFrame:
     tx["UnitPrice"] = tx["UnitPrice"].fillna(0.0)
 
     # Rozbijamy datę na proste cechy
-    tx["Year"] = tx["PurchaseDate"].dt.year.fillna(0).astype(int)
-    tx["Month"] = tx["PurchaseDate"].dt.month.fillna(0).astype(int)
-    tx["DayOfWeek"] = tx["PurchaseDate"].dt.weekday.fillna(0).astype(int)
-    tx["IsWeekend"] = tx["DayOfWeek"].isin([5, 6]).astype(int)
-    tx["Quarter"] = tx["PurchaseDate"].dt.quarter.fillna(0).astype(int)
+    for name, values in _calendar_features(tx["PurchaseDate"]).items():
+        tx[name] = values
 
     # surową datę można wywalić
     tx = tx.drop(columns=["PurchaseDate"])
@@ -126,3 +225,275 @@ def build_features_transaction_level(df: pd.DataFrame) -> pd.DataFrame:
     tx = tx.replace([np.inf, -np.inf], np.nan).fillna(0.0)
 
     return tx
+
+
+def build_features_transaction_level(
+    df: pd.DataFrame,
+    encoder: FeatureEncoder | None = None,
+    date_format: str | None = DATE_FORMAT,
+    deduplicated: bool = False,
+) -> pd.DataFrame:
+    """
+    Buduje dane na poziomie transakcji (Transaction ID).
+
+    Logika:
+    - Target Returned (0/1):
+        Returned = 1, jeśli w transakcji wystąpił jakikolwiek zwrot
+        (Refunded Item Count < 0 lub Refunds < 0)
+    - Cechy liczymy TYLKO z wierszy zakupowych (Purchased Item Count > 0),
+      żeby model nie widział sygnałów zwrotu w feature'ach (data leakage).
+    - Kategoryczne kodujemy prostym Frequency Encoding (Category, Version),
+      bo Version może być czasem pojedynczą liczbą/tekstem.
+    - encoder: wytrenowany FeatureEncoder (np. tylko na train). Bez niego
+      częstości są uczone na przekazanych danych.
+    - date_format: format kolumny Date; None -> wykrywany raz z danych.
+    - deduplicated: True -> df jest już bez duplikatów całych wierszy
+      (np. po preprocessing_pipeline), więc nie szukamy ich drugi raz.
+
+    Zwraca:
+    - DataFrame: 1 wiersz = 1 transakcja, z kolumną targetu "Returned".
+    """
+
+    # Usuwamy duplikaty całych wierszy (po hashach wierszy)
+    if not deduplicated:
+        df = remove_full_row_duplicates(df)
+
+    # Wiersz zwrotu rozpoznajemy po ujemnych wartościach,
+    # cechy liczymy tylko z wierszy zakupowych
+    is_refund_row = (df["Refunded Item Count"] < 0) | (df["Refunds"] < 0)
+    is_purchase = df["Purchased Item Count"] > 0
+
+    # Frequency encoding (częstości uczone na wierszach zakupowych)
+    if encoder is None:
+        encoder = FeatureEncoder().fit(df)
+    categorical = _categorical_sources(df)
+
+    # Jedna ramka robocza: wartości z wierszy niezakupowych maskujemy
+    # (0 dla sum, NaN/NaT dla min i nunique), dzięki czemu target
+    # i wszystkie cechy liczymy w jednym przejściu groupby
+    work = pd.DataFrame({
+        "Transaction ID": df["Transaction ID"],
+        "_refund": is_refund_row,
+        "_purchase": is_purchase,
+        "_date": _parse_dates(df["Date"], date_format).where(is_purchase),
+        "Item ID": df["Item ID"].where(is_purchase),
+        "Category": df["Category"].where(is_purchase),
+    })
+    for name, col in _SUM_COLS.items():
+        work[name] = df[col].where(is_purchase, 0)
+    for name, values in categorical.items():
+        work[f"{name}_freq"] = np.where(is_purchase, encoder.transform_column(name, values), 0.0)
+
+    agg = work.groupby("Transaction ID", sort=True).agg(
+        _n=("_purchase", "sum"),
+        Returned=("_refund", "any"),
+        PurchaseDate=("_date", "min"),
+        UniqueItems_n=("Item ID", "nunique"),
+        UniqueCategories_n=("Category", "nunique"),
+        **{name: (name, "sum") for name in _SUM_COLS},
+        **{f"{name}_freq_sum": (f"{name}_freq", "sum") for name in categorical},
+    )
+
+    returned_by_tx = agg["Returned"].astype(int)
+
+    # Transakcje bez wierszy zakupowych nie trafiają do zbioru
+    agg = agg[agg["_n"] > 0]
+
+    tx = pd.DataFrame({
+        "Transaction ID": agg.index,
+
+        # daty (bierzemy najwcześniejszą datę zakupu w transakcji)
+        "PurchaseDate": agg["PurchaseDate"],
+
+        # wolumen
+        "ItemsPurchased_sum": agg["ItemsPurchased_sum"],
+        "FinalQuantity_sum": agg["FinalQuantity_sum"],
+        "UniqueItems_n": agg["UniqueItems_n"],
+        "UniqueCategories_n": agg["UniqueCategories_n"],
+
+        # kasa
+        "TotalRevenue_sum": agg["TotalRevenue_sum"],
+        "PriceReductions_sum": agg["PriceReductions_sum"],
+        "SalesTax_sum": agg["SalesTax_sum"],
+    })
+
+    # agregacje z FE (średnia po wierszach zakupowych)
+    for name in categorical:
+        tx[f"{name}_freq_mean"] = agg[f"{name}_freq_sum"] / agg["_n"]
+
+    return _finalize_transaction_features(tx, returned_by_tx)
+
+
+def transaction_targets(df: pd.DataFrame) -> pd.Series:
+    """
+    Sam target Returned per Transaction ID (tylko transakcje z wierszami zakupowymi),
+    bez liczenia cech. Przydaje się do podziału train/test przed uczeniem FeatureEncoder.
+    """
+    is_refund_row = (df["Refunded Item Count"] < 0) | (df["Refunds"] < 0)
+    is_purchase = df["Purchased Item Count"] > 0
+    flags = pd.DataFrame({"refund": is_refund_row, "purchase": is_purchase}).groupby(df["Transaction ID"]).any()
+    return flags.loc[flags["purchase"], "refund"].astype(int).rename("Returned")
+
+
+# Kolumny kategoryczne, z których liczymy frequency encoding
+_FREQ_SOURCES = ("Category", "Version", "ItemCodePrefix")
+
+
+class _StreamingAggregates:
+    """
+    Częściowe agregaty per Transaction ID zbierane chunk po chunku.
+
+    - totals: liczba wierszy zakupowych, sumy, minimalna data (per transakcja)
+    - refunds: flaga zwrotu (per transakcja, ze wszystkich wierszy)
+    - pairs: liczności par (transakcja, wartość) dla Item ID i kolumn kategorycznych,
+      z których na końcu liczymy nunique i średnie frequency encoding.
+
+    Co `compact_every` chunków listy częściowych wyników są scalane (powtórzone
+    transakcje i pary sklejają się w jeden wiersz). totals i refunds rosną z liczbą
+    transakcji; pairs – z liczbą różnych par (transakcja, wartość), czyli w praktyce
+    z liczbą pozycji zakupowych (~4 pary na pozycję), a nie transakcji.
+    """
+
+    def __init__(
+        self,
+        compact_every: int = 8,
+        encoder: FeatureEncoder | None = None,
+        date_format: str | None = None,
+    ):
+        self.compact_every = compact_every
+        self.encoder = encoder
+        self.date_format = date_format
+        self.totals: list[pd.DataFrame] = []
+        self.refunds: list[pd.Series] = []
+        self.pairs: dict[str, list[pd.DataFrame]] = {c: [] for c in ["Item ID", *_FREQ_SOURCES]}
+
+    @staticmethod
+    def _merge_totals(parts: list[pd.DataFrame]) -> pd.DataFrame:
+        df = pd.concat(parts)
+        agg = {c: "sum" for c in df.columns if c != "PurchaseDate"}
+        agg["PurchaseDate"] = "min"
+        return df.groupby(level=0).agg(agg)
+
+    @staticmethod
+    def _merge_pairs(parts: list[pd.DataFrame]) -> pd.DataFrame:
+        df = pd.concat(parts, ignore_index=True)
+        return df.groupby(["Transaction ID", "value"], as_index=False, observed=True)["n"].sum()
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        is_refund_row = (chunk["Refunded Item Count"] < 0) | (chunk["Refunds"] < 0)
+        self.refunds.append(is_refund_row.groupby(chunk["Transaction ID"]).any())
+
+        purchases = chunk[chunk["Purchased Item Count"] > 0]
+        if len(purchases) > 0:
+            g = purchases.groupby("Transaction ID")
+            # format daty wykrywamy raz, na pierwszym chunku z zakupami
+            if self.date_format is None:
+                self.date_format = detect_date_format(purchases["Date"].unique())
+            dates = _parse_dates(purchases["Date"], self.date_format)
+            part = pd.DataFrame({"_n": g.size(), "PurchaseDate": dates.groupby(purchases["Transaction ID"]).min()})
+            for name, col in _SUM_COLS.items():
+                part[name] = g[col].sum()
+            self.totals.append(part)
+
+            values = {"Item ID": purchases["Item ID"], **_categorical_sources(purchases)}
+            for col, v in values.items():
+                pairs = (
+                    pd.DataFrame({"Transaction ID": purchases["Transaction ID"].to_numpy(), "value": v.to_numpy()})
+                    .groupby(["Transaction ID", "value"], as_index=False, observed=True)
+                    .size()
+                    .rename(columns={"size": "n"})
+                )
+                self.pairs[col].append(pairs)
+
+        if len(self.refunds) >= self.compact_every:
+            self.compact()
+
+    def compact(self) -> None:
+        if len(self.refunds) > 1:
+            self.refunds = [pd.concat(self.refunds).groupby(level=0).any()]
+        if len(self.totals) > 1:
+            self.totals = [self._merge_totals(self.totals)]
+        for col, parts in self.pairs.items():
+            if len(parts) > 1:
+                self.pairs[col] = [self._merge_pairs(parts)]
+
+    def finish(self) -> pd.DataFrame:
+        self.compact()
+        returned_by_tx = self.refunds[0].astype(int) if self.refunds else pd.Series(dtype=int)
+        if not self.totals:
+            raise ValueError("Brak wierszy zakupowych (Purchased Item Count > 0) w danych.")
+
+        totals = self.totals[0].sort_index()
+        totals.index.name = "Transaction ID"
+        n_rows = totals["_n"]
+
+        unique_counts = {
+            col: self.pairs[col][0].groupby("Transaction ID").size().reindex(totals.index, fill_value=0)
+            for col in ["Item ID", "Category"]
+        }
+
+        freq_means = {}
+        for col in _FREQ_SOURCES:
+            if not self.pairs[col]:
+                continue  # brak kolumny źródłowej (Item Code) – jak w build_features_transaction_level
+            pairs = self.pairs[col][0]
+            if self.encoder is not None:
+                freq = self.encoder.frequency_series(col)
+            else:
+                value_counts = pairs.groupby("value", observed=True)["n"].sum()
+                freq = value_counts / value_counts.sum()
+            weighted = pairs["n"] * pairs["value"].map(freq).astype(float).fillna(0.0).to_numpy()
+            sums = weighted.groupby(pairs["Transaction ID"]).sum().reindex(totals.index, fill_value=0.0)
+            freq_means[col] = sums / n_rows
+
+        tx = pd.DataFrame({
+            "Transaction ID": totals.index,
+            "PurchaseDate": totals["PurchaseDate"],
+            "ItemsPurchased_sum": totals["ItemsPurchased_sum"],
+            "FinalQuantity_sum": totals["FinalQuantity_sum"],
+            "UniqueItems_n": unique_counts["Item ID"],
+            "UniqueCategories_n": unique_counts["Category"],
+            "TotalRevenue_sum": totals["TotalRevenue_sum"],
+            "PriceReductions_sum": totals["PriceReductions_sum"],
+            "SalesTax_sum": totals["SalesTax_sum"],
+            **{f"{col}_freq_mean": mean for col, mean in freq_means.items()},
+        })
+
+        return _finalize_transaction_features(tx, returned_by_tx)
+
+
+def build_features_transaction_level_streaming(
+    path: Path,
+    chunksize: int = CSV_CHUNKSIZE,
+    compact_every: int = 8,
+    encoder: FeatureEncoder | None = None,
+    date_format: str | None = DATE_FORMAT,
+) -> pd.DataFrame:
+    """
+    Strumieniowa (out-of-core) wersja build_features_transaction_level.
+
+    Czyta surowy CSV kawałkami w schemacie RAW_SCHEMA (iter_csv_typed) i trzyma tylko częściowe
+    agregaty per Transaction ID (sumy, minimalna data, pary do nunique i frequency
+    encoding, flaga zwrotu), które scala na końcu. Nigdy nie materializuje
+    całej tabeli wierszy.
+
+    Daje tę samą ramkę co build_features_transaction_level(load_data(path, typed=True), encoder).
+
+    Duplikaty całych wierszy wykrywamy globalnie po 64-bitowych hashach pełnych wierszy CSV
+    (ROW_HASH_COLUMN, HashSet: posortowane serie uint64, ~8 bajtów na unikalny wiersz, O(n log n) łącznie).
+
+    Pamięć: hashe rosną z liczbą unikalnych wierszy, tabele par (transakcja, wartość)
+    dla Item ID / Category / Version / ItemCodePrefix – z liczbą różnych par, czyli
+    praktycznie z liczbą pozycji, nie transakcji. Mniej niż cały surowy CSV
+    (kilka liczb zamiast wiersza tekstu), ale nie O(liczba transakcji).
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"File not found: {path}")
+
+    aggregates = _StreamingAggregates(compact_every=compact_every, encoder=encoder, date_format=date_format)
+    seen = HashSet()
+
+    for chunk in iter_csv_typed(path, chunksize=chunksize):
+        aggregates.add(chunk[~seen.add(chunk[ROW_HASH_COLUMN].to_numpy())])
+
+    return aggregates.finish()
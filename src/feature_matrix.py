@@ -0,0 +1,77 @@
+"""
+Kompaktowa macierz cech: jedna ciągła tablica float32 (C-order) + nazwy kolumn.
+
+Tabela z build_features_transaction_level ma kolumny int64/float64, a każdy model
+konwertuje ją sam (XGBoost i RandomForest do float32, przy każdym fit/predict_proba
+i w każdym foldzie). FeatureMatrix robi tę konwersję raz, w połowie pamięci:
+- np.asarray(fm) zwraca tablicę bez kopii (protokół __array__), więc XGBoost,
+  RandomForest i LogisticRegression dostają float32 wprost,
+- fm[idx] wybiera wiersze (foldy, undersampling) i zwraca FeatureMatrix,
+- columns / index (Transaction ID) przechowywane obok tablicy.
+
+Wartości int (Month, IsWeekend, liczniki) i kwoty mieszczą się w float32 bez
+straty istotnej dla modeli drzewiastych.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+class FeatureMatrix:
+    """Tablica cech float32 (n_wierszy x n_cech, C-order) z nazwami kolumn i opcjonalnym indeksem."""
+
+    def __init__(self, values: np.ndarray, columns: list[str], index: np.ndarray | None = None):
+        # gotowa tablica float32 C-order (także np.memmap z magazynu cech) zostaje bez kopii
+        if not (isinstance(values, np.ndarray) and values.dtype == np.float32 and values.flags.c_contiguous):
+            values = np.ascontiguousarray(values, dtype=np.float32)
+        if values.ndim != 2 or values.shape[1] != len(columns):
+            raise ValueError(f"Kształt {values.shape} nie pasuje do {len(columns)} kolumn")
+        self.values = values
+        self.columns = list(columns)
+        self.index = None if index is None else np.asarray(index)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: list[str] | None = None, index_col: str | None = None):
+        """
+        Wypełnia tablicę float32 kolumna po kolumnie (bez pośredniej kopii całej ramki w float64).
+        columns: kolejność cech (domyślnie wszystkie kolumny poza index_col).
+        """
+        if columns is None:
+            columns = [c for c in df.columns if c != index_col]
+        values = np.empty((len(df), len(columns)), dtype=np.float32, order="C")
+        for j, col in enumerate(columns):
+            values[:, j] = df[col].to_numpy()
+        index = df[index_col].to_numpy() if index_col is not None else None
+        return cls(values, columns, index)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.values.shape
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None or np.dtype(dtype) == self.values.dtype:
+            return self.values.copy() if copy else self.values
+        return self.values.astype(dtype)
+
+    def __getitem__(self, rows) -> "FeatureMatrix":
+        """Wybór wierszy (pozycje, maska bool albo slice); kolumny bez zmian."""
+        index = None if self.index is None else self.index[rows]
+        return FeatureMatrix(self.values[rows], self.columns, index)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, self.columns.index(name)]
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.values, columns=self.columns, index=self.index)
@@ -0,0 +1,179 @@
+"""
+Magazyn cech na dysku: tabela cech na poziomie transakcji jako pliki .npy
+otwierane przez mmap (bez kopii, współdzielone strony między procesami).
+
+Katalog <root>/<klucz>/:
+- features.npy        – FeatureMatrix.values (float32, C-order)
+- target.npy          – Returned (int8)
+- transaction_id.npy  – Transaction ID (int64)
+- encoder.json        – FeatureEncoder użyty do frequency encodingu
+- manifest.json       – kolumny, dtypes, liczba wierszy, hash danych źródłowych,
+                        odcisk encodera, ustawienia wczytywania, FEATURE_VERSION, meta
+                        (np. na czym uczono encoder)
+
+Klucz = hash pliku źródłowego + odcisk encodera + odcisk ustawień wczytywania
+(TYPED_INGESTION, DATE_FORMAT) + FEATURE_VERSION, więc zmiana danych, encodera,
+sposobu wczytania i parsowania dat albo kodu cech (podbicie FEATURE_VERSION) daje nowy katalog.
+Trening, CV, tuning, EDA i scoring otwierają ten sam katalog (open_feature_store);
+workery joblib dostają memmap jako referencję do pliku, nie kopię tablicy.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import DATE_FORMAT, FEATURE_STORE_DIR, TYPED_INGESTION
+from src.feature_engineering import FEATURE_VERSION, FeatureEncoder, build_features_transaction_level
+from src.feature_matrix import FeatureMatrix
+
+FEATURES_FILE = "features.npy"
+TARGET_FILE = "target.npy"
+INDEX_FILE = "transaction_id.npy"
+ENCODER_FILE = "encoder.json"
+MANIFEST_FILE = "manifest.json"
+
+TARGET_COL = "Returned"
+INDEX_COL = "Transaction ID"
+
+
+def encoder_fingerprint(encoder: FeatureEncoder) -> str:
+    """Krótki hash stanu encodera (te same częstości -> ten sam odcisk)."""
+    payload = json.dumps(encoder.to_dict(), sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def ingestion_settings() -> dict:
+    """Ustawienia wczytania danych i parsowania dat, od których zależy tabela cech."""
+    return {"typed_ingestion": TYPED_INGESTION, "date_format": DATE_FORMAT}
+
+
+def _settings_fingerprint() -> str:
+    payload = json.dumps(ingestion_settings(), sort_keys=True)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=4).hexdigest()
+
+
+def store_key(source_hash: str, encoder: FeatureEncoder) -> str:
+    return f"{source_hash}-{encoder_fingerprint(encoder)}-{_settings_fingerprint()}-v{FEATURE_VERSION}"
+
+
+class FeatureStore:
+    """Otwarty magazyn: X (FeatureMatrix na memmap), y, indeks transakcji, manifest."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path / MANIFEST_FILE, encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest["feature_version"] != FEATURE_VERSION:
+            raise ValueError(
+                f"Magazyn {self.path} ma cechy w wersji {self.manifest['feature_version']}, "
+                f"kod jest w wersji {FEATURE_VERSION} – zbuduj magazyn ponownie"
+            )
+
+        self.index = np.load(self.path / INDEX_FILE, mmap_mode="r")
+        self.y = np.load(self.path / TARGET_FILE, mmap_mode="r")
+        self.X = FeatureMatrix(np.load(self.path / FEATURES_FILE, mmap_mode="r"), self.manifest["columns"], self.index)
+
+    @property
+    def columns(self) -> list[str]:
+        return self.X.columns
+
+    @property
+    def encoder(self) -> FeatureEncoder:
+        return FeatureEncoder.load(self.path / ENCODER_FILE)
+
+    def target(self) -> pd.Series:
+        """Returned jako Series (bez kopii memmap) – do podziałów i metryk."""
+        return pd.Series(self.y, name=TARGET_COL)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Tabela jak z build_features_transaction_level (Transaction ID + cechy + Returned), np. do EDA."""
+        tx = self.X.to_frame()
+        tx.index = pd.Index(np.asarray(self.index), name=INDEX_COL)
+        tx.insert(0, INDEX_COL, tx.index.to_numpy())
+        tx[TARGET_COL] = np.asarray(self.y, dtype=np.int64)
+        return tx
+
+
+def write_feature_store(
+    tx: pd.DataFrame, path: str | Path, source_hash: str, encoder: FeatureEncoder, meta: dict | None = None
+) -> FeatureStore:
+    """
+    Zapisuje tabelę cech (wynik build_features_transaction_level) do katalogu path.
+    Zapis do katalogu tymczasowego + rename, więc czytelnik nigdy nie widzi połowy plików.
+    meta: dowolny opis zapisywany w manifeście (find_feature_store może po nim filtrować).
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    columns = [c for c in tx.columns if c not in (INDEX_COL, TARGET_COL)]
+    X = FeatureMatrix.from_frame(tx, columns, index_col=INDEX_COL)
+    np.save(tmp / FEATURES_FILE, X.values)
+    np.save(tmp / TARGET_FILE, tx[TARGET_COL].to_numpy(dtype=np.int8))
+    np.save(tmp / INDEX_FILE, tx[INDEX_COL].to_numpy(dtype=np.int64))
+    encoder.save(tmp / ENCODER_FILE)
+
+    manifest = {
+        "columns": columns,
+        "dtypes": {"features": "float32", "target": "int8", "index": "int64"},
+        "n_rows": int(len(tx)),
+        "source_hash": source_hash,
+        "encoder_fingerprint": encoder_fingerprint(encoder),
+        "ingestion": ingestion_settings(),
+        "feature_version": FEATURE_VERSION,
+        "meta": meta or {},
+    }
+    with open(tmp / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    tmp.replace(path)
+    return FeatureStore(path)
+
+
+def open_feature_store(path: str | Path) -> FeatureStore:
+    return FeatureStore(path)
+
+
+def _manifest_meta(path: Path) -> dict:
+    with open(path / MANIFEST_FILE, encoding="utf-8") as f:
+        return json.load(f).get("meta", {})
+
+
+def find_feature_store(source_hash: str, root: Path = FEATURE_STORE_DIR, meta: dict | None = None) -> Path | None:
+    """
+    Najnowszy magazyn zbudowany z danych o tym hashu (bieżące ustawienia wczytywania i FEATURE_VERSION)
+    – bez wczytywania danych. meta=None: dowolny encoder; inaczej tylko magazyn z dokładnie tym meta w manifeście
+    (np. encoder uczony na konkretnym splicie train, a nie na całych danych).
+    """
+    candidates = [
+        p for p in Path(root).glob(f"{source_hash}-*-{_settings_fingerprint()}-v{FEATURE_VERSION}")
+        if (p / MANIFEST_FILE).exists() and (meta is None or _manifest_meta(p) == meta)
+    ]
+    return max(candidates, key=lambda p: p.stat().st_mtime) if candidates else None
+
+
+def load_or_build_feature_store(
+    df: pd.DataFrame,
+    encoder: FeatureEncoder,
+    source_hash: str,
+    root: Path = FEATURE_STORE_DIR,
+    deduplicated: bool = False,
+    meta: dict | None = None,
+) -> FeatureStore:
+    """
+    Otwiera magazyn dla (dane, encoder, wersja cech); jeśli go nie ma – buduje cechy z df i zapisuje.
+    deduplicated: df już bez duplikatów (preprocessing_pipeline) – patrz build_features_transaction_level
+    meta: opis zapisywany w manifeście nowego magazynu (write_feature_store)
+    """
+    path = Path(root) / store_key(source_hash, encoder)
+    if (path / MANIFEST_FILE).exists():
+        return FeatureStore(path)
+    tx = build_features_transaction_level(df, encoder=encoder, deduplicated=deduplicated)
+    return write_feature_store(tx, path, source_hash, encoder, meta=meta)
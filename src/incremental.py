@@ -0,0 +1,172 @@
+"""
+Przyrostowa (append-only) budowa cech na poziomie transakcji.
+
+Stan na dysku (katalog FEATURE_STATE_DIR), partycjonowany zakresami Transaction ID
+(partycja = Transaction ID // partition_size):
+- history/p-NNNNNN/<hash>.parquet – surowe wiersze partycji (append-only, jeden plik na
+  dostawę; nazwa = hash treści wierszy, więc ponowna dostawa tych samych wierszy jest pomijana)
+- transactions/p-NNNNNN.parquet   – tabela cech transakcji partycji (build_features_transaction_level)
+- encoder.json                    – zamrożony FeatureEncoder
+- state.json                      – partition_size
+
+Nowe wiersze dotykają pewnego zbioru Transaction ID (także późne wiersze zwrotu,
+które zmieniają Returned). Przeliczamy tylko te transakcje: z historii ich partycji
+czytamy wcześniejsze wiersze (filtr Parquet po Transaction ID) i przepisujemy tylko
+tabele cech dotkniętych partycji.
+
+Częstości frequency encodingu są zamrożone w encoderze, więc wynik jest
+identyczny z pełną przebudową build_features_transaction_level(cała_historia, encoder).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import FEATURE_STATE_DIR, FEATURE_STATE_PARTITION_SIZE
+from src.feature_engineering import FeatureEncoder, build_features_transaction_level
+from src.preprocessing import row_hashes
+
+HISTORY_DIR = "history"
+TRANSACTIONS_DIR = "transactions"
+ENCODER_FILE = "encoder.json"
+STATE_FILE = "state.json"
+
+
+def update_transaction_features(
+    previous_tx: pd.DataFrame | None,
+    touched_history: pd.DataFrame,
+    new_rows: pd.DataFrame,
+    encoder: FeatureEncoder,
+) -> pd.DataFrame:
+    """
+    Aktualizuje tabelę cech o nowe wiersze.
+
+    :param previous_tx: dotychczasowa tabela cech (None = jeszcze pusta)
+    :param touched_history: wcześniejsze wiersze transakcji występujących w new_rows
+    :param new_rows: nowo dopisane wiersze surowych danych
+    :param encoder: zamrożony FeatureEncoder
+    :return: tabela cech równa pełnej przebudowie na historii + new_rows
+    """
+    touched = pd.unique(new_rows["Transaction ID"])
+    rows = pd.concat([touched_history, new_rows], ignore_index=True)
+
+    parts = [] if previous_tx is None else [previous_tx[~previous_tx["Transaction ID"].isin(touched)]]
+    if rows["Purchased Item Count"].gt(0).any() or not parts:
+        parts.append(build_features_transaction_level(rows, encoder=encoder))
+
+    return pd.concat(parts).sort_index(kind="stable")
+
+
+def _partition_ids(tx_ids: pd.Series, partition_size: int) -> np.ndarray:
+    return tx_ids.to_numpy() // partition_size
+
+
+def _partition_name(p: int) -> str:
+    return f"p-{p:06d}"
+
+
+def _content_hash(rows: pd.DataFrame) -> str:
+    """Hash treści wierszy niezależny od ich kolejności (posortowane hashe wierszy)."""
+    return hashlib.blake2b(np.sort(row_hashes(rows)).tobytes(), digest_size=16).hexdigest()
+
+
+def _write_atomic(df: pd.DataFrame, path: Path, index: bool) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # ukryty plik tymczasowy: odczyt katalogu historii (pyarrow dataset) pomija pliki z kropką
+    tmp = path.with_name(f".{path.name}.tmp")
+    df.to_parquet(tmp, index=index)
+    tmp.replace(path)
+
+
+def _read_partition_size(state_dir: Path) -> int:
+    path = state_dir / STATE_FILE
+    if not path.exists():
+        raise FileNotFoundError(f"Brak stanu w {state_dir} – najpierw initialize_state.")
+    return int(json.loads(path.read_text())["partition_size"])
+
+
+def _save_partition(state_dir: Path, p: int, rows: pd.DataFrame, tx: pd.DataFrame) -> None:
+    # Najpierw tabela cech, potem plik historii – jego istnienie oznacza, że dostawa jest
+    # w pełni zastosowana. Po przerwaniu między zapisami ponowna dostawa przelicza partycję
+    # (historia bez nowych wierszy + nowe wiersze = ten sam wynik) i dopisuje historię.
+    name = _partition_name(p)
+    if len(tx):
+        _write_atomic(tx, state_dir / TRANSACTIONS_DIR / f"{name}.parquet", index=True)
+    _write_atomic(rows, state_dir / HISTORY_DIR / name / f"{_content_hash(rows)}.parquet", index=False)
+
+
+def initialize_state(
+    df: pd.DataFrame,
+    state_dir: Path = FEATURE_STATE_DIR,
+    encoder: FeatureEncoder | None = None,
+    partition_size: int = FEATURE_STATE_PARTITION_SIZE,
+) -> pd.DataFrame:
+    """
+    Pełna budowa stanu: zapisuje historię, encoder (uczony na df, jeśli nie podano)
+    i tabelę cech, podzielone na partycje. Kolejne dostawy obsługuje incremental_update.
+    """
+    state_dir = Path(state_dir)
+    if (state_dir / STATE_FILE).exists():
+        raise FileExistsError(f"Stan już istnieje: {state_dir}")
+
+    encoder = encoder or FeatureEncoder().fit(df)
+    tx = build_features_transaction_level(df, encoder=encoder)
+
+    state_dir.mkdir(parents=True, exist_ok=True)
+    encoder.save(state_dir / ENCODER_FILE)
+    row_parts = _partition_ids(df["Transaction ID"], partition_size)
+    tx_parts = _partition_ids(tx["Transaction ID"], partition_size)
+    for p in np.unique(row_parts):
+        _save_partition(state_dir, int(p), df[row_parts == p], tx[tx_parts == p])
+    (state_dir / STATE_FILE).write_text(json.dumps({"partition_size": partition_size}))
+    return tx
+
+
+def load_state_features(state_dir: Path = FEATURE_STATE_DIR) -> pd.DataFrame:
+    """Aktualna tabela cech ze stanu (partycje sklejone w kolejności Transaction ID)."""
+    files = sorted((Path(state_dir) / TRANSACTIONS_DIR).glob("p-*.parquet"))
+    return pd.concat([pd.read_parquet(f) for f in files])
+
+
+def incremental_update(new_rows: pd.DataFrame, state_dir: Path = FEATURE_STATE_DIR) -> pd.DataFrame:
+    """
+    Dopisuje nowe wiersze do stanu i przelicza tylko dotknięte transakcje.
+
+    Koszt: dostawa + odczyt historii i przepisanie tabeli cech partycji, w które wpadają
+    jej Transaction ID (każda ~partition_size transakcji). Nie zależy od liczby partycji,
+    ale rośnie z historią dotkniętych partycji. Wiersze partycji, które już są w historii
+    (ten sam hash treści – powtórzona dostawa), są pomijane bez przeliczania.
+
+    :return: aktualne cechy transakcji z new_rows (cała tabela: load_state_features)
+    """
+    state_dir = Path(state_dir)
+    partition_size = _read_partition_size(state_dir)
+    encoder = FeatureEncoder.load(state_dir / ENCODER_FILE)
+
+    row_parts = _partition_ids(new_rows["Transaction ID"], partition_size)
+    updated = []
+    for p in np.unique(row_parts):
+        name = _partition_name(int(p))
+        rows = new_rows[row_parts == p]
+        tx_path = state_dir / TRANSACTIONS_DIR / f"{name}.parquet"
+        history = state_dir / HISTORY_DIR / name
+
+        if not (history / f"{_content_hash(rows)}.parquet").exists():
+            previous_tx = pd.read_parquet(tx_path) if tx_path.exists() else None
+            touched_history = (
+                pd.read_parquet(history, filters=[("Transaction ID", "in", pd.unique(rows["Transaction ID"]).tolist())])
+                if history.exists() else rows.iloc[:0]
+            )
+            tx = update_transaction_features(previous_tx, touched_history, rows, encoder)
+            _save_partition(state_dir, int(p), rows, tx)
+        elif tx_path.exists():
+            tx = pd.read_parquet(tx_path)
+        else:
+            continue
+        updated.append(tx[tx["Transaction ID"].isin(rows["Transaction ID"])])
+
+    return pd.concat(updated) if updated else build_features_transaction_level(new_rows.iloc[:0], encoder=encoder)
@@ -0,0 +1,184 @@
+"""
+ROC/PR i AUC dla dużych zbiorów: histogram wyników zamiast sortowania.
+
+ScoreHistogram zlicza pozytywne i negatywne przykłady w n_bins równych przedziałach
+wyniku [0, 1]. Pamięć jest stała (2 x n_bins liczników), dane można dokładać kawałkami
+(update) i łączyć histogramy foldów / plików (merge), więc metryki miesięcznego zrzutu
+predykcji liczą się bez trzymania go w pamięci. Próg krzywej = granica przedziału;
+wyniki w jednym przedziale traktowane są jak remis (AUC jak w sklearn dla remisów).
+Błąd AUC to udział par (pozytyw, negatyw) w tym samym przedziale / 2: ~1 / n_bins tylko przy
+wynikach rozłożonych w całym [0, 1]; przy niezbalansowanych danych i wynikach skupionych
+w kilku przedziałach (np. większość poniżej 0.01) może być wielokrotnie większy.
+
+exact=True: tryb dokładny – trzyma wszystkie wyniki i liczy przez sklearn. roc_auc jest
+domyślnie dokładne; histogram to jawny wybór (exact=False) i każde przybliżenie jest logowane.
+
+Krzywe (roc_curve / pr_curve) są przerzedzane do max_points punktów rozłożonych
+równomiernie wzdłuż krzywej, więc wykresy nie rosną z liczbą transakcji.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from sklearn import metrics as skm
+
+from src.config import CURVE_MAX_POINTS, METRIC_BINS, METRICS_EXACT_MAX_ROWS
+
+logger = logging.getLogger(__name__)
+
+
+def _downsample(x: np.ndarray, y: np.ndarray, thresholds: np.ndarray, max_points: int):
+    """Najwyżej max_points punktów krzywej, równo wzdłuż jej długości (końce zostają)."""
+    if len(x) <= max_points:
+        return x, y, thresholds
+    length = np.concatenate([[0.0], np.cumsum(np.abs(np.diff(x)) + np.abs(np.diff(y)))])
+    idx = np.unique(np.searchsorted(length, np.linspace(0.0, length[-1], max_points)))
+    idx = np.unique(np.concatenate([[0], np.minimum(idx, len(x) - 1), [len(x) - 1]]))
+    return x[idx], y[idx], thresholds[idx]
+
+
+class ScoreHistogram:
+    """
+    Liczniki pozytywnych / negatywnych przykładów w przedziałach wyniku. y_score muszą być
+    prawdopodobieństwami w [0, 1] – marginesy, decision_function albo NaN dają ValueError
+    (zamiast po cichu trafić do skrajnych przedziałów i zepsuć AUC).
+    """
+
+    def __init__(self, n_bins: int = METRIC_BINS, exact: bool = False):
+        self.n_bins = n_bins
+        self.exact = exact
+        self.pos = np.zeros(n_bins, dtype=np.int64)
+        self.neg = np.zeros(n_bins, dtype=np.int64)
+        self._y: list[np.ndarray] = []
+        self._score: list[np.ndarray] = []
+
+    def update(self, y_true, y_score) -> "ScoreHistogram":
+        y_true = np.asarray(y_true).astype(bool, copy=False)
+        y_score = np.asarray(y_score, dtype=np.float64)
+        if len(y_score) and not (np.isfinite(y_score).all() and y_score.min() >= 0.0 and y_score.max() <= 1.0):
+            raise ValueError(
+                "ScoreHistogram wymaga wyników w [0, 1] bez NaN/inf "
+                "(marginesy / decision_function: użyj roc_auc(..., exact=True) albo sigmoidy)"
+            )
+        if self.exact:
+            self._y.append(y_true.copy())
+            self._score.append(y_score.copy())
+        # wynik 1.0 -> ostatni przedział
+        bins = np.minimum((y_score * self.n_bins).astype(np.int64), self.n_bins - 1)
+        self.pos += np.bincount(bins[y_true], minlength=self.n_bins)
+        self.neg += np.bincount(bins[~y_true], minlength=self.n_bins)
+        return self
+
+    def merge(self, other: "ScoreHistogram") -> "ScoreHistogram":
+        if other.n_bins != self.n_bins:
+            raise ValueError(f"Różna liczba przedziałów: {self.n_bins} != {other.n_bins}")
+        self.pos += other.pos
+        self.neg += other.neg
+        if self.exact and other.exact:
+            self._y += other._y
+            self._score += other._score
+        else:
+            self.exact = False
+            self._y, self._score = [], []
+        return self
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[tuple], n_bins: int = METRIC_BINS, exact: bool = False) -> "ScoreHistogram":
+        """Histogram z kolejnych kawałków (y_true, y_score)."""
+        hist = cls(n_bins, exact)
+        for y_true, y_score in chunks:
+            hist.update(y_true, y_score)
+        return hist
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.pos.sum() + self.neg.sum())
+
+    def _exact_data(self) -> tuple[np.ndarray, np.ndarray]:
+        return np.concatenate(self._y), np.concatenate(self._score)
+
+    def _cumulative(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """TP i FP dla progów od najwyższego przedziału w dół (tylko niepuste przedziały)."""
+        nonempty = (self.pos + self.neg) > 0
+        order = np.flatnonzero(nonempty)[::-1]
+        thresholds = order / self.n_bins
+        return np.cumsum(self.pos[order]), np.cumsum(self.neg[order]), thresholds
+
+    def roc_auc(self) -> float:
+        if self.exact:
+            return float(skm.roc_auc_score(*self._exact_data()))
+        tps, fps, _ = self._cumulative()
+        if tps[-1] == 0 or fps[-1] == 0:
+            raise ValueError("AUC wymaga obu klas w y_true")
+        tpr = np.concatenate([[0.0], tps / tps[-1]])
+        fpr = np.concatenate([[0.0], fps / fps[-1]])
+        return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+
+    def average_precision(self) -> float:
+        if self.exact:
+            return float(skm.average_precision_score(*self._exact_data()))
+        tps, fps, _ = self._cumulative()
+        precision = tps / (tps + fps)
+        recall = tps / tps[-1]
+        return float(np.sum(np.diff(np.concatenate([[0.0], recall])) * precision))
+
+    def roc_curve(self, max_points: int = CURVE_MAX_POINTS) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(fpr, tpr, thresholds), najwyżej max_points punktów."""
+        if self.exact:
+            fpr, tpr, thresholds = skm.roc_curve(*self._exact_data())
+        else:
+            tps, fps, thr = self._cumulative()
+            fpr = np.concatenate([[0.0], fps / fps[-1]])
+            tpr = np.concatenate([[0.0], tps / tps[-1]])
+            thresholds = np.concatenate([[np.inf], thr])
+        return _downsample(fpr, tpr, thresholds, max_points)
+
+    def pr_curve(self, max_points: int = CURVE_MAX_POINTS) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(recall, precision, thresholds) od najwyższego progu, najwyżej max_points punktów."""
+        if self.exact:
+            precision, recall, thresholds = skm.precision_recall_curve(*self._exact_data())
+            # sklearn: od najniższego progu + punkt (recall=0, precision=1) na końcu
+            recall, precision = recall[::-1], precision[::-1]
+            thresholds = np.concatenate([[np.inf], thresholds[::-1]])
+        else:
+            tps, fps, thr = self._cumulative()
+            recall = np.concatenate([[0.0], tps / tps[-1]])
+            precision = np.concatenate([[1.0], tps / (tps + fps)])
+            thresholds = np.concatenate([[np.inf], thr])
+        return _downsample(recall, precision, thresholds, max_points)
+
+
+def score_histogram(y_true, y_score, exact: bool | None = None, n_bins: int = METRIC_BINS) -> ScoreHistogram:
+    """
+    Histogram dla jednego zbioru (krzywe do wykresów); exact=None -> dokładnie do
+    METRICS_EXACT_MAX_ROWS wierszy, powyżej z przedziałów (z wpisem w logu).
+    """
+    if exact is None:
+        exact = len(y_score) <= METRICS_EXACT_MAX_ROWS
+        if not exact:
+            logger.warning("ROC/PR z histogramu (%d przedziałów) dla %d wierszy > METRICS_EXACT_MAX_ROWS",
+                           n_bins, len(y_score))
+    return ScoreHistogram(n_bins, exact).update(y_true, y_score)
+
+
+def roc_auc(y_true, y_score, exact: bool = True) -> float:
+    """ROC AUC: domyślnie dokładnie (sklearn); exact=False -> przybliżenie z histogramu (logowane)."""
+    if exact:
+        return float(skm.roc_auc_score(y_true, y_score))
+    logger.warning("ROC AUC z histogramu (%d przedziałów) dla %d wierszy – przybliżenie", METRIC_BINS, len(y_score))
+    return score_histogram(y_true, y_score, exact=False).roc_auc()
+
+
+def histogram_from_csv(
+    path,
+    label_col: str = "Returned",
+    score_col: str = "proba",
+    chunksize: int = 1_000_000,
+    n_bins: int = METRIC_BINS,
+) -> ScoreHistogram:
+    """Histogram ze zrzutu predykcji w CSV (np. score.py + etykiety), czytany kawałkami."""
+    chunks = pd.read_csv(path, usecols=[label_col, score_col], chunksize=chunksize)
+    return ScoreHistogram.from_chunks(((c[label_col].to_numpy(), c[score_col].to_numpy()) for c in chunks), n_bins)
@@ -4,11 +4,10 @@ from pathlib import Path
 import numpy as np
 import matplotlib.pyplot as plt
 
-from sklearn.metrics import (
-    RocCurveDisplay,
-    PrecisionRecallDisplay,
-    ConfusionMatrixDisplay,
-)
+from sklearn.metrics import ConfusionMatrixDisplay, confusion_matrix
+
+from src.metrics import score_histogram
+from src.rendering import FigureJob
 
 
 def _ensure_dir(path: str | Path) -> Path:
@@ -17,51 +16,141 @@ def _ensure_dir(path: str | Path) -> Path:
     return p
 
 
+def roc_points(probas: dict, y_true) -> dict:
+    """{nazwa: (fpr, tpr, AUC)} – krzywe przerzedzone (src/metrics.py), duże zbiory z histogramu."""
+    points = {}
+    for name, proba in probas.items():
+        hist = score_histogram(y_true, proba)
+        fpr, tpr, _ = hist.roc_curve()
+        points[name] = (fpr, tpr, hist.roc_auc())
+    return points
+
+
+def pr_points(probas: dict, y_true) -> dict:
+    """{nazwa: (recall, precision, AP)} – jak roc_points."""
+    points = {}
+    for name, proba in probas.items():
+        hist = score_histogram(y_true, proba)
+        recall, precision, _ = hist.pr_curve()
+        points[name] = (recall, precision, hist.average_precision())
+    return points
+
+
+# --- Funkcje rysujące na gotowych punktach krzywych (używane przez src/rendering.py) ---
+
+def roc_figure(curves: dict, save_path: str) -> None:
+    """Krzywe ROC z gotowych punktów: {nazwa modelu: (fpr, tpr, AUC)}."""
+    fig, ax = plt.subplots()
+    for name, (fpr, tpr, auc) in curves.items():
+        ax.plot(fpr, tpr, label=f"{name} (AUC = {auc:.2f})")
+
+    ax.set_xlabel("False Positive Rate (Positive label: 1)")
+    ax.set_ylabel("True Positive Rate (Positive label: 1)")
+    ax.legend(loc="lower right")
+    ax.set_title("ROC curve (hold-out)")
+    fig.tight_layout()
+    fig.savefig(save_path, dpi=200)
+    plt.close(fig)
+
+
+def pr_figure(curves: dict, save_path: str) -> None:
+    """Krzywe Precision–Recall z gotowych punktów: {nazwa modelu: (recall, precision, AP)}."""
+    fig, ax = plt.subplots()
+    for name, (recall, precision, ap) in curves.items():
+        ax.step(recall, precision, where="post", label=f"{name} (AP = {ap:.2f})")
+
+    ax.set_xlabel("Recall (Positive label: 1)")
+    ax.set_ylabel("Precision (Positive label: 1)")
+    ax.legend(loc="lower left")
+    ax.set_title("Precision–Recall curve (hold-out)")
+    fig.tight_layout()
+    fig.savefig(save_path, dpi=200)
+    plt.close(fig)
+
+
+def confusion_matrix_figure(cm, name: str, save_path: str) -> None:
+    """Macierz pomyłek z gotowej macierzy (sklearn confusion_matrix)."""
+    fig, ax = plt.subplots()
+    ConfusionMatrixDisplay(confusion_matrix=np.asarray(cm)).plot(ax=ax)
+    ax.set_title(f"Confusion matrix (hold-out) - {name}")
+    fig.tight_layout()
+    fig.savefig(save_path, dpi=200)
+    plt.close(fig)
+
+
+def feature_importance_figure(importances, feature_names, save_path: str, top_n: int = 20, title: str | None = None) -> None:
+    """Wykres ważności cech z tablicy feature_importances_."""
+    importances = np.asarray(importances, dtype=float)
+    idx = np.argsort(importances)[::-1][:top_n]
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    ax.barh([feature_names[i] for i in idx][::-1], importances[idx][::-1])
+    ax.set_xlabel("feature_importances_")
+    ax.set_title(title or "Feature importance (top)")
+    fig.tight_layout()
+    fig.savefig(save_path, dpi=200)
+    plt.close(fig)
+
+
+def holdout_figure_jobs(
+    results: dict,
+    y_test,
+    save_dir: str | Path,
+    feature_names: list[str] | None = None,
+    importance: dict | None = None,
+) -> list[FigureJob]:
+    """
+    Wykresy hold-outu z wyników train_and_evaluate ({nazwa: wynik z y_pred / y_proba / model}):
+    ROC i PR wszystkich modeli, CM każdego modelu oraz ważność cech
+    dla importance = {nazwa modelu: (plik PNG, tytuł)}.
+    Krzywe i macierze pomyłek liczone są tutaj – do workerów trafia najwyżej
+    CURVE_MAX_POINTS punktów na krzywą, nie predykcje całego hold-outu.
+    """
+    save_dir = Path(save_dir)
+    y_true = np.asarray(y_test)
+    probas = {name: res["y_proba"] for name, res in results.items()}
+
+    jobs = [
+        FigureJob(roc_figure, {"curves": roc_points(probas, y_true)}, save_dir / "roc_holdout.png"),
+        FigureJob(pr_figure, {"curves": pr_points(probas, y_true)}, save_dir / "pr_holdout.png"),
+    ]
+    jobs += [
+        FigureJob(confusion_matrix_figure, {"cm": confusion_matrix(y_true, res["y_pred"]), "name": name},
+                  save_dir / f"cm_{name}.png")
+        for name, res in results.items()
+    ]
+    for name, (filename, title) in (importance or {}).items():
+        model = results[name]["model"]
+        if not hasattr(model, "feature_importances_"):
+            continue
+        jobs.append(FigureJob(
+            feature_importance_figure,
+            {"importances": np.asarray(model.feature_importances_, dtype=float),
+             "feature_names": list(feature_names), "title": title},
+            save_dir / filename,
+        ))
+    return jobs
+
+
+# --- Wersje przyjmujące modele (liczą predykcje na X_test) ---
+
 def plot_roc_curves(models: dict, X_test, y_test, save_path: str) -> None:
     """Rysuje krzywe ROC dla wielu JUŻ wytrenowanych modeli."""
-    save_path = str(save_path)
     _ensure_dir(Path(save_path).parent)
-
-    plt.figure()
-    for name, model in models.items():
-        proba = model.predict_proba(X_test)[:, 1]
-        RocCurveDisplay.from_predictions(y_test, proba, name=name)
-
-    plt.title("ROC curve (hold-out)")
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=200)
-    plt.close()
+    roc_figure(roc_points({name: model.predict_proba(X_test)[:, 1] for name, model in models.items()}, y_test), save_path)
 
 
 def plot_pr_curves(models: dict, X_test, y_test, save_path: str) -> None:
     """Rysuje Precision–Recall curve dla wielu JUŻ wytrenowanych modeli."""
-    save_path = str(save_path)
     _ensure_dir(Path(save_path).parent)
-
-    plt.figure()
-    for name, model in models.items():
-        proba = model.predict_proba(X_test)[:, 1]
-        PrecisionRecallDisplay.from_predictions(y_test, proba, name=name)
-
-    plt.title("Precision–Recall curve (hold-out)")
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=200)
-    plt.close()
+    pr_figure(pr_points({name: model.predict_proba(X_test)[:, 1] for name, model in models.items()}, y_test), save_path)
 
 
 def plot_confusion_matrices(models: dict, X_test, y_test, save_dir: str) -> None:
     """Zapisuje CM dla wielu JUŻ wytrenowanych modeli."""
     save_dir = _ensure_dir(save_dir)
-
     for name, model in models.items():
-        preds = model.predict(X_test)
-
-        fig, ax = plt.subplots()
-        ConfusionMatrixDisplay.from_predictions(y_test, preds, ax=ax)
-        ax.set_title(f"Confusion matrix (hold-out) - {name}")
-        fig.tight_layout()
-        fig.savefig(save_dir / f"cm_{name}.png", dpi=200)
-        plt.close(fig)
+        confusion_matrix_figure(confusion_matrix(y_test, model.predict(X_test)), name, save_dir / f"cm_{name}.png")
 
 
 def plot_feature_importance(model, feature_names, save_path: str, top_n: int = 20, title: str | None = None) -> None:
@@ -72,15 +161,5 @@ def plot_feature_importance(model, feature_names, save_path: str, top_n: int = 2
     if not hasattr(model, "feature_importances_"):
         return
 
-    importances = np.asarray(model.feature_importances_, dtype=float)
-    idx = np.argsort(importances)[::-1][:top_n]
-
     _ensure_dir(Path(save_path).parent)
-
-    fig, ax = plt.subplots(figsize=(8, 5))
-    ax.barh([feature_names[i] for i in idx][::-1], importances[idx][::-1])
-    ax.set_xlabel("feature_importances_")
-    ax.set_title(title or "Feature importance (top)")
-    fig.tight_layout()
-    fig.savefig(save_path, dpi=200)
-    plt.close(fig)
+    feature_importance_figure(model.feature_importances_, feature_names, save_path, top_n=top_n, title=title)
@@ -1,26 +1,84 @@
+import numpy as np
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
 from xgboost import XGBClassifier
-from src.config import XGB_PARAMS
+from src.config import RANDOM_STATE, VAL_SIZE, XGB_PARAMS
+from src.parallel import estimator_jobs
+from src.train import BaggedUndersampleClassifier, _take_rows
 
+# n_jobs we wszystkich fabrykach: wątki jednego estymatora; None -> estimator_jobs()
+# (budżet z src/parallel.py, przy założeniu, że obok działają równoległe foldy CV)
 
-def logreg_model():
+
+def logreg_model(n_jobs: int | None = None):
+    # lbfgs dla klasyfikacji binarnej jest jednowątkowy – n_jobs tylko dla spójnego API fabryk
     return Pipeline(steps=[
         ("scaler", StandardScaler()),
         ("clf", LogisticRegression(max_iter=5000))
     ])
 
 
-def baseline_model():
-    return RandomForestClassifier()
+def baseline_model(n_jobs: int | None = None):
+    return RandomForestClassifier(n_jobs=estimator_jobs() if n_jobs is None else n_jobs)
+
+
+class EarlyStoppingXGBClassifier(XGBClassifier):
+    """
+    XGBClassifier z early stoppingiem na wewnętrznym zbiorze walidacyjnym: fit(X, y) bez
+    eval_set odkłada stratyfikowane val_size wierszy (domyślnie config.VAL_SIZE), uczy się
+    na reszcie do early_stopping_rounds rund bez poprawy AUC i obcina booster do najlepszej
+    rundy. Działa więc w cross_validate / FoldEngine / train_and_evaluate, które wołają
+    samo fit(X, y), a zapisany model (rejestr, scoring online) ma tylko potrzebne drzewa.
+    n_estimators = górny limit rund.
+    """
+
+    def __init__(self, *, val_size: float = VAL_SIZE, **kwargs):
+        super().__init__(**kwargs)
+        self.val_size = val_size
+
+    def _wrapper_params(self) -> set[str]:
+        return super()._wrapper_params() | {"val_size"}
 
+    def fit(self, X, y, **kwargs):
+        if not self.early_stopping_rounds or "eval_set" in kwargs:
+            return super().fit(X, y, **kwargs)
 
-def xgb_model(scale_pos_weight: float | None = None, override_params: dict | None = None):
+        fit_idx, val_idx = train_test_split(
+            np.arange(len(y)), test_size=self.val_size, stratify=np.asarray(y),
+            random_state=self.random_state if self.random_state is not None else RANDOM_STATE,
+        )
+        y_fit, y_val = _take_rows(y, fit_idx), _take_rows(y, val_idx)
+        super().fit(
+            _take_rows(X, fit_idx), y_fit, eval_set=[(_take_rows(X, val_idx), y_val)], verbose=False, **kwargs
+        )
+        self.best_n_estimators_ = self.best_iteration + 1
+        self._Booster = self.get_booster()[: self.best_n_estimators_]
+        return self
+
+
+def xgb_model(
+    scale_pos_weight: float | None = None,
+    override_params: dict | None = None,
+    n_jobs: int | None = None,
+    early_stopping_rounds: int | None = None,
+):
+    """early_stopping_rounds: early stopping na odłożonych VAL_SIZE wierszach train (EarlyStoppingXGBClassifier)."""
     params = dict(XGB_PARAMS)
     if scale_pos_weight is not None:
         params["scale_pos_weight"] = scale_pos_weight
     if override_params is not None:
         params.update(override_params)
+    # budżet wątków wygrywa z n_jobs zapisanym w parametrach (np. -1 z tuningu)
+    params["n_jobs"] = estimator_jobs() if n_jobs is None else n_jobs
+    if early_stopping_rounds:
+        return EarlyStoppingXGBClassifier(**params, early_stopping_rounds=early_stopping_rounds)
     return XGBClassifier(**params)
+
+
+def bagged_xgb_model(n_bags: int = 5, override_params: dict | None = None, n_jobs: int | None = None):
+    # każda próbka jest zbalansowana 1:1, więc bez dociążania klasy pozytywnej
+    base = xgb_model(scale_pos_weight=1.0, override_params=override_params, n_jobs=n_jobs)
+    return BaggedUndersampleClassifier(base, n_bags=n_bags)
@@ -0,0 +1,132 @@
+"""
+Scoring online pojedynczego zamówienia (checkout).
+
+Wektor cech liczony jest na zwykłych dict/list z pozycji zamówienia, bez pandas,
+dokładnie wg definicji z build_features_transaction_level:
+- duplikaty całych pozycji usuwane,
+- cechy tylko z pozycji zakupowych (Purchased Item Count > 0),
+- częstości z zamrożonego FeatureEncoder artefaktu (nieznane / brak -> 0.0); wartości
+  kategoryczne porównywane jako tekst (Version 1 z JSON-a = kategoria "1" z CSV),
+- sumy kwot w float32 jak w RAW_SCHEMA, wektor cech float32 jak FeatureMatrix,
+- data = najwcześniejsza data zakupu, parsowana przez _parse_dates jednym formatem
+  (DATE_FORMAT albo wykrytym raz, na pierwszym zamówieniu – jak w wersji strumieniowej),
+- dzielenia przez 0 -> 0.0.
+
+Predykcja idzie przez Booster.inplace_predict (bez DMatrix i bez DataFrame).
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.config import DATE_FORMAT
+from src.data_loader import RAW_SCHEMA
+from src.feature_engineering import _SUM_COLS, _parse_dates, detect_date_format
+from src.registry import ModelArtifact
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _item_code_prefix(code) -> str:
+    # jak w wersji wsadowej: str(kod).split("-")[0], brak kodu -> "nan"
+    return ("nan" if _is_missing(code) else str(code)).split("-")[0]
+
+
+def _as_float32(value) -> float:
+    return float(np.float32(value))
+
+
+class OnlineScorer:
+    """
+    Cechy i predykcja dla jednego zamówienia (listy pozycji jako dict
+    z kolumnami surowych danych, np. z JSON-a).
+    """
+
+    def __init__(self, artifact: ModelArtifact, date_format: str | None = DATE_FORMAT):
+        self.artifact = artifact
+        self.feature_columns = artifact.feature_columns
+        self.threshold = artifact.threshold
+        self.date_format = date_format
+
+        # częstości jako zwykłe dict (jedno wyszukanie na pozycję), klucze jako tekst
+        encoder = artifact.encoder
+        self.freq_maps = {
+            name: dict(zip(map(str, encoder.categories_[name].tolist()), encoder.frequencies_[name].tolist()))
+            for name in encoder.columns
+            if f"{name}_freq_mean" in self.feature_columns
+        }
+
+        # sumy kwot (float32 w RAW_SCHEMA) zaokrąglane jak w danych wsadowych
+        self._float32_sums = {name for name, col in _SUM_COLS.items() if RAW_SCHEMA[col] == "float32"}
+
+        model = artifact.model
+        self.booster = model.get_booster() if hasattr(model, "get_booster") else None
+        self._dates: dict[str, datetime | None] = {}
+
+    def _purchase_date(self, values: list) -> datetime | None:
+        """Najwcześniejsza data; nowe napisy parsowane przez _parse_dates (cache na kolejne zamówienia)."""
+        values = [str(v) for v in values if not _is_missing(v)]
+        new = [v for v in dict.fromkeys(values) if v not in self._dates]
+        if new:
+            if self.date_format is None:
+                self.date_format = detect_date_format(new)
+            parsed = _parse_dates(pd.Series(new, dtype=object), self.date_format)
+            self._dates.update((v, None if pd.isna(d) else d.to_pydatetime()) for v, d in zip(new, parsed))
+        dates = [self._dates[v] for v in values if self._dates[v] is not None]
+        return min(dates) if dates else None
+
+    def features(self, items: list[dict]) -> np.ndarray:
+        """Wektor cech (kolejność jak artifact.feature_columns) dla pozycji jednego zamówienia."""
+        unique = list({tuple(sorted(item.items())): item for item in items}.values())
+        purchases = [item for item in unique if item["Purchased Item Count"] > 0]
+        if not purchases:
+            raise ValueError("Zamówienie bez pozycji zakupowych (Purchased Item Count > 0) nie ma cech")
+
+        n = len(purchases)
+        f = {}
+        for name, col in _SUM_COLS.items():
+            if name in self._float32_sums:
+                f[name] = _as_float32(sum(_as_float32(item[col]) for item in purchases))
+            else:
+                f[name] = float(sum(item[col] for item in purchases))
+        f["UniqueItems_n"] = len({item["Item ID"] for item in purchases if not _is_missing(item["Item ID"])})
+        f["UniqueCategories_n"] = len({str(item["Category"]) for item in purchases if not _is_missing(item["Category"])})
+
+        for name, freq in self.freq_maps.items():
+            if name == "ItemCodePrefix":
+                values = [_item_code_prefix(item.get("Item Code")) for item in purchases]
+            else:
+                values = [item[name] for item in purchases]
+            f[f"{name}_freq_mean"] = sum(0.0 if _is_missing(v) else freq.get(str(v), 0.0) for v in values) / n
+
+        revenue = f["TotalRevenue_sum"]
+        f["DiscountRatio"] = f["PriceReductions_sum"] / revenue if revenue != 0 else 0.0
+        f["TaxRatio"] = f["SalesTax_sum"] / revenue if revenue != 0 else 0.0
+        f["UnitPrice"] = revenue / f["FinalQuantity_sum"] if f["FinalQuantity_sum"] != 0 else 0.0
+
+        day = self._purchase_date([item["Date"] for item in purchases])
+        if day is not None:
+            weekday = day.weekday()
+            f.update(Year=day.year, Month=day.month, DayOfWeek=weekday,
+                     IsWeekend=int(weekday >= 5), Quarter=(day.month - 1) // 3 + 1)
+        else:
+            f.update(Year=0, Month=0, DayOfWeek=0, IsWeekend=0, Quarter=0)
+
+        row = np.array([f[c] for c in self.feature_columns], dtype=np.float32)
+        row[~np.isfinite(row)] = 0.0
+        return row
+
+    def predict_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Prawdopodobieństwa dla macierzy cech (n_zamówień x n_cech) – jedno wywołanie modelu."""
+        if self.booster is not None:
+            return self.booster.inplace_predict(rows)
+        return self.artifact.model.predict_proba(rows)[:, 1]
+
+    def score(self, items: list[dict]) -> float:
+        """Prawdopodobieństwo zwrotu dla pozycji jednego zamówienia."""
+        return float(self.predict_rows(self.features(items)[None, :])[0])
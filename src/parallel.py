@@ -0,0 +1,148 @@
+"""
+Budżet równoległości dla CV, strojenia i uczenia modeli.
+
+Dzielimy rdzenie na dwa poziomy:
+- outer: ile zadań równolegle (foldy CV w joblib, workery Optuny),
+- inner: ile wątków ma jeden estymator (XGBoost nthread, RandomForest n_jobs).
+
+outer * inner nie przekracza liczby rdzeni – n_jobs=-1 na obu poziomach naraz
+uruchamia rdzenie^2 wątków i na dużych maszynach jest wolniejsze niż liczenie seryjne.
+
+Polityki (config.PARALLEL_POLICY albo main.py --parallel-policy):
+- "balanced": outer ≈ sqrt(rdzenie) (nie więcej niż zadań), reszta rdzeni na wątki estymatora
+- "outer":    tyle zadań równolegle, ile się da (do liczby zadań), reszta rdzeni na wątki
+- "inner":    zadania po kolei, wszystkie rdzenie dla jednego estymatora
+- "serial":   jeden proces, jeden wątek (debug, pomiary referencyjne)
+
+Dane dla workerów (config.CV_DATA_MODE): "pickle" serializuje X/y do każdego zadania
+joblib; "memmap" zapisuje je raz do .npy (shared_data / share_arrays) – joblib przekazuje
+np.memmap jako ścieżkę pliku, więc worker dostaje tylko referencję i indeksy foldu,
+a strony pliku są współdzielone między procesami.
+"""
+from __future__ import annotations
+
+import math
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import config
+from src.feature_matrix import FeatureMatrix
+
+POLICIES = ("balanced", "outer", "inner", "serial")
+DATA_MODES = ("pickle", "memmap")
+
+# Nadpisania ustawione w czasie działania (CLI); None -> wartość z config
+_runtime = {"policy": None, "n_cores": None}
+
+
+def configure(policy: str | None = None, n_cores: int | None = None) -> None:
+    """Nadpisuje politykę i/lub liczbę rdzeni z config (np. z argumentów CLI)."""
+    if policy is not None and policy not in POLICIES:
+        raise ValueError(f"Nieznana polityka równoległości: {policy!r} (dostępne: {', '.join(POLICIES)})")
+    _runtime["policy"] = policy
+    _runtime["n_cores"] = n_cores
+
+
+def current_policy() -> str:
+    return _runtime["policy"] or config.PARALLEL_POLICY
+
+
+def available_cores() -> int:
+    """Rdzenie do wykorzystania: CLI -> config.N_CORES -> os.cpu_count()."""
+    n = _runtime["n_cores"] or config.N_CORES or os.cpu_count() or 1
+    return max(1, int(n))
+
+
+def parallel_budget(n_tasks: int, policy: str | None = None, n_cores: int | None = None) -> tuple[int, int]:
+    """
+    Podział rdzeni dla n_tasks niezależnych zadań (np. foldów).
+
+    returns: (outer_jobs, inner_jobs) – liczba zadań równolegle i wątków na estymator
+    """
+    policy = policy or current_policy()
+    n_cores = n_cores or available_cores()
+    n_tasks = max(1, n_tasks)
+
+    if policy == "serial":
+        return 1, 1
+    if policy == "inner":
+        return 1, n_cores
+    if policy == "outer":
+        outer = min(n_tasks, n_cores)
+    elif policy == "balanced":
+        outer = min(n_tasks, max(1, round(math.sqrt(n_cores))))
+    else:
+        raise ValueError(f"Nieznana polityka równoległości: {policy!r} (dostępne: {', '.join(POLICIES)})")
+    return outer, max(1, n_cores // outer)
+
+
+def estimator_jobs(n_tasks: int | None = None) -> int:
+    """
+    Wątki jednego estymatora, gdy obok siebie działa n_tasks zadań
+    (domyślnie tyle, ile foldów CV w config.CV_FOLDS).
+    """
+    return parallel_budget(config.CV_FOLDS if n_tasks is None else n_tasks)[1]
+
+
+def split_thread_budget(n_workers: int, n_jobs: int | None = None) -> int:
+    """
+    Wątki na jednego workera: budżet n_jobs (None / -1 = available_cores())
+    dzielony równo między n_workers, żeby workery x wątki estymatora nie przekraczały rdzeni.
+    """
+    total = available_cores() if n_jobs is None or n_jobs < 0 else n_jobs
+    return max(1, total // max(1, n_workers))
+
+
+def _memmap(values: np.ndarray, path: Path) -> np.ndarray:
+    if isinstance(values, np.memmap):
+        return values  # już na dysku (np. magazyn cech) – bez kopii
+    np.save(path, np.ascontiguousarray(values))
+    return np.load(path, mmap_mode="r")
+
+
+def share_arrays(X, y, folder: str | Path):
+    """
+    X i y jako tablice tylko do odczytu na memmap w katalogu folder.
+
+    X: FeatureMatrix -> FeatureMatrix na memmap; DataFrame -> FeatureMatrix (float32,
+       te same kolumny); ndarray -> memmap tego samego dtype. y -> ndarray na memmap.
+    """
+    folder = Path(folder)
+    if isinstance(X, pd.DataFrame):
+        X = FeatureMatrix.from_frame(X)
+    if isinstance(X, FeatureMatrix):
+        X = FeatureMatrix(_memmap(X.values, folder / "X.npy"), X.columns, X.index)
+    else:
+        X = _memmap(np.asanyarray(X), folder / "X.npy")
+    return X, _memmap(np.asanyarray(y), folder / "y.npy")
+
+
+def shared_folder() -> tempfile.TemporaryDirectory:
+    """Katalog tymczasowy na pliki memmap (config.SHARED_DATA_DIR), usuwany przy cleanup() / GC."""
+    return tempfile.TemporaryDirectory(prefix="shared_data_", dir=config.SHARED_DATA_DIR)
+
+
+def resolve_data_mode(mode: str | None, n_jobs: int) -> str:
+    """Tryb danych (None -> config.CV_DATA_MODE); przy jednym procesie nie ma czego współdzielić -> "pickle"."""
+    mode = mode or config.CV_DATA_MODE
+    if mode not in DATA_MODES:
+        raise ValueError(f"Nieznany tryb danych: {mode!r} (dostępne: {', '.join(DATA_MODES)})")
+    return "pickle" if n_jobs == 1 else mode
+
+
+@contextmanager
+def shared_data(X, y, mode: str | None = None, n_jobs: int = -1):
+    """
+    Kontekst z (X, y) dla n_jobs zadań joblib wg resolve_data_mode:
+    "pickle" -> bez zmian, "memmap" -> share_arrays w shared_folder(), usuwanym po wyjściu.
+    """
+    if resolve_data_mode(mode, n_jobs) == "pickle":
+        yield X, y
+        return
+    with shared_folder() as folder:
+        yield share_arrays(X, y, folder)
@@ -1,42 +1,273 @@
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
 
+# Wiersze na jeden kawałek audytu (pośrednie tablice mają rozmiar kawałka, nie całych danych)
+AUDIT_CHUNK_ROWS = 1_000_000
+# Kolumny, w których ujemne wartości oznaczają zwrot – audyt liczy je osobno
+REFUND_COLS = ("Refunded Item Count", "Refunds")
+# Precyzja HyperLogLog: 2^14 rejestrów, błąd względny ~0.8%
+HLL_PRECISION = 14
 
-def audit_data_quality(df: pd.DataFrame) -> dict:
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    64-bitowy hash każdego wiersza (wszystkie kolumny, bez indeksu) – jedno
+    wektorowe przejście zamiast porównywania całych wierszy.
+    Kolizja dwóch różnych wierszy jest praktycznie niemożliwa (~n^2 / 2^65).
+    """
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def duplicate_mask(df: pd.DataFrame, hashes: np.ndarray | None = None) -> np.ndarray:
+    """Maska duplikatów całych wierszy (True = kolejne wystąpienie, jak df.duplicated())."""
+    if hashes is None:
+        hashes = row_hashes(df)
+    return pd.Series(hashes, copy=False).duplicated().to_numpy()
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """
+    Dokładna długość bitowa uint64 (0 dla 0). Połówki 32-bitowe są dokładne w float64, więc
+    wykładnik z np.frexp nie ma błędu zaokrąglenia jak log2 całej liczby blisko potęg dwójki.
+    """
+    hi = (values >> np.uint64(32)).astype(np.float64)
+    lo = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(hi > 0, 32 + np.frexp(hi)[1], np.frexp(lo)[1]).astype(np.int64)
+
+
+class HyperLogLog:
+    """
+    Przybliżona liczba różnych wartości z 64-bitowych hashy (HyperLogLog z korektą
+    dla małych liczności). Pamięć: 2^precision bajtów niezależnie od liczby wartości.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if len(hashes) == 0:
+            return
+        p = np.uint64(self.precision)
+        idx = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        rest = hashes << p
+        # pozycja pierwszej jedynki w pozostałych bitach (1 = najstarszy bit)
+        bit_length = _bit_length(rest)
+        rank = np.minimum(64 - bit_length + 1, 64 - self.precision + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros > 0:
+            return int(round(m * np.log(m / zeros)))  # linear counting
+        return int(round(raw))
+
+
+class HashSet:
+    """
+    Zbiór 64-bitowych hashy jako kilka posortowanych tablic uint64 (~8 bajtów na hash,
+    zamiast ~70 bajtów na element set() Pythona).
+
+    Nowe hashe trafiają jako osobna posortowana tablica; gdy poprzednia jest najwyżej
+    2x większa, obie są scalane (jak w drzewie LSM). Tablic jest O(log n), każdy hash
+    jest scalany O(log n) razy, więc wstawienie n hashy kosztuje O(n log n) łącznie –
+    a nie pełne przesortowanie całego zbioru przy każdym kawałku.
+    """
+
+    def __init__(self):
+        self.runs: list[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return sum(len(r) for r in self.runs)
+
+    def add(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Dokłada hashe; zwraca maskę powtórzeń (True = hash już był w zbiorze albo
+        wcześniej w tej samej tablicy – jak df.duplicated() liczone globalnie).
+        """
+        order = np.argsort(hashes, kind="stable")
+        ordered = hashes[order]
+        dup_ordered = np.concatenate([[False], ordered[1:] == ordered[:-1]])
+        for run in self.runs:
+            # posortowane zapytania: searchsorted idzie po serii sekwencyjnie (bez skoków po pamięci)
+            pos = np.minimum(np.searchsorted(run, ordered), len(run) - 1)
+            dup_ordered |= run[pos] == ordered
+        dup = np.empty(len(hashes), dtype=bool)
+        dup[order] = dup_ordered
+
+        run = ordered[~dup_ordered]
+        if len(run) == 0:
+            return dup
+        while self.runs and len(self.runs[-1]) <= 2 * len(run):
+            # stabilne sortowanie dwóch posortowanych serii to liniowe scalanie
+            run = np.sort(np.concatenate([self.runs.pop(), run]), kind="stable")
+        self.runs.append(run)
+        return dup
+
+
+def _combine_hashes(row: np.ndarray | None, column: np.ndarray, k: int, n_cols: int) -> np.ndarray:
+    """Dokłada hash kolumny k do hashy wierszy (mieszanie jak w pandas: xor + mnożnik)."""
+    if row is None:
+        row = np.full(len(column), 0x345678, dtype=np.uint64)
+    mult = np.uint64(1000003 + sum(82520 + 2 * (n_cols - i) for i in range(k)))
+    with np.errstate(over="ignore"):
+        return (row ^ column) * mult
+
+
+def _column_audit(df: pd.DataFrame, chunk_rows: int) -> tuple[dict, np.ndarray]:
+    """
+    Jedno przejście kawałkami po wierszach: statystyki kolumn + hashe całych wierszy.
+    Hash każdej kolumny liczony jest raz i służy zarówno HyperLogLog, jak i hashom wierszy.
     """
-    Prosty audyt jakości danych.
-    Zwraca słownik z informacjami o duplikatach i brakach (NaN).
+    n_cols = df.shape[1]
+    stats = {
+        col: {"nulls": 0, "min": None, "max": None, "_hll": HyperLogLog()}
+        for col in df.columns
+    }
+    for col in REFUND_COLS:
+        if col in stats:
+            stats[col]["negative"] = 0
+
+    hashes = np.empty(len(df), dtype=np.uint64)
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        row = None
+        for k, col in enumerate(df.columns):
+            s = chunk[col]
+            st = stats[col]
+            notna = s.notna().to_numpy()
+            st["nulls"] += int(len(s) - np.count_nonzero(notna))
+
+            h = pd.util.hash_pandas_object(s, index=False).to_numpy()
+            st["_hll"].add_hashes(h[notna])
+            row = _combine_hashes(row, h, k, n_cols)
+
+            if is_numeric_dtype(s.dtype) and not is_bool_dtype(s.dtype):
+                values = s.to_numpy()[notna]
+                if len(values):
+                    lo, hi = values.min(), values.max()
+                    st["min"] = lo if st["min"] is None else min(st["min"], lo)
+                    st["max"] = hi if st["max"] is None else max(st["max"], hi)
+                    if "negative" in st:
+                        st["negative"] += int(np.count_nonzero(values < 0))
+        hashes[start:start + len(chunk)] = row if row is not None else 0
+
+    for st in stats.values():
+        st["distinct_approx"] = st.pop("_hll").estimate()
+        for key in ("min", "max"):
+            if st[key] is not None:
+                st[key] = st[key].item() if hasattr(st[key], "item") else st[key]
+    return stats, hashes
+
+
+def _audit_report(n_rows: int, n_cols: int, duplicate_rows: int | None, columns: dict) -> dict:
+    na_count = pd.Series({col: st["nulls"] for col, st in columns.items()}, dtype="int64")
+    return {
+        "n_rows": int(n_rows),
+        "n_cols": int(n_cols),
+        # Duplikaty całych wierszy (None = nieznane: audyt próbki bez exact_duplicates)
+        "duplicate_rows": None if duplicate_rows is None else int(duplicate_rows),
+        # Braki danych
+        "any_nan": bool(na_count.any()),
+        "nan_total": int(na_count.sum()),
+        # Top 10 kolumn z największą liczbą NaN
+        "nan_by_col_top10": (
+            na_count[na_count > 0]
+            .sort_values(ascending=False)
+            .head(10)
+            .to_dict()
+        ),
+        # Statystyki kolumn: nulls, min/max (liczbowe), distinct_approx (HyperLogLog),
+        # negative (kolumny zwrotów REFUND_COLS)
+        "columns": columns,
+    }
+
+
+def _audit(df: pd.DataFrame, chunk_rows: int = AUDIT_CHUNK_ROWS) -> tuple[dict, np.ndarray]:
+    """Raport audytu i maska duplikatów z jednego przejścia po danych."""
+    columns, hashes = _column_audit(df, chunk_rows)
+    duplicates = duplicate_mask(df, hashes)
+    return _audit_report(len(df), df.shape[1], np.count_nonzero(duplicates), columns), duplicates
+
+
+def audit_data_quality(
+    df: pd.DataFrame,
+    sample: int | float | None = None,
+    random_state: int = 42,
+    chunk_rows: int = AUDIT_CHUNK_ROWS,
+    exact_duplicates: bool = False,
+) -> dict:
     """
-    report = {}
+    Audyt jakości danych: duplikaty całych wierszy, braki (NaN) i statystyki kolumn,
+    liczone kawałkami po chunk_rows wierszy (bez pełnowymiarowych ramek bool).
 
-    report["n_rows"] = int(len(df))
-    report["n_cols"] = int(df.shape[1])
+    sample: tryb szybki (np. interaktywnie) – audyt losowej próbki wierszy
+            (int = liczba wierszy, float = ułamek). Liczniki braków i ujemnych są
+            przeskalowane do całych danych, min/max i distinct_approx dotyczą próbki;
+            raport ma wtedy klucz "sample". Z próbki nie da się oszacować duplikatów
+            (para trafia do niej z prawdopodobieństwem ~fraction^2), więc duplicate_rows = None.
+    exact_duplicates: (tylko z sample) dokładna liczba duplikatów z hashy wierszy całych
+            danych (kawałkami, HashSet) – kosztuje przejście po wszystkich wierszach,
+            czyli prawie tyle co pełny audyt.
+    """
+    if sample is None:
+        return _audit(df, chunk_rows)[0]
 
-    # Duplikaty całych wierszy
-    report["duplicate_rows"] = int(df.duplicated().sum())
+    n_sample = int(sample * len(df)) if isinstance(sample, float) else int(sample)
+    n_sample = max(1, min(n_sample, len(df)))
+    fraction = n_sample / max(len(df), 1)
+    rows = np.sort(np.random.default_rng(random_state).choice(len(df), size=n_sample, replace=False))
+    report = _audit(df.iloc[rows], chunk_rows)[0]
 
-    # Braki danych
-    na_count = df.isna().sum()
-    report["any_nan"] = bool(na_count.any())
-    report["nan_total"] = int(na_count.sum())
+    scale = 1 / fraction
+    for st in report["columns"].values():
+        st["nulls"] = int(round(st["nulls"] * scale))
+        if "negative" in st:
+            st["negative"] = int(round(st["negative"] * scale))
+    duplicates = None
+    if exact_duplicates:
+        seen = HashSet()
+        duplicates = sum(
+            int(np.count_nonzero(seen.add(row_hashes(df.iloc[start:start + chunk_rows]))))
+            for start in range(0, len(df), chunk_rows)
+        )
+    estimated = _audit_report(len(df), df.shape[1], duplicates, report["columns"])
+    estimated["sample"] = {"rows": n_sample, "fraction": round(fraction, 6)}
+    return estimated
 
-    # Top 10 kolumn z największą liczbą NaN
-    report["nan_by_col_top10"] = (
-        na_count[na_count > 0]
-        .sort_values(ascending=False)
-        .head(10)
-        .to_dict()
-    )
 
-    return report
+def remove_full_row_duplicates(df: pd.DataFrame, duplicates: np.ndarray | None = None) -> pd.DataFrame:
+    """
+    Usuwa duplikaty całych wierszy (zostaje pierwsze wystąpienie).
+    Bez duplikatów zwraca tę samą ramkę (bez kopii).
+    """
+    if duplicates is None:
+        duplicates = duplicate_mask(df)
+    if not duplicates.any():
+        return df
+    return df[~duplicates]
 
 
-def remove_full_row_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+def _audit_after_cleaning(before: dict, removed: pd.DataFrame) -> dict:
     """
-    Usuwa duplikaty całych wierszy.
+    Audyt po usunięciu duplikatów wyprowadzony z audytu przed: usunięte wiersze to kopie
+    pozostających, więc min/max i liczba różnych wartości się nie zmieniają, a braki
+    i ujemne wartości maleją o te z usuniętych wierszy.
     """
-    df = df.copy()
-    df = df.drop_duplicates()
-    return df
+    columns = {}
+    for col, st in before["columns"].items():
+        st = dict(st)
+        if len(removed):
+            values = removed[col]
+            st["nulls"] -= int(values.isna().sum())
+            if "negative" in st:
+                st["negative"] -= int((values < 0).sum())
+        columns[col] = st
+    return _audit_report(before["n_rows"] - len(removed), before["n_cols"], 0, columns)
 
 
 def preprocessing_pipeline(df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
@@ -45,11 +276,14 @@ def preprocessing_pipeline(df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
     - audyt jakości
     - usunięcie duplikatów całych wierszy
     - ponowny audyt po czyszczeniu
+
+    Dane czytane są raz (_audit): ten sam przebieg daje raport i maskę duplikatów,
+    a audyt po czyszczeniu wynika z pierwszego (_audit_after_cleaning).
     """
-    before = audit_data_quality(df)
+    before, duplicates = _audit(df)
 
-    df_clean = remove_full_row_duplicates(df)
+    df_clean = remove_full_row_duplicates(df, duplicates)
 
-    after = audit_data_quality(df_clean)
+    after = _audit_after_cleaning(before, df[duplicates])
 
     return df_clean, {"before": before, "after": after}
@@ -0,0 +1,204 @@
+"""
+Pomiar etapów pipeline'u: czas, pamięć i opcjonalny profil jednego etapu.
+
+    profiler = RunProfiler(trace_memory=True, profile_stage="tuning")
+    with profiler.stage("features"):
+        ...
+    profiler.print_summary()
+    profiler.write_report("outputs/run_report.json")
+
+Dla każdego etapu zapisujemy:
+- seconds / cpu_seconds – czas ściany i CPU procesu głównego,
+- rss_mb / peak_rss_mb  – RSS na końcu etapu i szczyt w trakcie etapu (Linux: licznik
+  VmHWM zerowany na starcie etapu; gdzie indziej szczyt od startu procesu),
+- py_peak_mb, top_allocations – (trace_memory=True) szczyt alokacji Pythona (tracemalloc)
+  i linie kodu, które najwięcej zaalokowały w etapie; spowalnia pipeline, więc opcjonalne,
+- profile – (profile_stage) plik .prof (cProfile) albo .html (pyinstrument) dla wybranego etapu.
+
+Pamięć workerów joblib nie jest wliczana (osobne procesy).
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:  # brak na Windows
+    import resource
+except ImportError:
+    resource = None
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+_PROC_STATUS = Path("/proc/self/status")
+_PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+def _proc_status_mb(key: str) -> float | None:
+    """VmRSS / VmHWM z /proc/self/status w MB (None poza Linuksem)."""
+    try:
+        for line in _PROC_STATUS.read_text().splitlines():
+            if line.startswith(key + ":"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Zeruje licznik szczytowego RSS procesu (Linux >= 4.0); False, gdy niedostępne."""
+    try:
+        _PROC_CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float | None:
+    peak = _proc_status_mb("VmHWM")
+    if peak is None and resource is not None:
+        # ru_maxrss: KB na Linuksie, bajty na macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2**20 if sys.platform == "darwin" else 1024)
+    return peak
+
+
+def _round(value: float | None, digits: int = 1) -> float | None:
+    return None if value is None else round(value, digits)
+
+
+class RunProfiler:
+    """
+    Zbiera pomiary etapów jednego uruchomienia (stage) i zapisuje raport JSON.
+
+    trace_memory: tracemalloc dla wszystkich etapów (szczyt + top_allocations linii)
+    profile_stage: nazwa etapu profilowanego przez `profiler` ("cprofile" | "pyinstrument")
+    profile_dir: katalog na pliki profilu
+    """
+
+    def __init__(
+        self,
+        trace_memory: bool = False,
+        profile_stage: str | None = None,
+        profiler: str = "cprofile",
+        profile_dir: str | Path = "outputs/profiles",
+        top_allocations: int = 10,
+    ):
+        if profiler not in PROFILERS:
+            raise ValueError(f"Nieznany profiler: {profiler!r} (dostępne: {', '.join(PROFILERS)})")
+        self.trace_memory = trace_memory
+        self.profile_stage = profile_stage
+        self.profiler = profiler
+        self.profile_dir = Path(profile_dir)
+        self.top_allocations = top_allocations
+        self.stages: list[dict] = []
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mierzy blok kodu jako etap `name` (wynik trafia do self.stages także po wyjątku)."""
+        record: dict = {"name": name}
+        per_stage_peak = _reset_peak_rss()
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            start_snapshot = tracemalloc.take_snapshot()
+        profile = self._start_profile() if name == self.profile_stage else None
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record["seconds"] = round(time.perf_counter() - wall, 3)
+            record["cpu_seconds"] = round(time.process_time() - cpu, 3)
+            if profile is not None:
+                record["profile"] = self._stop_profile(name, profile)
+            record["rss_mb"] = _round(_proc_status_mb("VmRSS"))
+            record["peak_rss_mb"] = _round(_peak_rss_mb())
+            record["peak_rss_scope"] = "stage" if per_stage_peak else "process"
+            if self.trace_memory:
+                record["py_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+                diff = tracemalloc.take_snapshot().compare_to(start_snapshot, "lineno")
+                record["top_allocations"] = [
+                    {"where": str(d.traceback), "size_mb": round(d.size_diff / 2**20, 2), "count": d.count_diff}
+                    for d in diff[: self.top_allocations]
+                ]
+            self.stages.append(record)
+
+    def _start_profile(self):
+        if self.profiler == "pyinstrument":
+            # opcjonalna zależność – potrzebna tylko przy --profiler pyinstrument
+            from pyinstrument import Profiler
+
+            profile = Profiler()
+            profile.start()
+            return profile
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def _stop_profile(self, name: str, profile) -> dict:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        if self.profiler == "pyinstrument":
+            profile.stop()
+            path = self.profile_dir / f"{name}.html"
+            path.write_text(profile.output_html(), encoding="utf-8")
+            return {"path": str(path)}
+
+        profile.disable()
+        path = self.profile_dir / f"{name}.prof"
+        profile.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(25)
+        return {"path": str(path), "top_cumulative": out.getvalue().splitlines()}
+
+    def report(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "total_seconds": round(time.perf_counter() - self._t0, 3),
+            "argv": sys.argv,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "stages": self.stages,
+        }
+
+    def write_report(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        return path
+
+    def summary_table(self) -> str:
+        """Tabela etapów: czas, udział w całości, CPU, RSS, szczyt RSS (i szczyt tracemalloc)."""
+        total = sum(s["seconds"] for s in self.stages) or 1.0
+        header = f"{'Stage':<16} | {'Time [s]':>9} | {'%':>5} | {'CPU [s]':>9} | {'RSS [MB]':>9} | {'Peak [MB]':>9}"
+        if self.trace_memory:
+            header += f" | {'Py peak [MB]':>12}"
+        lines = [header, "-" * len(header)]
+        for s in self.stages:
+            line = (
+                f"{s['name']:<16} | {s['seconds']:>9.2f} | {100 * s['seconds'] / total:>5.1f} | "
+                f"{s['cpu_seconds']:>9.2f} | {s['rss_mb'] or 0:>9.1f} | {s['peak_rss_mb'] or 0:>9.1f}"
+            )
+            if self.trace_memory:
+                line += f" | {s['py_peak_mb']:>12.1f}"
+            lines.append(line)
+        lines.append("-" * len(header))
+        lines.append(f"{'total':<16} | {total:>9.2f}")
+        return "\n".join(lines)
+
+    def print_summary(self) -> None:
+        print("\n" + "=" * 70)
+        print("Czas i pamięć etapów")
+        print("=" * 70)
+        print(self.summary_table())
@@ -0,0 +1,234 @@
+"""
+Rejestr artefaktów modeli i scoring wsadowy.
+
+Artefakt = katalog <root>/<nazwa>/<wersja>/:
+- model.ubj     – XGBoost w natywnym formacie UBJ (ładowanie bez pickle, bez treningu)
+- model.joblib  – modele sklearn (bez kompresji; tablice drzew/wag ładowane przez mmap)
+- encoder.json  – stan FeatureEncoder użyty przy budowie cech
+- meta.json     – kolejność kolumn cech, metryki, próg decyzji, typ modelu
+
+<root>/<nazwa>/LATEST wskazuje ostatnio zapisaną wersję.
+"""
+from __future__ import annotations
+
+import json
+import math
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from xgboost import XGBClassifier
+
+from src.config import CSV_CHUNKSIZE, MODEL_REGISTRY_DIR, SCORE_BUCKET_BYTES
+from src.data_loader import iter_csv_typed
+from src.feature_engineering import (
+    FeatureEncoder,
+    build_features_transaction_level,
+    build_features_transaction_level_streaming,
+)
+from src.feature_matrix import FeatureMatrix
+from src.feature_store import FeatureStore, encoder_fingerprint
+from src.parallel import available_cores
+
+MODEL_XGB_FILE = "model.ubj"
+MODEL_SKLEARN_FILE = "model.joblib"
+ENCODER_FILE = "encoder.json"
+META_FILE = "meta.json"
+LATEST_FILE = "LATEST"
+
+# Metryki z train_and_evaluate, które trafiają do meta.json (bez predykcji i modelu)
+_METRIC_KEYS = ("roc_auc", "f1", "acc", "precision", "recall", "cm")
+
+
+class ModelArtifact:
+    """Wytrenowany model gotowy do scoringu: estymator + kolejność cech + encoder + metadane."""
+
+    def __init__(self, model, feature_columns: list[str], encoder: FeatureEncoder, meta: dict | None = None):
+        self.model = model
+        self.feature_columns = list(feature_columns)
+        self.encoder = encoder
+        self.meta = meta or {}
+
+    @property
+    def threshold(self) -> float:
+        return float(self.meta.get("threshold", 0.5))
+
+    def predict_proba(self, tx: pd.DataFrame) -> np.ndarray:
+        """Prawdopodobieństwo zwrotu dla tabeli cech (kolumny w kolejności z treningu)."""
+        return self.predict_proba_matrix(FeatureMatrix.from_frame(tx, self.feature_columns))
+
+    def predict_proba_matrix(self, X: FeatureMatrix) -> np.ndarray:
+        """
+        Prawdopodobieństwo zwrotu dla FeatureMatrix z kolumnami feature_columns.
+        Model uczony na FeatureMatrix dostaje tablicę float32; uczony na DataFrame (ma
+        feature_names_in_) – ramkę, bo sprawdza nazwy kolumn.
+        """
+        if getattr(self.model, "feature_names_in_", None) is not None:
+            return self.model.predict_proba(X.to_frame())[:, 1]
+        return self.model.predict_proba(X)[:, 1]
+
+
+def _version_dir(root: Path, name: str, version: str | None) -> Path:
+    if version is None:
+        latest = root / name / LATEST_FILE
+        if not latest.exists():
+            raise FileNotFoundError(f"Brak zapisanych wersji modelu {name!r} w {root}")
+        version = latest.read_text(encoding="utf-8").strip()
+    return root / name / version
+
+
+def save_artifact(
+    model,
+    name: str,
+    feature_columns: list[str],
+    encoder: FeatureEncoder,
+    metrics: dict | None = None,
+    threshold: float = 0.5,
+    root: Path = MODEL_REGISTRY_DIR,
+    threshold_selection: dict | None = None,
+) -> Path:
+    """
+    Zapisuje nową wersję artefaktu i przestawia LATEST; zwraca katalog wersji.
+    threshold_selection: opis wyboru progu (select_threshold) zapisywany obok progu w meta.json.
+    """
+    root = Path(root)
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    out = root / name / version
+    out.mkdir(parents=True, exist_ok=False)
+
+    if isinstance(model, XGBClassifier):
+        kind = "xgb"
+        model.save_model(out / MODEL_XGB_FILE)
+    else:
+        kind = "sklearn"
+        joblib.dump(model, out / MODEL_SKLEARN_FILE, compress=0)
+
+    encoder.save(out / ENCODER_FILE)
+
+    meta = {
+        "name": name,
+        "version": version,
+        "kind": kind,
+        "feature_columns": list(feature_columns),
+        "metrics": {k: metrics[k] for k in _METRIC_KEYS if metrics and k in metrics},
+        "threshold": threshold,
+    }
+    if threshold_selection is not None:
+        meta["threshold_selection"] = threshold_selection
+    with open(out / META_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2, default=float)
+
+    (root / name / LATEST_FILE).write_text(version, encoding="utf-8")
+    return out
+
+
+def load_artifact(name: str, version: str | None = None, root: Path = MODEL_REGISTRY_DIR) -> ModelArtifact:
+    """Wczytuje artefakt (domyślnie wersję LATEST) – bez treningu i bez przeliczania częstości."""
+    path = _version_dir(Path(root), name, version)
+    with open(path / META_FILE, encoding="utf-8") as f:
+        meta = json.load(f)
+
+    if meta["kind"] == "xgb":
+        model = XGBClassifier(n_jobs=available_cores())
+        model.load_model(path / MODEL_XGB_FILE)
+    else:
+        model = joblib.load(path / MODEL_SKLEARN_FILE, mmap_mode="r")
+
+    return ModelArtifact(model, meta["feature_columns"], FeatureEncoder.load(path / ENCODER_FILE), meta)
+
+
+def score_file(
+    artifact: ModelArtifact,
+    path: Path,
+    out_path: Path,
+    batch_size: int = 100_000,
+    chunksize: int = CSV_CHUNKSIZE,
+    n_buckets: int | None = None,
+    tmp_dir: Path | None = None,
+) -> int:
+    """
+    Scoring surowego pliku zamówień (encoder z artefaktu), predykcje partiami po batch_size
+    transakcji, zapisywane od razu do out_path (CSV).
+
+    Pamięć nie rośnie z całym plikiem: wiersze są najpierw rozkładane kawałkami (chunksize)
+    na n_buckets kubełków wg Transaction ID % n_buckets (pliki Parquet w tmp_dir), a potem
+    każdy kubełek – komplet wierszy swoich transakcji, także późnych zwrotów i duplikatów –
+    dostaje osobno cechy i predykcje. Szczyt pamięci ~ jeden chunk albo jeden kubełek z cechami.
+    n_buckets=None: ceil(rozmiar pliku / SCORE_BUCKET_BYTES); przy jednym kubełku bez rozkładania
+    (cechy strumieniowo z build_features_transaction_level_streaming, tabela cech całego pliku).
+    Kolejność wierszy out_path: kubełek po kubełku, w kubełku rosnąco po Transaction ID.
+
+    returns: liczba ocenionych transakcji
+    """
+    path = Path(path)
+    if n_buckets is None:
+        n_buckets = max(1, math.ceil(path.stat().st_size / SCORE_BUCKET_BYTES))
+    _write_scores_header(out_path)
+
+    if n_buckets == 1:
+        tx = build_features_transaction_level_streaming(path, chunksize=chunksize, encoder=artifact.encoder)
+        return _append_scores(artifact, FeatureMatrix.from_frame(tx, artifact.feature_columns, "Transaction ID"),
+                              out_path, batch_size)
+
+    n_scored = 0
+    with tempfile.TemporaryDirectory(prefix="score_buckets_", dir=tmp_dir) as tmp:
+        for files in _spill_buckets(path, Path(tmp), n_buckets, chunksize):
+            if not files:
+                continue
+            rows = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+            # duplikaty całych wierszy (zawsze w tym samym kubełku) usuwa build_features_transaction_level
+            tx = build_features_transaction_level(rows, encoder=artifact.encoder)
+            del rows
+            X = FeatureMatrix.from_frame(tx, artifact.feature_columns, index_col="Transaction ID")
+            n_scored += _append_scores(artifact, X, out_path, batch_size)
+    return n_scored
+
+
+def _spill_buckets(path: Path, tmp: Path, n_buckets: int, chunksize: int) -> list[list[Path]]:
+    """Rozkłada wiersze CSV na kubełki Transaction ID % n_buckets; zwraca pliki każdego kubełka."""
+    files: list[list[Path]] = [[] for _ in range(n_buckets)]
+    for i, chunk in enumerate(iter_csv_typed(path, chunksize=chunksize)):
+        bucket = chunk["Transaction ID"].to_numpy() % n_buckets
+        for b in np.unique(bucket):
+            part = tmp / f"b{b:05d}-{i:06d}.parquet"
+            chunk[bucket == b].to_parquet(part, index=False)
+            files[b].append(part)
+    return files
+
+
+def score_store(artifact: ModelArtifact, store: FeatureStore, out_path: Path, batch_size: int = 100_000) -> int:
+    """
+    Scoring magazynu cech (src/feature_store.py) bez przeliczania cech: partie to
+    widoki na memmap. Magazyn musi być zbudowany z tym samym encoderem co model.
+    """
+    if store.manifest["encoder_fingerprint"] != encoder_fingerprint(artifact.encoder):
+        raise ValueError(f"Magazyn {store.path} zbudowano innym FeatureEncoder niż model {artifact.meta.get('name')}")
+    X = store.X
+    if X.columns != artifact.feature_columns:
+        positions = [X.columns.index(c) for c in artifact.feature_columns]
+        X = FeatureMatrix(X.values[:, positions], artifact.feature_columns, X.index)
+    _write_scores_header(out_path)
+    return _append_scores(artifact, X, out_path, batch_size)
+
+
+def _write_scores_header(out_path: Path) -> None:
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(columns=["Transaction ID", "proba", "prediction"]).to_csv(out_path, index=False)
+
+
+def _append_scores(artifact: ModelArtifact, X: FeatureMatrix, out_path: Path, batch_size: int) -> int:
+    """Predykcje partiami po batch_size wierszy, dopisywane od razu do CSV."""
+    for start in range(0, len(X), batch_size):
+        batch = X[start:start + batch_size]
+        proba = artifact.predict_proba_matrix(batch)
+        pd.DataFrame({
+            "Transaction ID": batch.index,
+            "proba": proba,
+            "prediction": (proba >= artifact.threshold).astype(int),
+        }).to_csv(out_path, mode="a", header=False, index=False)
+
+    return len(X)
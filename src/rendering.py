@@ -0,0 +1,95 @@
+"""
+Renderowanie wykresów wsadowo: bez okien, równolegle, z pominięciem niezmienionych.
+
+Wykres = FigureJob(funkcja rysująca, argumenty, ścieżka PNG). Funkcje rysujące
+(src/model_viz.py, src/eda.py) dostają gotowe dane – predykcje z hold-outu,
+kolumny cech, macierz korelacji – więc nic nie jest liczone ani przewidywane
+drugi raz.
+
+render_figures:
+- renderuje w puli procesów joblib (jeden wykres = jedno zadanie); workery używają
+  backendu Agg (bez wyświetlania, działa na węzłach bez ekranu). Backend procesu
+  wywołującego nie jest zmieniany – import tego modułu (i eda / model_viz) nie psuje
+  okien ani backendu notebooka; przy n_jobs=1 wykresy rysowane są w procesie, tylko
+  zapisywane i zamykane (bez show),
+- liczy hash wejść każdego wykresu (joblib.hash: funkcja + argumenty) i pomija
+  wykres, jeśli plik istnieje, a hash w cache (config.RENDER_CACHE_PATH) się nie zmienił.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import joblib
+import matplotlib
+from joblib import Parallel, delayed
+
+from src.config import RENDER_CACHE_PATH
+from src.parallel import available_cores
+
+
+class FigureJob(NamedTuple):
+    """Jeden wykres: render(**kwargs, save_path=path)."""
+
+    render: Callable
+    kwargs: dict
+    path: Path
+
+
+def figure_hash(job: FigureJob) -> str:
+    """Hash wejść wykresu: nazwa funkcji rysującej + argumenty (tablice numpy hashowane po zawartości)."""
+    name = f"{job.render.__module__}.{job.render.__qualname__}"
+    return joblib.hash((name, job.kwargs))
+
+
+def _render(job: FigureJob, headless: bool = True) -> str:
+    # headless=True tylko w workerach puli – tam wymuszamy Agg; w procesie wywołującym backend zostaje
+    if headless:
+        matplotlib.use("Agg")
+    Path(job.path).parent.mkdir(parents=True, exist_ok=True)
+    job.render(**job.kwargs, save_path=job.path)
+    return str(job.path)
+
+
+def _load_cache(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def render_figures(
+    jobs: list[FigureJob],
+    n_jobs: int | None = None,
+    cache_path: Path | None = RENDER_CACHE_PATH,
+) -> dict:
+    """
+    Renderuje wykresy, których wejścia się zmieniły (albo których pliku brak).
+    n_jobs: procesy (None -> available_cores(), nie więcej niż wykresów do narysowania)
+    cache_path: plik z hashami wejść; None -> zawsze renderuj wszystko
+
+    returns: {"rendered": [ścieżki], "skipped": [ścieżki]}
+    """
+    cache = _load_cache(Path(cache_path)) if cache_path is not None else {}
+    hashes = {str(job.path): figure_hash(job) for job in jobs}
+    changed = [
+        cache.get(str(job.path)) != hashes[str(job.path)] or not Path(job.path).exists()
+        for job in jobs
+    ]
+    todo = [job for job, c in zip(jobs, changed) if c]
+    skipped = [str(job.path) for job, c in zip(jobs, changed) if not c]
+
+    n_jobs = min(len(todo), n_jobs or available_cores())
+    if n_jobs > 1:
+        rendered = Parallel(n_jobs=n_jobs)(delayed(_render)(job) for job in todo)
+    else:
+        rendered = [_render(job, headless=False) for job in todo]
+
+    if cache_path is not None:
+        cache.update({path: hashes[path] for path in rendered})
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+
+    return {"rendered": rendered, "skipped": skipped}
@@ -0,0 +1,219 @@
+"""
+Lokalny serwer HTTP (asyncio, bez zależności) przed OnlineScorer.
+
+- POST /score  body: {"items": [ {pozycja}, ... ]}  ->  {"proba": p, "prediction": 0/1}
+- GET  /stats  -> liczba żądań i latencja serwera p50/p99 [ms]
+
+Żądania trafiające w tym samym momencie są składane w mikro-partie (MicroBatcher):
+cechy liczone są per żądanie, a model wywoływany raz na partię (do max_batch
+zamówień albo po max_wait_ms od pierwszego żądania w partii; max_wait_ms=0 -> bez czekania,
+partia = żądania, które już czekają w kolejce).
+Połączenia keep-alive, więc klient nie płaci za TCP handshake przy każdym żądaniu.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+from src.online import OnlineScorer
+
+
+def latency_summary(latencies_s) -> dict:
+    """p50/p99/max w milisekundach dla listy czasów w sekundach."""
+    if len(latencies_s) == 0:
+        return {"n": 0}
+    ms = np.asarray(latencies_s, dtype=float) * 1000.0
+    return {
+        "n": int(len(ms)),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+class MicroBatcher:
+    """Kolejka wektorów cech; jeden worker wywołuje model raz na zebraną partię."""
+
+    def __init__(self, scorer: OnlineScorer, max_batch: int = 64, max_wait_ms: float = 0.0):
+        self.scorer = scorer
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.batch_sizes: deque = deque(maxlen=10_000)
+
+    async def submit(self, row: np.ndarray) -> float:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((row, future))
+        return await future
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            if self.max_wait_s <= 0:
+                # bez czekania: jeden obrót pętli zdarzeń i bierzemy to, co już czeka w kolejce
+                await asyncio.sleep(0)
+                while len(batch) < self.max_batch and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+            deadline = loop.time() + self.max_wait_s
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            rows = np.vstack([row for row, _ in batch])
+            try:
+                proba = self.scorer.predict_rows(rows)
+            except Exception as exc:  # błąd modelu zwracamy każdemu żądaniu z partii
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            for (_, future), p in zip(batch, proba):
+                future.set_result(float(p))
+            self.batch_sizes.append(len(batch))
+
+
+class ScoringServer:
+    """Minimalny serwer HTTP/1.1 (keep-alive) dla /score i /stats."""
+
+    def __init__(self, scorer: OnlineScorer, max_batch: int = 64, max_wait_ms: float = 0.0):
+        self.scorer = scorer
+        self.batcher = MicroBatcher(scorer, max_batch=max_batch, max_wait_ms=max_wait_ms)
+        self.latencies: deque = deque(maxlen=100_000)
+        self._server: asyncio.AbstractServer | None = None
+        self._batch_task: asyncio.Task | None = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> int:
+        """Startuje serwer i worker mikro-partii; zwraca faktyczny port (port=0 -> losowy wolny)."""
+        self._batch_task = asyncio.create_task(self.batcher.run())
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+        self._batch_task.cancel()
+
+    def stats(self) -> dict:
+        sizes = self.batcher.batch_sizes
+        return {
+            "latency": latency_summary(self.latencies),
+            "mean_batch": round(float(np.mean(sizes)), 2) if sizes else 0.0,
+        }
+
+    async def _score(self, body: bytes) -> tuple[int, dict]:
+        try:
+            payload = json.loads(body)
+            if not isinstance(payload, dict):
+                raise ValueError('Body musi być obiektem JSON {"items": [...]}')
+            items = payload["items"]
+            if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+                raise ValueError('"items" musi być listą obiektów (pozycji zamówienia)')
+            row = self.scorer.features(items)
+        except (ValueError, KeyError, TypeError) as exc:
+            return 400, {"error": str(exc)}
+        proba = await self.batcher.submit(row)
+        return 200, {"proba": proba, "prediction": int(proba >= self.scorer.threshold)}
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode("latin-1")
+            + data
+        )
+        await writer.drain()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader, request_line: bytes) -> tuple[str, str, dict, bytes]:
+        """Linia żądania, nagłówki i body; ValueError przy błędnej składni (-> 400 i zamknięcie połączenia)."""
+        parts = request_line.decode("latin-1").rstrip("\r\n").split(" ")
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise ValueError(f"Błędna linia żądania: {request_line[:100]!r}")
+        method, path, _ = parts
+
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            key, sep, value = line.decode("latin-1").partition(":")
+            if not sep:
+                raise ValueError(f"Błędny nagłówek: {line[:100]!r}")
+            headers[key.strip().lower()] = value.strip()
+
+        length = headers.get("content-length", "0")
+        if not length.isdigit():
+            raise ValueError(f"Błędny Content-Length: {length!r}")
+        return method, path, headers, await reader.readexactly(int(length))
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                t0 = time.perf_counter()
+                try:
+                    method, path, headers, body = await self._read_request(reader, request_line)
+                except ValueError as exc:
+                    # po błędnej ramce nie wiadomo, gdzie zaczyna się kolejne żądanie -> 400 i koniec połączenia
+                    await self._respond(writer, 400, {"error": str(exc)})
+                    break
+
+                if method == "POST" and path == "/score":
+                    status, payload = await self._score(body)
+                elif method == "GET" and path == "/stats":
+                    status, payload = 200, self.stats()
+                else:
+                    status, payload = 404, {"error": f"{method} {path}"}
+
+                await self._respond(writer, status, payload)
+                if path == "/score" and status == 200:
+                    self.latencies.append(time.perf_counter() - t0)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _client(host: str, port: int, bodies: list[bytes], latencies: list) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    for body in bodies:
+        t0 = time.perf_counter()
+        writer.write(
+            f"POST /score HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+        headers = {}
+        await reader.readline()
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        await reader.readexactly(int(headers["content-length"]))
+        latencies.append(time.perf_counter() - t0)
+    writer.close()
+
+
+async def load_test(host: str, port: int, orders: list[list[dict]], concurrency: int = 8) -> dict:
+    """
+    Generator ruchu: `concurrency` połączeń keep-alive wysyła zamówienia po kolei.
+    Zwraca latencję po stronie klienta (p50/p99) i przepustowość.
+    """
+    bodies = [json.dumps({"items": items}, default=str).encode("utf-8") for items in orders]
+    latencies: list[float] = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, bodies[i::concurrency], latencies) for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - t0
+    return {**latency_summary(latencies), "requests_per_s": round(len(latencies) / elapsed, 1)}
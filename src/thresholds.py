@@ -0,0 +1,107 @@
+"""
+Wybór progu decyzji (proba >= próg -> zwrot) zamiast domyślnego 0.5 z model.predict.
+
+threshold_sweep liczy macierz pomyłek dla WSZYSTKICH progów jednym przejściem:
+sortowanie wyników malejąco + sumy skumulowane etykiet (O(n log n), bez pętli
+po progach). select_threshold wybiera próg wg celu:
+
+- "f1"        – maksymalne F1,
+- "cost"      – minimalny koszt cost_fp * FP + cost_fn * FN (fałszywy alarm vs przeoczony zwrot),
+- "precision" – najwyższy recall przy precision >= target_precision.
+
+Próg wybieramy na predykcjach out-of-fold zbioru treningowego (FoldEngine.oof_predictions
+silnika zbudowanego tylko na wierszach train), nie na hold-oucie, i zapisujemy z modelem
+w rejestrze (meta.json "threshold"). Wybierany próg jest zawsze skończony: próg +inf
+(model nic nie przewiduje) nie jest kandydatem.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from src.config import (
+    THRESHOLD_COST_FN,
+    THRESHOLD_COST_FP,
+    THRESHOLD_OBJECTIVE,
+    THRESHOLD_TARGET_PRECISION,
+)
+
+OBJECTIVES = ("f1", "cost", "precision")
+
+
+def threshold_sweep(y_true, y_score) -> dict[str, np.ndarray]:
+    """
+    TP/FP/FN/TN, precision, recall i F1 dla każdego progu = różnej wartości y_score
+    (malejąco), poprzedzone progiem +inf (nic nie jest przewidywane jako zwrot).
+    """
+    y_true = np.asarray(y_true).astype(bool, copy=False)
+    y_score = np.asarray(y_score, dtype=np.float64)
+    order = np.argsort(y_score, kind="mergesort")[::-1]
+    score = y_score[order]
+
+    # ostatnia pozycja każdej grupy równych wyników: próg obejmuje całą grupę
+    last = np.flatnonzero(np.diff(score) != 0)
+    last = np.append(last, len(score) - 1)
+    tps = np.concatenate([[0], np.cumsum(y_true[order])[last]])
+    fps = np.concatenate([[0], last + 1]) - tps
+    thresholds = np.concatenate([[np.inf], score[last]])
+
+    n_pos = int(y_true.sum())
+    fns = n_pos - tps
+    tns = (len(y_true) - n_pos) - fps
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(tps + fps > 0, tps / (tps + fps), 1.0)
+        recall = tps / n_pos if n_pos else np.zeros(len(tps))
+        f1 = np.where(tps > 0, 2 * tps / (2 * tps + fps + fns), 0.0)
+    return {
+        "threshold": thresholds,
+        "tp": tps, "fp": fps, "fn": fns, "tn": tns,
+        "precision": precision, "recall": recall, "f1": f1,
+    }
+
+
+def select_threshold(
+    y_true,
+    y_score,
+    objective: str = THRESHOLD_OBJECTIVE,
+    cost_fp: float = THRESHOLD_COST_FP,
+    cost_fn: float = THRESHOLD_COST_FN,
+    target_precision: float = THRESHOLD_TARGET_PRECISION,
+) -> dict:
+    """
+    Najlepszy skończony próg wg objective (OBJECTIVES). Zwraca próg, cel i macierz pomyłek /
+    metryki w tym progu. Gdy żaden próg nie daje target_precision – próg o najwyższej precision
+    (target_met = False). Dla "cost" także cost_predict_none – koszt progu +inf (same FN);
+    cost > cost_predict_none oznacza, że przy tych kosztach model przegrywa z "nic nie zgłaszaj".
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Nieznany cel progu: {objective!r} (dostępne: {', '.join(OBJECTIVES)})")
+    sweep = threshold_sweep(y_true, y_score)
+    cost = cost_fp * sweep["fp"] + cost_fn * sweep["fn"]
+    # próg +inf (nic nie przewidujemy) nie jest kandydatem: w meta.json byłby niestandardowym
+    # Infinity, a model nie zgłaszałby żadnego zwrotu
+    candidates = slice(1, None)
+
+    extra = {}
+    if objective == "f1":
+        best = 1 + int(np.argmax(sweep["f1"][candidates]))
+    elif objective == "cost":
+        best = 1 + int(np.argmin(cost[candidates]))
+        extra = {"cost_fp": cost_fp, "cost_fn": cost_fn, "cost_predict_none": float(cost[0])}
+    else:
+        ok = np.flatnonzero(sweep["precision"][candidates] >= target_precision) + 1
+        if len(ok):
+            best = int(ok[np.argmax(sweep["recall"][ok])])
+        else:
+            best = 1 + int(np.argmax(sweep["precision"][candidates]))
+        extra = {"target_precision": target_precision, "target_met": bool(len(ok))}
+
+    return {
+        "objective": objective,
+        "threshold": float(sweep["threshold"][best]),
+        **extra,
+        "f1": float(sweep["f1"][best]),
+        "precision": float(sweep["precision"][best]),
+        "recall": float(sweep["recall"][best]),
+        "cost": float(cost[best]),
+        "cm": [[int(sweep["tn"][best]), int(sweep["fp"][best])], [int(sweep["fn"][best]), int(sweep["tp"][best])]],
+    }
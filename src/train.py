@@ -1,48 +1,116 @@
 from __future__ import annotations
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
 from sklearn.metrics import (
-    accuracy_score, roc_auc_score, f1_score,
+    accuracy_score, f1_score,
     precision_score, recall_score, confusion_matrix
 )
+import numpy as np
 import pandas as pd
 
+from src.metrics import roc_auc
+
+
+def _take_rows(X, idx):
+    return X.iloc[idx] if hasattr(X, "iloc") else X[idx]
+
+
+def undersample_indices(y, random_state: int | np.random.Generator = 42) -> np.ndarray:
+    """
+    Pozycje wierszy zbalansowanej próbki: wszystkie wiersze klasy mniejszościowej
+    (zwykle 1) + tyle samo losowych z większościowej, przemieszane.
+    Nie kopiuje X – tylko indeksy.
+    """
+    rng = np.random.default_rng(random_state)
+    y = np.asarray(y)
+    minority, majority = sorted([np.flatnonzero(y == 1), np.flatnonzero(y == 0)], key=len)
+
+    idx = np.concatenate([minority, rng.choice(majority, size=len(minority), replace=False)])
+    rng.shuffle(idx)
+    return idx
+
 
 def undersample_train(X: pd.DataFrame, y: pd.Series, random_state: int = 42):
     """
     Undersampling klasy większościowej (0) do liczebności klasy 1.
     Balansujemy TYLKO zbiór treningowy.
+
+    Wiersze wybieramy po pozycjach (undersample_indices) – powstaje tylko
+    jedna kopia zbalansowanej próbki, bez kopii całego X.
     """
-    df = X.copy()
-    df["__y__"] = y.values
+    idx = undersample_indices(y, random_state)
+    return _take_rows(X, idx), _take_rows(y, idx).astype(int)
 
-    df_pos = df[df["__y__"] == 1]
-    df_neg = df[df["__y__"] == 0]
 
-    n = len(df_pos)
-    df_neg_down = df_neg.sample(n=n, random_state=random_state)
+class BaggedUndersampleClassifier(ClassifierMixin, BaseEstimator):
+    """
+    K modeli, każdy na innej zbalansowanej próbce (undersample_indices),
+    predict_proba = średnia z modeli.
 
-    df_bal = pd.concat([df_pos, df_neg_down], axis=0).sample(frac=1.0, random_state=random_state)
+    Każdy model uczy się na 2 x liczebność klasy mniejszościowej (szybko jak zwykły
+    undersampling), a razem modele widzą K razy więcej wierszy większościowych niż jeden.
+    Próbka jest brana z X tylko na czas uczenia jednego modelu.
+    estimator=None -> XGBoost z src.models (scale_pos_weight=1.0: próbki są zbalansowane 1:1).
+    """
 
-    y_bal = df_bal["__y__"].astype(int)
-    X_bal = df_bal.drop(columns=["__y__"])
-    return X_bal, y_bal
+    def __init__(self, estimator=None, n_bags: int = 5, random_state: int = 42):
+        self.estimator = estimator
+        self.n_bags = n_bags
+        self.random_state = random_state
 
+    def fit(self, X, y):
+        estimator = self.estimator
+        if estimator is None:
+            from src.models import xgb_model  # src.models importuje ten moduł
 
-def train_and_evaluate(model, X_train, X_test, y_train, y_test):
-    # uczymy raz
-    model.fit(X_train, y_train)
+            estimator = xgb_model(scale_pos_weight=1.0)
+        rng = np.random.default_rng(self.random_state)
+        self.classes_ = np.unique(np.asarray(y))
+        self.estimators_ = []
+        for _ in range(self.n_bags):
+            idx = undersample_indices(y, rng)
+            self.estimators_.append(clone(estimator).fit(_take_rows(X, idx), _take_rows(y, idx)))
+        return self
 
-    # predykcje do metryk i wykresów
-    preds = model.predict(X_test)
-    proba = model.predict_proba(X_test)[:, 1]
+    def predict_proba(self, X):
+        return np.mean([est.predict_proba(X) for est in self.estimators_], axis=0)
 
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    @property
+    def feature_importances_(self):
+        return np.mean([est.feature_importances_ for est in self.estimators_], axis=0)
+
+
+def _classification_metrics(y_test, preds, proba) -> dict:
     return {
-        "model": model,
         "y_pred": preds,
         "y_proba": proba,
-        "roc_auc": roc_auc_score(y_test, proba),
+        "roc_auc": roc_auc(y_test, proba),
         "f1": f1_score(y_test, preds),
         "acc": accuracy_score(y_test, preds),
         "precision": precision_score(y_test, preds, zero_division=0),
         "recall": recall_score(y_test, preds, zero_division=0),
         "cm": confusion_matrix(y_test, preds).tolist()
     }
+
+
+def train_and_evaluate(model, X_train, X_test, y_train, y_test):
+    # uczymy raz
+    model.fit(X_train, y_train)
+
+    # predykcje do metryk i wykresów
+    preds = model.predict(X_test)
+    proba = model.predict_proba(X_test)[:, 1]
+
+    return {"model": model, **_classification_metrics(y_test, preds, proba)}
+
+
+def apply_threshold(result: dict, y_test, threshold: float) -> dict:
+    """
+    Wynik train_and_evaluate z klasami wg progu (proba >= threshold) zamiast model.predict;
+    bez ponownego uczenia i predykcji.
+    """
+    proba = result["y_proba"]
+    preds = (proba >= threshold).astype(int)
+    return {**result, **_classification_metrics(y_test, preds, proba), "threshold": float(threshold)}
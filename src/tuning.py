@@ -1,9 +1,159 @@
+from pathlib import Path
+
 import optuna
 import numpy as np
+from joblib import Parallel, delayed
 
-from sklearn.model_selection import StratifiedKFold, cross_val_score
+from sklearn.model_selection import StratifiedKFold
 from xgboost import XGBClassifier
 
+from src.config import XGB_ROUND_CUTOFFS
+from src.parallel import available_cores, shared_data, split_thread_budget
+from src.xgb_native import XGBFoldData, _take_rows, cutoff_aucs
+
+# Pliki traktowane jako SQLite; każda inna ścieżka -> JournalStorage (plik dziennika)
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+# Triale wliczane do limitu n_trials (także te z poprzednich, przerwanych uruchomień)
+_FINISHED_STATES = (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+
+# Nazwy pruner'ów akceptowane przez tune_xgb_optuna(pruner=...)
+PRUNERS = ("median", "hyperband", "successive_halving", "none")
+
+
+def make_pruner(pruner, n_folds: int, n_startup_trials: int = 5) -> optuna.pruners.BasePruner:
+    """
+    Pruner Optuny po nazwie (PRUNERS) albo gotowy obiekt BasePruner.
+    Krokiem (zasobem) jest numer foldu, więc max_resource = liczba foldów.
+    """
+    if isinstance(pruner, optuna.pruners.BasePruner):
+        return pruner
+    if pruner == "median":
+        return optuna.pruners.MedianPruner(n_startup_trials=n_startup_trials, n_warmup_steps=1)
+    if pruner == "hyperband":
+        return optuna.pruners.HyperbandPruner(min_resource=1, max_resource=n_folds, reduction_factor=3)
+    if pruner == "successive_halving":
+        return optuna.pruners.SuccessiveHalvingPruner(min_resource=1, reduction_factor=3)
+    if pruner in (None, "none"):
+        return optuna.pruners.NopPruner()
+    raise ValueError(f"Nieznany pruner: {pruner!r} (dostępne: {', '.join(PRUNERS)})")
+
+
+def make_storage(storage):
+    """
+    Trwały storage Optuny:
+    - None -> None (study w pamięci),
+    - URL z "://" (np. "sqlite:///tuning.db", "postgresql://...") -> przekazywany bez zmian,
+    - ścieżka *.db / *.sqlite / *.sqlite3 -> SQLite,
+    - inna ścieżka -> JournalStorage na pliku (bezpieczny dla wielu procesów, także na wspólnym dysku).
+    """
+    if storage is None or isinstance(storage, optuna.storages.BaseStorage):
+        return storage
+    if isinstance(storage, str) and "://" in storage:
+        return storage
+
+    path = Path(storage)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix in SQLITE_SUFFIXES:
+        return f"sqlite:///{path}"
+    return optuna.storages.JournalStorage(optuna.storages.journal.JournalFileBackend(str(path)))
+
+
+def _make_objective(X, y, folds, random_state, fit_jobs, scale_pos_weight, native, early_stopping_rounds, round_cutoffs):
+    fold_data = XGBFoldData(X, y, folds) if native else None
+
+    def objective(trial: optuna.Trial) -> float:
+        # Parametry do strojenia (sensowny, mały zakres); n_estimators nie jest losowane –
+        # uczymy max(round_cutoffs) rund i oceniamy każdą liczbę rund z siatki na tym samym modelu
+        params = {
+            "n_estimators": max(round_cutoffs),
+            "max_depth": trial.suggest_int("max_depth", 3, 10),
+            "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.2, log=True),
+            "subsample": trial.suggest_float("subsample", 0.6, 1.0),
+            "colsample_bytree": trial.suggest_float("colsample_bytree", 0.6, 1.0),
+            "min_child_weight": trial.suggest_int("min_child_weight", 1, 10),
+            "gamma": trial.suggest_float("gamma", 0.0, 5.0),
+            "reg_alpha": trial.suggest_float("reg_alpha", 0.0, 5.0),
+            "reg_lambda": trial.suggest_float("reg_lambda", 0.5, 5.0),
+        }
+
+        if native:
+            params.update({
+                "objective": "binary:logistic",
+                "eval_metric": "auc",
+                "random_state": random_state,
+                "n_jobs": fit_jobs,
+                "scale_pos_weight": scale_pos_weight,
+                "tree_method": "hist",
+            })
+        else:
+            model = XGBClassifier(
+                **params,
+                objective="binary:logistic",
+                eval_metric="auc",
+                random_state=random_state,
+                n_jobs=fit_jobs,
+                # ważne: dociążenie klasy + szybsze uczenie
+                scale_pos_weight=scale_pos_weight,
+                tree_method="hist",
+            )
+
+        # Foldy po kolei: po każdym raport średniego AUC najlepszej liczby rund,
+        # żeby pruner mógł uciąć słaby trial
+        scores = {c: [] for c in round_cutoffs}
+        rounds = []
+        for k, (train_idx, test_idx) in enumerate(folds):
+            if native:
+                aucs, n_rounds = fold_data.fold_cutoff_aucs(k, params, round_cutoffs, early_stopping_rounds)
+            else:
+                model.fit(_take_rows(X, train_idx), _take_rows(y, train_idx))
+                X_test = _take_rows(X, test_idx)
+                n_rounds = params["n_estimators"]
+                aucs = cutoff_aucs(
+                    lambda start, end: model.predict(X_test, output_margin=True, iteration_range=(start, end)),
+                    _take_rows(y, test_idx), round_cutoffs, n_rounds,
+                )
+            rounds.append(n_rounds)
+            for c, auc in aucs.items():
+                scores[c].append(auc)
+
+            best_cutoff = max(scores, key=lambda c: np.mean(scores[c]))
+            trial.report(float(np.mean(scores[best_cutoff])), step=k)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+
+        # przy early stoppingu fold mógł skończyć przed best_cutoff rund
+        trial.set_user_attr("n_estimators", int(round(np.mean([min(best_cutoff, r) for r in rounds]))))
+        return float(np.mean(scores[best_cutoff]))
+
+    return objective
+
+
+def _n_finished(study: optuna.Study) -> int:
+    return len(study.get_trials(deepcopy=False, states=_FINISHED_STATES))
+
+
+def _optimize_worker(study, storage, study_name, pruner, seed, n_trials, objective_args) -> None:
+    """
+    Jeden worker: dołącza do study (obiekt albo nazwa w storage) i bierze triale,
+    dopóki w całym study nie ma n_trials zakończonych (MaxTrialsCallback).
+    """
+    if study is None:
+        study = optuna.load_study(
+            study_name=study_name,
+            storage=make_storage(storage),
+            sampler=optuna.samplers.TPESampler(seed=seed),
+            pruner=pruner,
+        )
+
+    remaining = n_trials - _n_finished(study)
+    if remaining <= 0:
+        return
+    study.optimize(
+        _make_objective(*objective_args),
+        n_trials=remaining,
+        callbacks=[optuna.study.MaxTrialsCallback(n_trials, states=_FINISHED_STATES)],
+    )
+
 
 def tune_xgb_optuna(
     X,
@@ -11,65 +161,93 @@ def tune_xgb_optuna(
     n_trials: int = 10,
     random_state: int = 42,
     n_splits: int = 10,
-    n_jobs: int = -1,
+    n_jobs: int | None = None,
+    cv=None,
+    native: bool = False,
+    early_stopping_rounds: int | None = None,
+    pruner="median",
+    storage=None,
+    study_name: str = "xgb_tuning",
+    n_workers: int = 1,
+    data_mode: str | None = None,
+    round_cutoffs: tuple[int, ...] = XGB_ROUND_CUTOFFS,
 ) -> dict:
     """
     Strojenie hiperparametrów XGBoost za pomocą Optuny.
     Optymalizujemy ROC-AUC w 10-krotnej walidacji krzyżowej
 
+    cv: gotowe indeksy foldów (np. FoldEngine.folds); domyślnie nowy StratifiedKFold
+    native: True -> natywne xgb.train na macierzach foldów zbinowanych raz dla całego
+            strojenia (XGBFoldData) zamiast XGBClassifier
+    early_stopping_rounds: (tylko native) early stopping na VAL_SIZE wierszy train foldu
+            (walidacja foldu służy tylko do oceny); punkty siatki
+            powyżej najlepszej rundy foldu dostają AUC z najlepszej rundy
+    pruner: "median" | "hyperband" | "successive_halving" | "none" albo obiekt BasePruner;
+            foldy liczone są po kolei, po każdym raportujemy średnie AUC (trial.report)
+            i przerywamy słabe triale (optuna.TrialPruned)
+    storage: ścieżka SQLite (*.db) / pliku dziennika albo URL (patrz make_storage);
+            istniejące study o nazwie study_name jest wznawiane, a n_trials to łączna liczba
+            zakończonych triali w study (również z innych procesów i maszyn)
+    n_workers: liczba procesów pobierających triale z tego samego storage (wymaga storage);
+            n_jobs to łączny budżet wątków (None -> available_cores()), dzielony między
+            workery (split_thread_budget); foldy w trialu liczone są po kolei
+    data_mode: "memmap" | "pickle" (None -> config.CV_DATA_MODE); przy n_workers > 1
+            "memmap" zapisuje X/y raz do pliku i workery dostają memmap zamiast kopii
+    round_cutoffs: siatka n_estimators (domyślnie config.XGB_ROUND_CUTOFFS); trial uczy
+            max(round_cutoffs) rund raz na fold i liczy AUC po każdej liczbie rund
+            (iteration_range) – n_estimators w wyniku = najlepszy punkt siatki
+
     returns: best_params (dict): najlepsze parametry do XGBClassifier
     """
+    if n_workers > 1 and storage is None:
+        raise ValueError("n_workers > 1 wymaga trwałego storage (SQLite albo plik dziennika)")
 
     # Stratyfikowana walidacja krzyżowa
-    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    if cv is None:
+        cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    folds = list(cv.split(X, y) if hasattr(cv, "split") else cv)
 
     # Dociążenie klasy pozytywnej (ważne przy niezbalansowanych danych)
     pos = int((y == 1).sum())
     neg = int((y == 0).sum())
     scale_pos_weight = neg / max(pos, 1)
 
-    def objective(trial: optuna.Trial) -> float:
-        # Parametry do strojenia (sensowny, mały zakres)
-        params = {
-            "n_estimators": trial.suggest_int("n_estimators", 200, 800),
-            "max_depth": trial.suggest_int("max_depth", 3, 10),
-            "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.2, log=True),
-            "subsample": trial.suggest_float("subsample", 0.6, 1.0),
-            "colsample_bytree": trial.suggest_float("colsample_bytree", 0.6, 1.0),
-            "min_child_weight": trial.suggest_int("min_child_weight", 1, 10),
-            "gamma": trial.suggest_float("gamma", 0.0, 5.0),
-            "reg_alpha": trial.suggest_float("reg_alpha", 0.0, 5.0),
-            "reg_lambda": trial.suggest_float("reg_lambda", 0.5, 5.0),
-        }
-
-        model = XGBClassifier(
-            **params,
-            objective="binary:logistic",
-            eval_metric="auc",
-            random_state=random_state,
-            n_jobs=n_jobs,
-            # ważne: dociążenie klasy + szybsze uczenie
-            scale_pos_weight=scale_pos_weight,
-            tree_method="hist",
-        )
-
-        scores = cross_val_score(model, X, y, cv=cv, scoring="roc_auc", n_jobs=n_jobs)
-        return float(np.mean(scores))
+    fit_jobs = split_thread_budget(n_workers, n_jobs)
+    pruner = make_pruner(pruner, n_folds=len(folds))
 
-    sampler = optuna.samplers.TPESampler(seed=random_state)
-    pruner = optuna.pruners.MedianPruner(n_startup_trials=10)
+    study = optuna.create_study(
+        direction="maximize",
+        study_name=study_name,
+        storage=make_storage(storage),
+        sampler=optuna.samplers.TPESampler(seed=random_state),
+        pruner=pruner,
+        load_if_exists=True,
+    )
 
-    study = optuna.create_study(direction="maximize", sampler=sampler, pruner=pruner)
-    study.optimize(objective, n_trials=n_trials)
+    with shared_data(X, y, data_mode, n_jobs=n_workers) as (X_shared, y_shared):
+        objective_args = (
+            X_shared, y_shared, folds, random_state, fit_jobs, scale_pos_weight, native, early_stopping_rounds,
+            tuple(round_cutoffs),
+        )
+        if n_workers == 1:
+            _optimize_worker(study, storage, study_name, pruner, None, n_trials, objective_args)
+        else:
+            # Każdy worker ma własny seed samplera, żeby nie proponować tych samych parametrów
+            Parallel(n_jobs=n_workers)(
+                delayed(_optimize_worker)(None, storage, study_name, pruner, random_state + i, n_trials, objective_args)
+                for i in range(n_workers)
+            )
 
-    best_params = study.best_params
+    best_trial = study.best_trial
+    best_params = dict(best_trial.params)
+    best_params["n_estimators"] = best_trial.user_attrs.get("n_estimators", best_params.get("n_estimators"))
 
     # dopinamy parametry stałe
     best_params.update({
         "objective": "binary:logistic",
         "eval_metric": "auc",
         "random_state": random_state,
-        "n_jobs": n_jobs,
+        "n_jobs": available_cores() if n_jobs is None or n_jobs < 0 else n_jobs,
         "tree_method": "hist",
         "scale_pos_weight": scale_pos_weight,
     })
@@ -0,0 +1,214 @@
+"""
+Natywna ścieżka CV dla XGBoost (xgb.train zamiast XGBClassifier + cross_val_score).
+
+Kwantyle (progi histogramu) liczymy raz dla całego X, a macierze train/valid foldów
+(QuantileDMatrix z ref=pełna macierz) budujemy raz i trzymamy przez wszystkie
+triale Optuny – szkic kwantyli nie jest powtarzany dla każdego foldu każdego triala.
+QuantileDMatrix nie obsługuje slice(), więc "cięcie" po indeksach wierszy
+robimy przy budowie macierzy foldu.
+"""
+from __future__ import annotations
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+
+from src.config import RANDOM_STATE, VAL_SIZE
+from src.feature_matrix import FeatureMatrix
+from src.metrics import roc_auc
+
+# Parametry sklearn API -> nazwy natywne (reszta przechodzi bez zmian)
+_SKLEARN_TO_NATIVE = {
+    "random_state": "seed",
+    "n_jobs": "nthread",
+}
+# Parametry, które nie są parametrami boostera
+_NON_BOOSTER = {"n_estimators", "early_stopping_rounds", "missing", "enable_categorical"}
+
+
+def to_native_params(params: dict) -> tuple[dict, int]:
+    """Zamienia parametry XGBClassifier na (parametry xgb.train, liczba rund)."""
+    num_boost_round = int(params.get("n_estimators", 100))
+    native = {}
+    for k, v in params.items():
+        if k in _NON_BOOSTER or v is None:
+            continue
+        k = _SKLEARN_TO_NATIVE.get(k, k)
+        if k == "nthread" and v == -1:
+            continue  # natywnie brak nthread = wszystkie wątki
+        native[k] = v
+    native.setdefault("tree_method", "hist")
+    return native, num_boost_round
+
+
+def _take_rows(X, idx):
+    return X.iloc[idx] if hasattr(X, "iloc") else X[idx]
+
+
+class XGBFoldData:
+    """
+    Zbinowane macierze foldów dla natywnego treningu XGBoost.
+
+    - full: QuantileDMatrix całego X (źródło progów histogramu, liczone raz)
+    - fold k: train i valid jako QuantileDMatrix z ref=full (te same progi),
+      budowane leniwie i cache'owane
+    - early stopping: zbiór zatrzymania to stratyfikowane val_size wierszy TRAIN foldu
+      (jak EarlyStoppingXGBClassifier), a valid foldu służy tylko do oceny – inaczej
+      AUC foldu byłoby zawyżone przez wybór rundy na tych samych wierszach. Macierze
+      uczenia i zatrzymania nie są cache'owane: budowane przy każdym fit_fold (samo
+      binowanie wg progów full, bez szkicu kwantyli) i zwalniane po treningu
+
+    Pamięć cache: train + valid foldu to wszystkie wiersze X, więc po przejściu wszystkich
+    foldów ~n_folds x X w postaci zbinowanej (1 bajt na wartość przy max_bin <= 256, czyli
+    ~n_folds / 4 x tablica float32) + full. Bez early stoppingu train foldu jest potrzebny
+    w każdym trialu; z early stoppingiem cache'owany jest tylko valid (~1 x X łącznie).
+    clear() zwalnia cache.
+    """
+
+    def __init__(
+        self, X, y, folds: list, max_bin: int = 256, val_size: float = VAL_SIZE, random_state: int = RANDOM_STATE
+    ):
+        # FeatureMatrix -> jego tablica float32 bez kopii (QuantileDMatrix nie zna protokołu __array__)
+        self.feature_names = X.columns if isinstance(X, FeatureMatrix) else None
+        self.X = X.values if isinstance(X, FeatureMatrix) else X
+        self.y = np.asarray(y)
+        self.folds = list(folds)
+        self.max_bin = max_bin
+        self.val_size = val_size
+        self.random_state = random_state
+        self.full = xgb.QuantileDMatrix(self.X, label=self.y, max_bin=max_bin, feature_names=self.feature_names)
+        self._matrices: dict[tuple, xgb.QuantileDMatrix] = {}
+
+    @property
+    def n_folds(self) -> int:
+        return len(self.folds)
+
+    def _build(self, idx: np.ndarray, ref: xgb.QuantileDMatrix | None = None) -> xgb.QuantileDMatrix:
+        # ref=full daje progi całego X; zbiór ewaluacyjny xgb.train musi mieć ref=swój train (te same progi)
+        return xgb.QuantileDMatrix(
+            _take_rows(self.X, idx), label=self.y[idx], ref=self.full if ref is None else ref, max_bin=self.max_bin,
+            feature_names=self.feature_names,
+        )
+
+    def _matrix(self, key: tuple, idx: np.ndarray) -> xgb.QuantileDMatrix:
+        if key not in self._matrices:
+            self._matrices[key] = self._build(idx)
+        return self._matrices[key]
+
+    def clear(self) -> None:
+        """Zwalnia cache'owane macierze foldów (full zostaje – progi są potrzebne do kolejnych)."""
+        self._matrices.clear()
+
+    def fold(self, k: int) -> tuple[xgb.QuantileDMatrix, xgb.QuantileDMatrix]:
+        """(train, valid) foldu k."""
+        train_idx, test_idx = self.folds[k]
+        return self._matrix(("train", k), train_idx), self._matrix(("valid", k), test_idx)
+
+    def early_stopping_split(self, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Pozycje (uczenie, zatrzymanie) z wierszy train foldu k: stratyfikowane val_size na zatrzymanie."""
+        train_idx = self.folds[k][0]
+        fit_idx, stop_idx = train_test_split(
+            train_idx, test_size=self.val_size, stratify=self.y[train_idx], random_state=self.random_state,
+        )
+        return np.sort(fit_idx), np.sort(stop_idx)
+
+    def fit_fold(self, k: int, params: dict, early_stopping_rounds: int | None = None) -> tuple[xgb.Booster, int]:
+        """
+        Uczy booster na foldzie k (parametry w konwencji XGBClassifier).
+        Z early_stopping_rounds uczy na części train foldu i zatrzymuje się na reszcie
+        (early_stopping_split); valid foldu nie jest oglądany.
+        Zwraca (booster, liczba użytych rund: najlepsza runda przy early stoppingu).
+        """
+        native, num_boost_round = to_native_params(params)
+        if early_stopping_rounds:
+            fit_idx, stop_idx = self.early_stopping_split(k)
+            dtrain = self._build(fit_idx)
+            evals = [(self._build(stop_idx, ref=dtrain), "valid")]
+        else:
+            dtrain, evals = self.fold(k)[0], ()
+
+        booster = xgb.train(
+            native,
+            dtrain,
+            num_boost_round=num_boost_round,
+            evals=evals,
+            early_stopping_rounds=early_stopping_rounds,
+            verbose_eval=False,
+        )
+        n_rounds = booster.best_iteration + 1 if early_stopping_rounds else num_boost_round
+        return booster, n_rounds
+
+    def train_fold(self, k: int, params: dict, early_stopping_rounds: int | None = None):
+        """Jak fit_fold; zwraca (booster, prawdopodobieństwa na walidacji, liczba użytych rund)."""
+        booster, n_rounds = self.fit_fold(k, params, early_stopping_rounds)
+        proba = booster.predict(self._matrix(("valid", k), self.folds[k][1]), iteration_range=(0, n_rounds))
+        return booster, proba, n_rounds
+
+    def fold_auc(self, k: int, params: dict, early_stopping_rounds: int | None = None) -> tuple[float, int]:
+        """ROC-AUC na walidacji foldu k i liczba użytych rund."""
+        _, proba, n_rounds = self.train_fold(k, params, early_stopping_rounds)
+        return roc_auc(self.y[self.folds[k][1]], proba), n_rounds
+
+    def fold_cutoff_aucs(
+        self, k: int, params: dict, cutoffs, early_stopping_rounds: int | None = None
+    ) -> tuple[dict[int, float], int]:
+        """ROC-AUC walidacji foldu k po pierwszych c rundach dla każdego c z cutoffs – z jednego treningu."""
+        booster, n_rounds = self.fit_fold(k, params, early_stopping_rounds)
+        dvalid = self._matrix(("valid", k), self.folds[k][1])
+        aucs = cutoff_aucs(
+            lambda start, end: booster.predict(dvalid, output_margin=True, iteration_range=(start, end)),
+            self.y[self.folds[k][1]], cutoffs, n_rounds,
+        )
+        return aucs, n_rounds
+
+
+def cutoff_aucs(margin, y_true, cutoffs, n_rounds: int) -> dict[int, float]:
+    """
+    AUC po pierwszych c rundach (c z cutoffs, najwyżej n_rounds) jednego wytrenowanego boostera.
+    margin(start, end): surowe marginesy drzew start..end-1. Marginesy kolejnych odcinków są
+    sumowane, więc cała siatka kosztuje tyle co jedna predykcja n_rounds drzewami
+    (base_score dodawany w każdym odcinku przesuwa wszystkie wiersze o tę samą stałą – AUC bez zmian).
+    Marginesy nie są prawdopodobieństwami, więc AUC dokładne (sklearn) – histogram z src/metrics.py
+    wymaga wyników w [0, 1].
+    """
+    total, done, aucs = 0.0, 0, {}
+    for c in sorted(cutoffs):
+        end = min(int(c), n_rounds)
+        if end > done:
+            total = total + margin(done, end)
+            done = end
+        aucs[int(c)] = roc_auc(y_true, total)
+    return aucs
+
+
+def run_cv_xgb_native(
+    params: dict,
+    X=None,
+    y=None,
+    random_state: int = 42,
+    n_splits: int = 10,
+    fold_data: XGBFoldData | None = None,
+    early_stopping_rounds: int | None = None,
+) -> dict:
+    """
+    Odpowiednik run_cv dla XGBoost na natywnym API (te same metryki, próg 0.5).
+    Można podać gotowe fold_data, żeby nie binować danych ponownie.
+    """
+    if fold_data is None:
+        cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        fold_data = XGBFoldData(X, y, cv.split(X, y))
+
+    per_fold = {m: [] for m in ["roc_auc", "f1", "precision", "recall", "accuracy"]}
+    for k in range(fold_data.n_folds):
+        _, proba, _ = fold_data.train_fold(k, params, early_stopping_rounds)
+        y_true = fold_data.y[fold_data.folds[k][1]]
+        pred = (proba > 0.5).astype(int)
+
+        per_fold["roc_auc"].append(roc_auc(y_true, proba))
+        per_fold["f1"].append(f1_score(y_true, pred, zero_division=0))
+        per_fold["precision"].append(precision_score(y_true, pred, zero_division=0))
+        per_fold["recall"].append(recall_score(y_true, pred, zero_division=0))
+        per_fold["accuracy"].append(accuracy_score(y_true, pred))
+
+    return {m: {"mean": float(np.mean(v)), "std": float(np.std(v))} for m, v in per_fold.items()}
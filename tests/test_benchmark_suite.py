@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+from benchmarks.suite import compare, meta_mismatches, run
+from benchmarks.synthetic import generate_orders
+
+
+def test_suite_runs_all_stages_and_flags_regressions(tmp_path):
+    result = run([3000], stages=("load", "audit", "features", "fit", "score"), cv_folds=2, data_dir=tmp_path)
+    stages = [r["stage"] for r in result["results"]]
+    assert stages == ["load", "audit", "features", "fit", "score"]
+    assert all(r["seconds"] >= 0 for r in result["results"])
+    assert compare(result, result) == []
+
+    slower = {"meta": result["meta"], "results": [{**r, "seconds": r["seconds"] * 3 + 1.0} for r in result["results"]]}
+    regressions = compare(slower, result)
+    assert {r["stage"] for r in regressions} == set(stages)
+    assert all(r["metric"] == "seconds" for r in regressions)
+
+    other_host = {**slower, "meta": {**result["meta"], "cpu_count": 64, "n_trials": 10}}
+    assert meta_mismatches(other_host, result) == {
+        "n_trials": (result["meta"]["n_trials"], 10), "cpu_count": (result["meta"]["cpu_count"], 64),
+    }
+    with pytest.raises(ValueError):
+        compare(other_host, result)
+    assert len(compare(other_host, result, allow_meta_mismatch=True)) == len(regressions)
+
+
+def test_generator_chunk_does_not_depend_on_tx_offset():
+    base = generate_orders(2000, seed=3)
+    shifted = generate_orders(2000, seed=3, tx_offset=10**9)
+    assert (shifted["Transaction ID"] - base["Transaction ID"]).eq(10**9).all()
+    pd.testing.assert_frame_equal(shifted.drop(columns="Transaction ID"), base.drop(columns="Transaction ID"))
@@ -2,7 +2,9 @@ from pathlib import Path
 import pandas as pd
 import pytest
 
-from src.data_loader import load_data
+from src.data_loader import RAW_SCHEMA, ROW_HASH_COLUMN, cache_path_for, load_data
+from src.feature_engineering import build_features_transaction_level, build_features_transaction_level_streaming
+from src.preprocessing import preprocessing_pipeline
 
 
 def test_load_data_raises_when_missing(tmp_path: Path):
@@ -17,3 +19,79 @@ def test_load_data_reads_csv(tmp_path: Path):
     df = load_data(p)
     assert df.shape == (2, 2)
     assert list(df.columns) == ["a", "b"]
+
+
+def _raw_orders_csv(path: Path) -> Path:
+    pd.DataFrame({
+        "Date": ["01/01/2019", "01/01/2019", "02/01/2019", "03/01/2019"],
+        "Buyer ID": [7, 7, 8, 9],
+        "Transaction ID": [1, 1, 2, 3],
+        "Item ID": [111, 112, 222, 333],
+        "Item Code": ["ABC-001", "ABC-002", "XYZ-999", "C-1"],
+        "Category": ["A", "A", "B", "C"],
+        "Version": ["1", "1", "v2", "v3"],
+        "Purchased Item Count": [1, 1, 2, 1],
+        "Refunded Item Count": [0, 0, 0, -1],
+        "Final Quantity": [1, 1, 2, 0],
+        "Total Revenue": [100.0, 50.0, 200.0, 10.0],
+        "Price Reductions": [-10.0, 0.0, 0.0, 0.0],
+        "Sales Tax": [20.0, 10.0, 40.0, 2.0],
+        "Refunds": [0.0, 0.0, 0.0, -10.0],
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_load_data_typed_prunes_columns_and_uses_schema(tmp_path: Path):
+    p = _raw_orders_csv(tmp_path / "orders.csv")
+
+    df = load_data(p, typed=True, chunksize=2)
+    assert "Buyer ID" not in df.columns
+    assert set(df.columns) == set(RAW_SCHEMA) | {ROW_HASH_COLUMN}
+    assert len(df) == 4
+    # kategorie z różnych chunków są scalone
+    assert df["Category"].dtype == "category"
+    assert set(df["Category"].cat.categories) == {"A", "B", "C"}
+    assert df["Category"].tolist() == ["A", "A", "B", "C"]
+    assert df["Transaction ID"].tolist() == [1, 1, 2, 3]
+    assert df["Purchased Item Count"].dtype == "int32"
+    assert df["Total Revenue"].dtype == "float32"
+
+
+def test_load_data_cache_roundtrip(tmp_path: Path):
+    p = _raw_orders_csv(tmp_path / "orders.csv")
+    cache_dir = tmp_path / "cache"
+
+    first = load_data(p, typed=True, cache=True, cache_dir=cache_dir)
+    cached = cache_path_for(p, cache_dir)
+    assert cached.exists()
+
+    second = load_data(p, typed=True, cache=True, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_load_data_cache_requires_typed(tmp_path: Path):
+    p = _raw_orders_csv(tmp_path / "orders.csv")
+    with pytest.raises(ValueError):
+        load_data(p, cache=True)
+
+
+@pytest.mark.parametrize("with_item_code", [True, False])
+def test_typed_load_dedups_full_rows_like_untyped(tmp_path: Path, with_item_code: bool):
+    p = _raw_orders_csv(tmp_path / "orders.csv")
+    raw = pd.read_csv(p)
+    # wiersz 0 powtórzony dwa razy: raz identycznie (duplikat), raz z innym Buyer ID (nie duplikat)
+    raw = pd.concat([raw, raw.iloc[[0]], raw.iloc[[0]].assign(**{"Buyer ID": 99})], ignore_index=True)
+    if not with_item_code:
+        raw = raw.drop(columns=["Item Code"])
+    raw.to_csv(p, index=False)
+
+    untyped = build_features_transaction_level(preprocessing_pipeline(load_data(p))[0])
+    typed_df, report = preprocessing_pipeline(load_data(p, typed=True, chunksize=2))
+    typed = build_features_transaction_level(typed_df)
+    streamed = build_features_transaction_level_streaming(p, chunksize=2)
+
+    assert report["before"]["duplicate_rows"] == 1
+    assert ("ItemCodePrefix_freq_mean" in typed.columns) == with_item_code
+    assert typed.loc[typed["Transaction ID"] == 1, "TotalRevenue_sum"].item() == 250.0
+    pd.testing.assert_frame_equal(untyped, typed, check_dtype=False)
+    pd.testing.assert_frame_equal(typed, streamed, check_dtype=False)
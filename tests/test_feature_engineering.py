@@ -1,7 +1,20 @@
 import numpy as np
 import pandas as pd
-
-from src.feature_engineering import _frequency_encoding_map, build_features_transaction_level
+import pytest
+
+from benchmarks.bench_feature_aggregation import legacy_build_features_transaction_level
+from benchmarks.synthetic import generate_orders
+from src.data_loader import load_data
+from src.feature_engineering import (
+    FeatureEncoder,
+    _calendar_features,
+    _frequency_encoding_map,
+    _parse_dates,
+    build_features_transaction_level,
+    build_features_transaction_level_streaming,
+    detect_date_format,
+    transaction_targets,
+)
 
 
 def test_frequency_encoding_map_sums_to_1():
@@ -85,3 +98,125 @@ def test_time_features_created():
     tx = build_features_transaction_level(_toy_df())
     for col in ["Year", "Month", "DayOfWeek", "IsWeekend", "Quarter"]:
         assert col in tx.columns
+
+
+def _random_raw_df(n: int = 400, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    tx_ids = rng.integers(1, 60, size=n)
+    is_refund = rng.random(n) < 0.15
+    days = rng.integers(1, 28, size=n)
+    df = pd.DataFrame({
+        "Date": [f"{d:02d}/0{m}/2019" for d, m in zip(days, rng.integers(1, 9, size=n))],
+        "Transaction ID": tx_ids,
+        "Item ID": rng.integers(100, 130, size=n),
+        "Item Code": rng.choice(["ABC-1", "ABC-2", "XYZ-9", "Q-7"], size=n),
+        "Category": rng.choice(["A", "B", "C", None], size=n),
+        "Version": rng.choice(["1", "v2", "v3"], size=n),
+        "Purchased Item Count": np.where(is_refund, 0, rng.integers(1, 4, size=n)),
+        "Refunded Item Count": np.where(is_refund, -1, 0),
+        "Final Quantity": np.where(is_refund, -1, rng.integers(0, 4, size=n)),
+        "Total Revenue": np.where(is_refund, 0.0, rng.integers(0, 300, size=n).astype(float)),
+        "Price Reductions": -rng.integers(0, 20, size=n).astype(float),
+        "Sales Tax": rng.integers(0, 40, size=n).astype(float),
+        "Refunds": np.where(is_refund, -50.0, 0.0),
+    })
+    # duplikaty całych wierszy rozrzucone po różnych chunkach
+    return pd.concat([df, df.sample(40, random_state=seed)], ignore_index=True)
+
+
+@pytest.mark.parametrize("with_item_code", [True, False])
+def test_fused_aggregation_matches_per_column_reference(with_item_code):
+    df = generate_orders(20_000, seed=7)
+    # braki w kategoriach i transakcje złożone tylko z wierszy zwrotu
+    df.loc[df.index[::97], "Category"] = None
+    df.loc[df["Transaction ID"] % 50 == 0, "Purchased Item Count"] = 0
+    if not with_item_code:
+        df = df.drop(columns=["Item Code"])
+
+    fused = build_features_transaction_level(df)
+    legacy = legacy_build_features_transaction_level(df)
+    pd.testing.assert_frame_equal(fused, legacy, check_exact=False, rtol=1e-9)
+
+def test_streaming_builder_matches_in_memory(tmp_path):
+    p = tmp_path / "orders.csv"
+    _random_raw_df().to_csv(p, index=False)
+
+    expected = build_features_transaction_level(load_data(p, typed=True))
+    streamed = build_features_transaction_level_streaming(p, chunksize=37, compact_every=3)
+
+    pd.testing.assert_frame_equal(streamed, expected, check_exact=False, rtol=1e-5)
+
+
+def test_feature_encoder_matches_frequency_map_and_handles_unseen():
+    df = _toy_df()
+    enc = FeatureEncoder().fit(df)
+
+    # tylko wiersze zakupowe: A i B po 1/2
+    out = enc.transform_column("Category", pd.Series(["A", "B", "Z", None]))
+    np.testing.assert_allclose(out, [0.5, 0.5, 0.0, 0.0])
+    assert set(enc.columns) == {"Category", "Version", "ItemCodePrefix"}
+
+
+def test_feature_encoder_save_load_roundtrip(tmp_path):
+    enc = FeatureEncoder().fit(_random_raw_df())
+    enc.save(tmp_path / "encoder.json")
+    loaded = FeatureEncoder.load(tmp_path / "encoder.json")
+
+    values = pd.Series(["A", "C", "B", None])
+    np.testing.assert_array_equal(
+        loaded.transform_column("Category", values), enc.transform_column("Category", values)
+    )
+
+
+def test_build_features_uses_fitted_encoder():
+    df = _random_raw_df()
+    train = df[df["Transaction ID"] < 30]
+    enc = FeatureEncoder().fit(train)
+
+    tx_enc = build_features_transaction_level(df, encoder=enc)
+    tx_default = build_features_transaction_level(df)
+
+    # te same transakcje i target, inne częstości (uczone tylko na train)
+    pd.testing.assert_series_equal(tx_enc["Returned"], tx_default["Returned"])
+    assert not np.allclose(tx_enc["Category_freq_mean"], tx_default["Category_freq_mean"])
+
+
+def test_streaming_builder_with_encoder_matches_in_memory(tmp_path):
+    p = tmp_path / "orders.csv"
+    _random_raw_df(seed=1).to_csv(p, index=False)
+    df = load_data(p, typed=True)
+    enc = FeatureEncoder().fit(df[df["Transaction ID"] < 30])
+
+    expected = build_features_transaction_level(df, encoder=enc)
+    streamed = build_features_transaction_level_streaming(p, chunksize=50, encoder=enc)
+
+    pd.testing.assert_frame_equal(streamed, expected, check_exact=False, rtol=1e-5)
+
+
+def test_transaction_targets_match_built_features():
+    df = _random_raw_df()
+    tx = build_features_transaction_level(df)
+    targets = transaction_targets(df)
+
+    assert targets.index.tolist() == tx["Transaction ID"].tolist()
+    assert targets.tolist() == tx["Returned"].tolist()
+
+
+def test_detect_date_format_day_first():
+    assert detect_date_format(pd.Series(["01/02/2019", "13/02/2019", None])) == "%d/%m/%Y"
+    assert detect_date_format(pd.Series(["2019-02-13"])) == "%Y-%m-%d"
+    assert detect_date_format(pd.Series(["not a date"])) is None
+
+
+def test_parse_dates_matches_pandas_inference_and_calendar_features():
+    dates = pd.Series(["05/01/2019", "06/01/2019", None, "05/01/2019", "bad"])
+    parsed = _parse_dates(dates)
+    expected = pd.to_datetime(dates, errors="coerce", dayfirst=True, format="mixed")
+    pd.testing.assert_series_equal(parsed, expected)
+
+    cal = _calendar_features(parsed)
+    # 05/01/2019 to sobota
+    assert cal["DayOfWeek"].tolist() == [5, 6, 0, 5, 0]
+    assert cal["IsWeekend"].tolist() == [1, 1, 0, 1, 0]
+    assert cal["Year"].tolist() == [2019, 2019, 0, 2019, 0]
+    assert cal["Quarter"].tolist() == [1, 1, 0, 1, 0]
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.feature_matrix import FeatureMatrix
+from src.models import baseline_model, logreg_model, xgb_model
+from src.xgb_native import run_cv_xgb_native
+
+
+def _tx(n: int = 120, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Transaction ID": np.arange(n) + 1000,
+        "Month": rng.integers(1, 13, size=n),
+        "IsWeekend": rng.integers(0, 2, size=n),
+        "TotalRevenue_sum": rng.gamma(2.0, 30.0, size=n),
+        "Returned": rng.integers(0, 2, size=n),
+    })
+
+
+def test_from_frame_is_compact_float32_and_zero_copy():
+    tx = _tx()
+    fm = FeatureMatrix.from_frame(tx, ["Month", "IsWeekend", "TotalRevenue_sum"], index_col="Transaction ID")
+
+    assert fm.values.dtype == np.float32 and fm.values.flags.c_contiguous
+    assert fm.shape == (len(tx), 3)
+    assert np.shares_memory(np.asarray(fm), fm.values)
+    np.testing.assert_array_equal(fm.column("Month"), tx["Month"].to_numpy(dtype=np.float32))
+    np.testing.assert_array_equal(fm.index, tx["Transaction ID"].to_numpy())
+
+    part = fm[np.array([3, 1])]
+    assert isinstance(part, FeatureMatrix)
+    np.testing.assert_array_equal(part.index, [1003, 1001])
+    pd.testing.assert_frame_equal(part.to_frame(), fm.to_frame().iloc[[3, 1]])
+
+    with pytest.raises(ValueError):
+        FeatureMatrix(np.zeros((2, 2)), ["a"])
+
+
+def test_models_and_native_cv_accept_feature_matrix():
+    tx = _tx()
+    fm = FeatureMatrix.from_frame(tx.drop(columns=["Returned"]), index_col="Transaction ID")
+    y = tx["Returned"]
+
+    for model in [xgb_model(override_params={"n_estimators": 5}, n_jobs=1), baseline_model(n_jobs=1), logreg_model()]:
+        proba = model.fit(fm, y).predict_proba(fm[:10])[:, 1]
+        assert proba.shape == (10,)
+
+    res = run_cv_xgb_native({"n_estimators": 5, "max_depth": 2}, fm, y, n_splits=3)
+    assert 0.0 <= res["roc_auc"]["mean"] <= 1.0
@@ -0,0 +1,113 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.feature_engineering import FeatureEncoder, build_features_transaction_level
+from src.feature_store import (
+    MANIFEST_FILE,
+    find_feature_store,
+    ingestion_settings,
+    load_or_build_feature_store,
+    open_feature_store,
+)
+from src.models import xgb_model
+from src.registry import load_artifact, save_artifact, score_store
+
+
+def _raw_orders(n: int = 300, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    is_refund = rng.random(n) < 0.2
+    return pd.DataFrame({
+        "Date": [f"{d:02d}/03/2019" for d in rng.integers(1, 28, size=n)],
+        "Transaction ID": rng.integers(1, 80, size=n),
+        "Item ID": rng.integers(100, 130, size=n),
+        "Item Code": rng.choice(["ABC-1", "ABC-2", "XYZ-9"], size=n),
+        "Category": rng.choice(["A", "B", "C"], size=n),
+        "Version": rng.choice(["1", "v2"], size=n),
+        "Purchased Item Count": np.where(is_refund, 0, rng.integers(1, 4, size=n)),
+        "Refunded Item Count": np.where(is_refund, -1, 0),
+        "Final Quantity": np.where(is_refund, -1, rng.integers(1, 4, size=n)),
+        "Total Revenue": np.where(is_refund, 0.0, rng.integers(1, 300, size=n).astype(float)),
+        "Price Reductions": -rng.integers(0, 20, size=n).astype(float),
+        "Sales Tax": rng.integers(0, 40, size=n).astype(float),
+        "Refunds": np.where(is_refund, -50.0, 0.0),
+    })
+
+
+def test_feature_store_roundtrip_is_memory_mapped(tmp_path):
+    df = _raw_orders()
+    encoder = FeatureEncoder().fit(df)
+    expected = build_features_transaction_level(df, encoder=encoder)
+
+    store = load_or_build_feature_store(df, encoder, "abc123", root=tmp_path)
+    assert isinstance(store.X.values, np.memmap)
+    assert store.manifest["n_rows"] == len(expected)
+    pd.testing.assert_frame_equal(
+        store.to_frame(), expected, check_dtype=False, check_exact=False, rtol=1e-6
+    )
+
+    # drugi raz: ten sam katalog, bez przebudowy
+    mtime = (store.path / MANIFEST_FILE).stat().st_mtime_ns
+    again = load_or_build_feature_store(df, encoder, "abc123", root=tmp_path)
+    assert again.path == store.path
+    assert (again.path / MANIFEST_FILE).stat().st_mtime_ns == mtime
+    assert find_feature_store("abc123", root=tmp_path) == store.path
+    assert find_feature_store("other", root=tmp_path) is None
+
+
+def test_find_feature_store_filters_by_manifest_meta(tmp_path):
+    df = _raw_orders()
+    split = {"encoder_fit": "train", "random_state": 42}
+    all_rows = load_or_build_feature_store(df, FeatureEncoder().fit(df), "abc123", root=tmp_path)
+    train = load_or_build_feature_store(df, FeatureEncoder().fit(df.iloc[:3]), "abc123", root=tmp_path, meta=split)
+
+    assert train.path != all_rows.path and train.manifest["meta"] == split
+    assert find_feature_store("abc123", root=tmp_path, meta=split) == train.path
+    assert find_feature_store("abc123", root=tmp_path, meta={**split, "random_state": 0}) is None
+
+
+def test_feature_store_key_includes_ingestion_settings(tmp_path, monkeypatch):
+    df = _raw_orders()
+    encoder = FeatureEncoder().fit(df)
+    default = load_or_build_feature_store(df, encoder, "abc123", root=tmp_path)
+    assert default.manifest["ingestion"] == ingestion_settings()
+
+    monkeypatch.setattr("src.feature_store.DATE_FORMAT", "%d/%m/%Y")
+    assert find_feature_store("abc123", root=tmp_path) is None
+    dated = load_or_build_feature_store(df, encoder, "abc123", root=tmp_path)
+    assert dated.path != default.path and dated.manifest["ingestion"]["date_format"] == "%d/%m/%Y"
+
+    monkeypatch.setattr("src.feature_store.TYPED_INGESTION", False)
+    assert find_feature_store("abc123", root=tmp_path) is None
+
+
+def test_feature_store_rejects_other_feature_version(tmp_path):
+    df = _raw_orders()
+    store = load_or_build_feature_store(df, FeatureEncoder().fit(df), "abc123", root=tmp_path)
+
+    manifest = json.loads((store.path / MANIFEST_FILE).read_text(encoding="utf-8"))
+    manifest["feature_version"] = -1
+    (store.path / MANIFEST_FILE).write_text(json.dumps(manifest), encoding="utf-8")
+    with pytest.raises(ValueError):
+        open_feature_store(store.path)
+
+
+def test_score_store_matches_model_predictions(tmp_path):
+    df = _raw_orders()
+    encoder = FeatureEncoder().fit(df)
+    store = load_or_build_feature_store(df, encoder, "abc123", root=tmp_path / "store")
+
+    model = xgb_model(override_params={"n_estimators": 10}, n_jobs=1).fit(store.X, store.target())
+    save_artifact(model, "xgb", store.columns, encoder, root=tmp_path / "registry")
+
+    out = tmp_path / "scores.csv"
+    n = score_store(load_artifact("xgb", root=tmp_path / "registry"), store, out, batch_size=9)
+    scores = pd.read_csv(out)
+    assert n == len(scores) == store.manifest["n_rows"]
+    np.testing.assert_allclose(scores["proba"], model.predict_proba(store.X)[:, 1], rtol=1e-5)
+
+    with pytest.raises(ValueError):
+        other = load_or_build_feature_store(df, FeatureEncoder().fit(df.iloc[:50]), "abc123", root=tmp_path / "store")
+        score_store(load_artifact("xgb", root=tmp_path / "registry"), other, out)
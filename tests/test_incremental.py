@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from src.feature_engineering import FeatureEncoder, build_features_transaction_level
+from src.incremental import HISTORY_DIR, TRANSACTIONS_DIR, incremental_update, initialize_state, load_state_features
+
+
+def _orders(tx_ids, refund=False, day=1):
+    n = len(tx_ids)
+    return pd.DataFrame({
+        "Transaction ID": tx_ids,
+        "Item ID": np.arange(n) % 3 + 100,
+        "Date": [f"{day:02d}/02/2019"] * n,
+        "Category": np.array(["A", "B", "C"])[np.arange(n) % 3],
+        "Version": ["1"] * n,
+        "Item Code": ["ABC-1"] * n,
+        "Purchased Item Count": [0 if refund else 1] * n,
+        "Refunded Item Count": [-1 if refund else 0] * n,
+        "Final Quantity": [-1 if refund else 1] * n,
+        "Total Revenue": [0.0 if refund else 10.0] * n,
+        "Price Reductions": [0.0] * n,
+        "Sales Tax": [2.0] * n,
+        "Refunds": [-10.0 if refund else 0.0] * n,
+    })
+
+
+def test_incremental_update_matches_full_rebuild(tmp_path):
+    day1 = _orders([1, 1, 2, 3])
+    # dzień 2: nowa transakcja, dopisana pozycja do tx=2 i późny zwrot dla tx=1
+    day2 = pd.concat([_orders([4, 2], day=2), _orders([1], refund=True, day=2)], ignore_index=True)
+
+    encoder = FeatureEncoder().fit(day1)
+    initialize_state(day1, tmp_path, encoder=encoder, partition_size=2)
+    updated = incremental_update(day2, tmp_path)
+
+    full = build_features_transaction_level(pd.concat([day1, day2], ignore_index=True), encoder=encoder)
+    pd.testing.assert_frame_equal(updated, full.loc[[1, 2, 4]])
+    pd.testing.assert_frame_equal(load_state_features(tmp_path), full)
+
+    returned = dict(zip(updated["Transaction ID"], updated["Returned"]))
+    assert returned[1] == 1
+
+
+def test_incremental_update_is_idempotent_for_repeated_delivery(tmp_path):
+    day1 = _orders([1, 2])
+    day2 = _orders([2, 3], day=3)
+
+    initialize_state(day1, tmp_path)
+    once = incremental_update(day2, tmp_path)
+    twice = incremental_update(day2.iloc[::-1], tmp_path)
+
+    pd.testing.assert_frame_equal(once, twice)
+    # powtórzona dostawa nie dopisuje drugiej części historii
+    assert len(list((tmp_path / HISTORY_DIR).rglob("*.parquet"))) == 2
+
+
+def test_incremental_update_rewrites_only_touched_partitions(tmp_path):
+    initialize_state(_orders([1, 2, 11, 12, 21]), tmp_path, partition_size=10)
+    untouched = {f: f.stat().st_mtime_ns for f in (tmp_path / TRANSACTIONS_DIR).glob("*.parquet")}
+    assert len(untouched) == 3
+
+    incremental_update(_orders([22, 23], day=2), tmp_path)
+    rewritten = [f.name for f, t in untouched.items() if f.stat().st_mtime_ns != t]
+    assert rewritten == ["p-000002.parquet"]
+    assert load_state_features(tmp_path)["Transaction ID"].tolist() == [1, 2, 11, 12, 21, 22, 23]
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import average_precision_score, roc_auc_score
+
+from src.metrics import ScoreHistogram, histogram_from_csv, roc_auc, score_histogram
+
+
+def _scores(n, seed=0):
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n) < 0.2).astype(int)
+    return y, np.clip(rng.normal(0.35 + 0.25 * y, 0.2), 0, 1)
+
+
+def test_binned_metrics_match_exact_and_merge_across_chunks():
+    y, s = _scores(200_000)
+    binned = ScoreHistogram().update(y, s)
+    assert binned.roc_auc() == pytest.approx(roc_auc_score(y, s), abs=1e-4)
+    assert binned.average_precision() == pytest.approx(average_precision_score(y, s), abs=1e-3)
+
+    merged = ScoreHistogram.from_chunks((y[i:i + 30_000], s[i:i + 30_000]) for i in range(0, len(y), 30_000))
+    assert merged.roc_auc() == binned.roc_auc()
+    assert merged.n_rows == len(y)
+
+    exact = score_histogram(y[:1000], s[:1000], exact=True).merge(score_histogram(y[1000:2000], s[1000:2000], exact=True))
+    assert exact.roc_auc() == pytest.approx(roc_auc_score(y[:2000], s[:2000]))
+    assert roc_auc(y, s, exact=False) == binned.roc_auc()
+
+
+def test_roc_auc_exact_by_default_and_logs_approximation(caplog):
+    # niezbalansowane dane, wyniki skupione poniżej 0.0005 -> wszystko w pięciu przedziałach
+    rng = np.random.default_rng(3)
+    y = (rng.random(50_000) < 0.02).astype(int)
+    s = rng.random(50_000) * 0.0005 * (1 + 0.3 * y) / 1.3
+
+    with caplog.at_level("WARNING", logger="src.metrics"):
+        assert roc_auc(y, s) == roc_auc_score(y, s)
+        assert not caplog.records
+        approx = roc_auc(y, s, exact=False)
+    assert "histogramu" in caplog.text
+    assert abs(approx - roc_auc_score(y, s)) > 20 / 10_000  # >> 1 / METRIC_BINS
+
+
+def test_histogram_rejects_scores_outside_unit_interval():
+    hist = ScoreHistogram()
+    for bad in ([0.2, 1.5], [-0.1, 0.5], [0.3, np.nan], [np.inf, 0.1]):
+        with pytest.raises(ValueError):
+            hist.update([0, 1], bad)
+    assert hist.n_rows == 0
+    hist.update([0, 1], [0.0, 1.0])
+    assert hist.roc_auc() == 1.0
+
+
+def test_curves_are_downsampled_and_monotone():
+    y, s = _scores(100_000, seed=1)
+    for exact in (True, False):
+        hist = score_histogram(y, s, exact=exact)
+        fpr, tpr, thresholds = hist.roc_curve(max_points=100)
+        assert len(fpr) <= 102
+        assert (fpr[0], tpr[0], fpr[-1], tpr[-1]) == (0.0, 0.0, 1.0, 1.0)
+        assert np.all(np.diff(fpr) >= 0) and np.all(np.diff(thresholds) <= 0)
+
+        recall, precision, _ = hist.pr_curve(max_points=100)
+        assert len(recall) <= 102 and recall[-1] == 1.0 and np.all(np.diff(recall) >= 0)
+
+
+def test_histogram_from_csv_streams_chunks(tmp_path):
+    y, s = _scores(5_000, seed=2)
+    path = tmp_path / "scores.csv"
+    pd.DataFrame({"Transaction ID": np.arange(len(y)), "proba": s, "Returned": y}).to_csv(path, index=False)
+
+    hist = histogram_from_csv(path, chunksize=700)
+    assert hist.n_rows == len(y)
+    assert hist.roc_auc() == ScoreHistogram().update(y, s).roc_auc()
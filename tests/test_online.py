@@ -0,0 +1,137 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import load_data
+from src.feature_engineering import FeatureEncoder, build_features_transaction_level
+from src.feature_matrix import FeatureMatrix
+from src.models import xgb_model
+from src.online import OnlineScorer
+from src.registry import ModelArtifact
+from src.serving import ScoringServer, load_test
+
+
+def _raw_orders(n: int = 400, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    is_refund = rng.random(n) < 0.2
+    df = pd.DataFrame({
+        "Date": [f"{d:02d}/0{m}/2019" for d, m in zip(rng.integers(1, 28, size=n), rng.integers(1, 9, size=n))],
+        "Transaction ID": rng.integers(1, 80, size=n),
+        "Item ID": rng.integers(100, 130, size=n),
+        "Item Code": rng.choice(["ABC-1", "ABC-2", "XYZ-9", "NEW-1"], size=n),
+        "Category": rng.choice(["A", "B", "C", None], size=n),
+        "Version": rng.choice(["1", "v2", "v9"], size=n),
+        "Purchased Item Count": np.where(is_refund, 0, rng.integers(1, 4, size=n)),
+        "Refunded Item Count": np.where(is_refund, -1, 0),
+        "Final Quantity": np.where(is_refund, -1, rng.integers(0, 4, size=n)),
+        "Total Revenue": np.where(is_refund, 0.0, rng.integers(0, 300, size=n).astype(float)),
+        "Price Reductions": -rng.integers(0, 20, size=n).astype(float),
+        "Sales Tax": rng.integers(0, 40, size=n).astype(float),
+        "Refunds": np.where(is_refund, -50.0, 0.0),
+    })
+    return pd.concat([df, df.sample(30, random_state=seed)], ignore_index=True)
+
+
+def _scorer():
+    train = _raw_orders(seed=0)
+    # encoder uczony na innych danych niż scoring -> w scoringu są też nieznane wartości
+    encoder = FeatureEncoder().fit(train[train["Version"] != "v9"])
+    tx = build_features_transaction_level(train, encoder=encoder)
+    X = tx.drop(columns=["Returned", "Transaction ID"])
+    model = xgb_model(override_params={"n_estimators": 20}, n_jobs=1).fit(X, tx["Returned"])
+    return OnlineScorer(ModelArtifact(model, list(X.columns), encoder))
+
+
+def test_online_features_match_batch_features():
+    scorer = _scorer()
+    raw = _raw_orders(seed=1)
+    expected = build_features_transaction_level(raw, encoder=scorer.artifact.encoder).set_index("Transaction ID")
+
+    for tx_id, group in raw.groupby("Transaction ID"):
+        items = group.astype(object).where(group.notna(), None).to_dict("records")
+        if tx_id not in expected.index:
+            continue
+        row = scorer.features(items)
+        np.testing.assert_allclose(row, expected.loc[tx_id, scorer.feature_columns].to_numpy(dtype=np.float32), rtol=1e-6)
+
+        batch_proba = scorer.artifact.predict_proba(expected.loc[[tx_id]])
+        assert abs(scorer.score(items) - float(batch_proba[0])) < 1e-6
+
+
+def test_online_features_match_typed_batch_features(tmp_path):
+    scorer = _scorer()
+    scorer.date_format = "%d/%m/%Y"
+    raw = _raw_orders(seed=3)
+    raw["Total Revenue"] += 0.01  # kwoty niereprezentowalne dokładnie w float32
+    raw.loc[raw.index[:5], "Date"] = "2019-03-05"  # inny format -> NaT w obu ścieżkach
+    path = tmp_path / "orders.csv"
+    raw.to_csv(path, index=False)
+
+    typed = load_data(path, typed=True)
+    tx = build_features_transaction_level(typed, encoder=scorer.artifact.encoder, date_format="%d/%m/%Y")
+    expected = FeatureMatrix.from_frame(tx, scorer.feature_columns, index_col="Transaction ID")
+    row_of = {tx_id: i for i, tx_id in enumerate(expected.index)}
+
+    # zamówienia jak z JSON-a: Version liczbą, gdy wygląda na liczbę
+    orders = raw.astype(object).where(raw.notna(), None)
+    orders["Version"] = [int(v) if str(v).isdigit() else v for v in orders["Version"]]
+    for tx_id, group in orders.groupby("Transaction ID"):
+        if tx_id in row_of:
+            np.testing.assert_allclose(scorer.features(group.to_dict("records")), expected.values[row_of[tx_id]], rtol=1e-6)
+
+
+def test_scoring_server_micro_batches_requests():
+    scorer = _scorer()
+    raw = _raw_orders(seed=2)
+    orders = [
+        g.astype(object).where(g.notna(), None).to_dict("records")
+        for _, g in raw[raw["Purchased Item Count"] > 0].groupby("Transaction ID")
+    ]
+
+    async def run():
+        server = ScoringServer(scorer)
+        port = await server.start("127.0.0.1", 0)
+        try:
+            client = await load_test("127.0.0.1", port, orders, concurrency=4)
+            return client, server.stats()
+        finally:
+            await server.stop()
+
+    client, stats = asyncio.run(run())
+    assert client["n"] == len(orders)
+    assert stats["latency"]["n"] == len(orders)
+    assert "p99_ms" in stats["latency"]
+
+
+def test_scoring_server_answers_400_to_malformed_requests():
+    scorer = _scorer()
+
+    async def send(port: int, raw: bytes) -> bytes:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    def post(body: bytes) -> bytes:
+        return b"POST /score HTTP/1.1\r\nContent-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(body), body)
+
+    async def run():
+        server = ScoringServer(scorer)
+        port = await server.start("127.0.0.1", 0)
+        try:
+            return [await send(port, raw) for raw in (
+                b"GARBAGE\r\n\r\n",
+                b"POST /score HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+                post(b'{"items": [1]}'),
+                post(b"[1, 2]"),
+                post(b"not json"),
+            )]
+        finally:
+            await server.stop()
+
+    for response in asyncio.run(run()):
+        assert response.startswith(b"HTTP/1.1 400")
+        assert b'"error"' in response
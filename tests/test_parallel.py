@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import parallel
+from src.cv import FoldEngine, run_cv
+from src.feature_matrix import FeatureMatrix
+from src.models import baseline_model, logreg_model, xgb_model
+from src.parallel import configure, parallel_budget, resolve_data_mode, share_arrays, split_thread_budget
+
+
+def test_parallel_budget_never_oversubscribes():
+    for policy in parallel.POLICIES:
+        outer, inner = parallel_budget(10, policy=policy, n_cores=64)
+        assert outer * inner <= 64
+    assert parallel_budget(10, policy="balanced", n_cores=64) == (8, 8)
+    assert parallel_budget(10, policy="outer", n_cores=64) == (10, 6)
+    assert parallel_budget(10, policy="inner", n_cores=64) == (1, 64)
+    assert parallel_budget(10, policy="serial", n_cores=64) == (1, 1)
+
+
+def test_split_thread_budget():
+    assert split_thread_budget(4, n_jobs=8) == 2
+    assert split_thread_budget(16, n_jobs=8) == 1
+
+
+def test_configure_applies_to_model_factories():
+    configure("inner", n_cores=6)
+    try:
+        assert baseline_model().n_jobs == 6
+        # budżet wygrywa z n_jobs=-1 zapisanym w parametrach z tuningu
+        assert xgb_model(override_params={"n_jobs": -1}).n_jobs == 6
+        assert xgb_model(n_jobs=2).n_jobs == 2
+    finally:
+        configure()
+
+    with pytest.raises(ValueError):
+        configure("everything")
+
+
+def test_share_arrays_writes_memmaps_once(tmp_path):
+    X = pd.DataFrame({"a": np.arange(10), "b": np.linspace(0, 1, 10)})
+    y = pd.Series([0, 1] * 5)
+
+    X_shared, y_shared = share_arrays(X, y, tmp_path)
+    assert isinstance(X_shared, FeatureMatrix) and isinstance(X_shared.values, np.memmap)
+    assert X_shared.columns == ["a", "b"]
+    assert isinstance(y_shared, np.memmap)
+    np.testing.assert_array_equal(np.asarray(X_shared), X.to_numpy(dtype=np.float32))
+
+    # tablica już na memmap nie jest kopiowana
+    again, _ = share_arrays(X_shared, y_shared, tmp_path / "unused")
+    assert again.values is X_shared.values
+
+    with pytest.raises(ValueError):
+        resolve_data_mode("shm", n_jobs=2)
+    assert resolve_data_mode("memmap", n_jobs=1) == "pickle"
+
+
+def test_cv_memmap_mode_matches_pickle():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(200, 4)), columns=list("abcd"))
+    y = pd.Series((X["a"] + rng.normal(scale=0.5, size=200) > 0).astype(int))
+
+    model = logreg_model(n_jobs=1)
+    pickled = run_cv(model, X, y, n_splits=3, n_jobs=2, data_mode="pickle")
+    shared = run_cv(model, X, y, n_splits=3, n_jobs=2, data_mode="memmap")
+    assert shared["roc_auc"]["mean"] == pytest.approx(pickled["roc_auc"]["mean"], abs=1e-6)
+
+    engine = FoldEngine(X, y, n_splits=3, n_jobs=2, data_mode="memmap")
+    assert isinstance(engine.X.values, np.memmap)
+    oof = engine.oof_predictions("logreg")
+    ref = FoldEngine(X, y, n_splits=3, n_jobs=2, data_mode="pickle").oof_predictions("logreg")
+    np.testing.assert_allclose(oof, ref, rtol=1e-4)
@@ -1,6 +1,14 @@
+import numpy as np
 import pandas as pd
 
-from src.preprocessing import audit_data_quality, preprocessing_pipeline, remove_full_row_duplicates
+from src.preprocessing import (
+    HashSet,
+    HyperLogLog,
+    audit_data_quality,
+    duplicate_mask,
+    preprocessing_pipeline,
+    remove_full_row_duplicates,
+)
 
 
 def test_audit_data_quality_counts_duplicates_and_nan():
@@ -28,4 +36,81 @@ def test_preprocessing_pipeline_report_structure_and_effect():
     assert "before" in report and "after" in report
     assert report["before"]["duplicate_rows"] == 1
     assert report["after"]["duplicate_rows"] == 0
-    assert len(out) == 1
\ No newline at end of file
+    assert len(out) == 1
+
+
+def test_duplicate_mask_matches_pandas_duplicated():
+    df = pd.DataFrame({"a": [1, 2, 1, 1, None, None], "b": ["x", "y", "x", "z", None, None]})
+    assert duplicate_mask(df).tolist() == df.duplicated().tolist()
+    clean = df.drop_duplicates()
+    assert remove_full_row_duplicates(clean) is clean
+
+
+def test_preprocessing_pipeline_after_report_matches_recomputed_audit():
+    df = pd.DataFrame({
+        "a": [1, 1, 2, None, None, 3],
+        "b": ["x", "x", None, None, None, "y"],
+    })
+    out, report = preprocessing_pipeline(df)
+    assert report["after"] == audit_data_quality(out)
+    assert report["before"] == audit_data_quality(df)
+    assert report["after"]["nan_total"] == 3
+
+
+def test_hyperloglog_estimates_cardinality():
+    for n in (50, 5_000, 200_000):
+        hll = HyperLogLog()
+        values = pd.Series(np.arange(n) * 7 + 3)
+        hll.add_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+        assert abs(hll.estimate() - n) <= max(2, 0.03 * n)
+
+
+
+def test_hyperloglog_rank_exact_near_powers_of_two():
+    hll = HyperLogLog(precision=14)
+    width = 64 - 14
+    # pozostałe bity 2^k - 1 (k = 50, 40, 25) i pojedyncze 2^k: log2 na float64 zaokrągla 2^k - 1 w górę
+    rests = [(1 << k) - 1 for k in (width, 40, 25)] + [1 << k for k in (width - 1, 30)]
+    hashes = np.array([(i << width) | r for i, r in enumerate(rests)], dtype=np.uint64)
+    hll.add_hashes(hashes)
+    expected = [width - r.bit_length() + 1 for r in rests]
+    assert hll.registers[:len(rests)].tolist() == expected
+
+def test_audit_column_stats_and_sampled_mode():
+    df = pd.DataFrame({
+        "Refunds": [0.0, -5.0, -1.0, 0.0, np.nan] * 200,
+        "Category": ["A", "B", "C", "A", None] * 200,
+    })
+    rep = audit_data_quality(df, chunk_rows=333)
+    refunds = rep["columns"]["Refunds"]
+    assert (refunds["min"], refunds["max"], refunds["negative"], refunds["nulls"]) == (-5.0, 0.0, 400, 200)
+    assert rep["columns"]["Category"]["distinct_approx"] == 3
+    assert rep["duplicate_rows"] == df.duplicated().sum()
+
+    sampled = audit_data_quality(df, sample=0.5)
+    assert sampled["sample"]["rows"] == 500
+    assert sampled["n_rows"] == 1000
+    assert abs(sampled["columns"]["Refunds"]["negative"] - 400) < 80
+    assert sampled["duplicate_rows"] is None
+    assert audit_data_quality(df, sample=0.5, exact_duplicates=True)["duplicate_rows"] == rep["duplicate_rows"]
+
+
+def test_sampled_audit_counts_rare_duplicates_exactly():
+    rng = np.random.default_rng(4)
+    df = pd.DataFrame({"a": rng.integers(0, 1 << 40, 30_000), "b": rng.random(30_000)})
+    df = pd.concat([df, df.iloc[:300]], ignore_index=True)
+    assert audit_data_quality(df, sample=0.02, chunk_rows=7_000, exact_duplicates=True)["duplicate_rows"] == 300
+
+
+def test_hash_set_matches_python_set_across_batches():
+    rng = np.random.default_rng(3)
+    seen, reference = HashSet(), set()
+    for _ in range(40):
+        batch = rng.integers(0, 5_000, 300).astype(np.uint64)
+        expected = []
+        for h in batch.tolist():
+            expected.append(h in reference)
+            reference.add(h)
+        assert seen.add(batch).tolist() == expected
+    assert len(seen) == len(reference)
+    assert len(seen.runs) <= 10
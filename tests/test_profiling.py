@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from src.profiling import RunProfiler
+
+
+def test_run_profiler_records_stages_and_writes_report(tmp_path):
+    profiler = RunProfiler(trace_memory=True, profile_stage="work", profile_dir=tmp_path / "profiles")
+    with profiler.stage("setup"):
+        data = [0] * 10
+    with profiler.stage("work"):
+        data = [list(range(100)) for _ in range(1000)]
+
+    with pytest.raises(RuntimeError):
+        with profiler.stage("failing"):
+            raise RuntimeError("boom")
+
+    names = [s["name"] for s in profiler.stages]
+    assert names == ["setup", "work", "failing"]
+    work = profiler.stages[1]
+    assert work["seconds"] >= 0 and work["py_peak_mb"] > 0
+    assert work["top_allocations"]
+    assert (tmp_path / "profiles" / "work.prof").exists()
+    assert "profile" not in profiler.stages[0]
+
+    report = json.loads(profiler.write_report(tmp_path / "report.json").read_text(encoding="utf-8"))
+    assert [s["name"] for s in report["stages"]] == names
+    assert "work" in profiler.summary_table()
+    assert len(data) == 1000
+
+
+def test_run_profiler_rejects_unknown_profiler():
+    with pytest.raises(ValueError):
+        RunProfiler(profiler="perf")
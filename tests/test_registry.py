@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from src.feature_engineering import FeatureEncoder, build_features_transaction_level
+from src.models import baseline_model, xgb_model
+from src.registry import load_artifact, save_artifact, score_file
+
+
+def _raw_orders(n: int = 300, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    is_refund = rng.random(n) < 0.2
+    return pd.DataFrame({
+        "Date": [f"{d:02d}/03/2019" for d in rng.integers(1, 28, size=n)],
+        "Transaction ID": rng.integers(1, 80, size=n),
+        "Item ID": rng.integers(100, 130, size=n),
+        "Item Code": rng.choice(["ABC-1", "ABC-2", "XYZ-9"], size=n),
+        "Category": rng.choice(["A", "B", "C"], size=n),
+        "Version": rng.choice(["1", "v2"], size=n),
+        "Purchased Item Count": np.where(is_refund, 0, rng.integers(1, 4, size=n)),
+        "Refunded Item Count": np.where(is_refund, -1, 0),
+        "Final Quantity": np.where(is_refund, -1, rng.integers(1, 4, size=n)),
+        "Total Revenue": np.where(is_refund, 0.0, rng.integers(1, 300, size=n).astype(float)),
+        "Price Reductions": -rng.integers(0, 20, size=n).astype(float),
+        "Sales Tax": rng.integers(0, 40, size=n).astype(float),
+        "Refunds": np.where(is_refund, -50.0, 0.0),
+    })
+
+
+def _trained(model):
+    df = _raw_orders()
+    encoder = FeatureEncoder().fit(df)
+    tx = build_features_transaction_level(df, encoder=encoder)
+    X = tx.drop(columns=["Returned", "Transaction ID"])
+    model.fit(X, tx["Returned"])
+    return model, encoder, X
+
+
+def test_registry_roundtrip_xgb_and_sklearn(tmp_path):
+    for name, model in [("xgb", xgb_model(override_params={"n_estimators": 10})), ("rf", baseline_model(n_jobs=1))]:
+        model, encoder, X = _trained(model)
+        save_artifact(
+            model, name, list(X.columns), encoder, metrics={"roc_auc": 0.7, "y_proba": [0.1]}, root=tmp_path,
+            threshold=0.3, threshold_selection={"objective": "f1", "threshold": 0.3},
+        )
+
+        artifact = load_artifact(name, root=tmp_path)
+        assert artifact.meta["kind"] == ("xgb" if name == "xgb" else "sklearn")
+        assert artifact.meta["metrics"] == {"roc_auc": 0.7}
+        assert artifact.threshold == 0.3 and artifact.meta["threshold_selection"]["objective"] == "f1"
+        assert artifact.feature_columns == list(X.columns)
+        np.testing.assert_allclose(artifact.predict_proba(X), model.predict_proba(X)[:, 1], rtol=1e-6)
+
+
+def test_score_file_scores_raw_orders_in_batches(tmp_path):
+    model, encoder, X = _trained(xgb_model(override_params={"n_estimators": 10}))
+    save_artifact(model, "xgb", list(X.columns), encoder, root=tmp_path / "registry")
+
+    raw = tmp_path / "new_orders.csv"
+    _raw_orders(seed=1).to_csv(raw, index=False)
+    out = tmp_path / "scores.csv"
+
+    n = score_file(load_artifact("xgb", root=tmp_path / "registry"), raw, out, batch_size=7)
+    scores = pd.read_csv(out)
+    assert len(scores) == n
+    assert scores["Transaction ID"].is_unique
+    assert scores["proba"].between(0, 1).all()
+    assert set(scores["prediction"]) <= {0, 1}
+
+
+def test_score_file_buckets_match_single_pass(tmp_path):
+    model, encoder, X = _trained(xgb_model(override_params={"n_estimators": 10}))
+    save_artifact(model, "xgb", list(X.columns), encoder, root=tmp_path / "registry")
+    artifact = load_artifact("xgb", root=tmp_path / "registry")
+
+    raw_df = _raw_orders(seed=2)
+    raw = tmp_path / "new_orders.csv"
+    pd.concat([raw_df, raw_df.iloc[:20]]).to_csv(raw, index=False)
+
+    n_single = score_file(artifact, raw, tmp_path / "single.csv", n_buckets=1)
+    n_bucketed = score_file(artifact, raw, tmp_path / "bucketed.csv", n_buckets=5, chunksize=50, tmp_dir=tmp_path)
+    single = pd.read_csv(tmp_path / "single.csv").sort_values("Transaction ID", ignore_index=True)
+    bucketed = pd.read_csv(tmp_path / "bucketed.csv").sort_values("Transaction ID", ignore_index=True)
+    assert n_single == n_bucketed == len(single)
+    pd.testing.assert_frame_equal(single, bucketed, check_exact=False, atol=1e-6)
+    assert not list(tmp_path.glob("score_buckets_*"))
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.eda import eda_figure_jobs
+from src.model_viz import holdout_figure_jobs
+from src.rendering import render_figures
+
+
+def test_render_figures_skips_unchanged_and_rerenders_changed(tmp_path):
+    rng = np.random.default_rng(0)
+    y_test = rng.integers(0, 2, 200)
+    proba = rng.random(200)
+    results = {"A": {"y_proba": proba, "y_pred": (proba > 0.5).astype(int), "model": None}}
+    cache = tmp_path / "cache.json"
+
+    jobs = holdout_figure_jobs(results, y_test, tmp_path / "models")
+    first = render_figures(jobs, n_jobs=2, cache_path=cache)
+    assert sorted(first["rendered"]) == sorted(str(j.path) for j in jobs)
+    assert all(j.path.exists() for j in jobs)
+
+    second = render_figures(holdout_figure_jobs(results, y_test, tmp_path / "models"), cache_path=cache)
+    assert second["rendered"] == [] and len(second["skipped"]) == len(jobs)
+
+    results["A"]["y_pred"] = 1 - results["A"]["y_pred"]
+    third = render_figures(holdout_figure_jobs(results, y_test, tmp_path / "models"), cache_path=cache)
+    assert third["rendered"] == [str(tmp_path / "models" / "cm_A.png")]
+
+
+def test_eda_figure_jobs_render_headless(tmp_path):
+    rng = np.random.default_rng(1)
+    tx = pd.DataFrame({
+        "Transaction ID": np.arange(100),
+        "TotalRevenue_sum": rng.random(100),
+        "DiscountRatio": np.where(rng.random(100) < 0.1, np.nan, rng.random(100)),
+        "Returned": rng.integers(0, 2, 100),
+    })
+    jobs = eda_figure_jobs(tx, ["TotalRevenue_sum", "DiscountRatio", "Missing"], save_dir=tmp_path,
+                           scatter=("TotalRevenue_sum", "DiscountRatio"))
+
+    out = render_figures(jobs, n_jobs=1, cache_path=None)
+    names = sorted(p.rsplit("/", 1)[-1] for p in out["rendered"])
+    assert names == sorted([
+        "target_distribution.png", "hist_TotalRevenue_sum.png", "hist_DiscountRatio.png",
+        "box_TotalRevenue_sum_by_Returned.png", "box_DiscountRatio_by_Returned.png",
+        "scatter_revenue_discount.png", "corr_heatmap.png",
+    ])
+
+
+def test_rendering_does_not_switch_caller_backend(tmp_path):
+    code = f"""
+import matplotlib
+import numpy as np
+from src.model_viz import holdout_figure_jobs
+from src.rendering import render_figures
+import src.eda
+assert matplotlib.get_backend() == "svg", matplotlib.get_backend()
+y = np.array([0, 1, 0, 1]); p = np.array([0.1, 0.8, 0.3, 0.6])
+jobs = holdout_figure_jobs({{"A": {{"y_proba": p, "y_pred": (p > 0.5).astype(int), "model": None}}}}, y, {str(tmp_path)!r})
+render_figures(jobs, n_jobs=1, cache_path=None)
+render_figures(jobs, n_jobs=2, cache_path=None)
+assert matplotlib.get_backend() == "svg", matplotlib.get_backend()
+"""
+    env = {**os.environ, "MPLBACKEND": "svg", "PYTHONPATH": str(Path(__file__).resolve().parents[1])}
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from sklearn.metrics import f1_score, precision_score, recall_score
+
+from src.cv import FoldEngine
+from src.thresholds import select_threshold, threshold_sweep
+from src.train import apply_threshold
+
+
+def _scores(n, seed=0):
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n) < 0.2).astype(int)
+    # zaokrąglenie -> dużo remisów
+    return y, np.round(np.clip(rng.normal(0.35 + 0.25 * y, 0.2), 0, 1), 2)
+
+
+def test_threshold_sweep_matches_per_threshold_metrics():
+    y, s = _scores(2_000)
+    sweep = threshold_sweep(y, s)
+    assert sweep["threshold"][0] == np.inf and sweep["tp"][0] == 0
+    assert sweep["tp"][-1] + sweep["fn"][-1] == y.sum()
+
+    for i in (1, len(sweep["threshold"]) // 2, len(sweep["threshold"]) - 1):
+        pred = (s >= sweep["threshold"][i]).astype(int)
+        assert sweep["f1"][i] == pytest.approx(f1_score(y, pred))
+        assert sweep["precision"][i] == pytest.approx(precision_score(y, pred))
+        assert sweep["recall"][i] == pytest.approx(recall_score(y, pred))
+
+
+def test_select_threshold_objectives():
+    y, s = _scores(5_000, seed=1)
+    sweep = threshold_sweep(y, s)
+
+    best_f1 = select_threshold(y, s, objective="f1")
+    assert best_f1["f1"] == pytest.approx(sweep["f1"][1:].max())
+    assert best_f1["f1"] == pytest.approx(f1_score(y, s >= best_f1["threshold"]))
+
+    cheap_fn = select_threshold(y, s, objective="cost", cost_fp=1.0, cost_fn=1.0)
+    dear_fn = select_threshold(y, s, objective="cost", cost_fp=1.0, cost_fn=20.0)
+    assert dear_fn["threshold"] < cheap_fn["threshold"]
+    assert dear_fn["recall"] > cheap_fn["recall"]
+
+    # FP dużo droższy niż FN: "nic nie zgłaszaj" jest najtańsze, ale próg zostaje skończony
+    no_alarm = select_threshold(y, s, objective="cost", cost_fp=100.0, cost_fn=1.0)
+    assert np.isfinite(no_alarm["threshold"]) and no_alarm["threshold"] == s.max()
+    assert no_alarm["cost"] > no_alarm["cost_predict_none"] == y.sum()
+
+    precise = select_threshold(y, s, objective="precision", target_precision=0.8)
+    assert precise["target_met"] and precise["precision"] >= 0.8
+    assert not select_threshold(y, s, objective="precision", target_precision=1.1)["target_met"]
+
+    with pytest.raises(ValueError):
+        select_threshold(y, s, objective="auc")
+
+
+def test_fold_engine_threshold_from_oof_applied_to_holdout():
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(300, 3))
+    y = (X[:, 0] + rng.normal(scale=1.0, size=300) > 1.0).astype(int)
+    engine = FoldEngine(X, y, n_splits=3, random_state=42, n_jobs=1)
+
+    is_train = np.arange(300) < 240
+    selection = engine.select_threshold("logreg", None, rows=is_train)
+    oof = engine.oof_predictions("logreg")
+    assert selection == select_threshold(y[is_train], oof[is_train])
+
+    res = engine.holdout("logreg", None, X[is_train], X[~is_train], y[is_train], y[~is_train])
+    tuned = apply_threshold(res, y[~is_train], selection["threshold"])
+    assert tuned["threshold"] == selection["threshold"]
+    assert tuned["model"] is res["model"] and tuned["roc_auc"] == res["roc_auc"]
+    assert np.array_equal(tuned["y_pred"], (res["y_proba"] >= selection["threshold"]).astype(int))
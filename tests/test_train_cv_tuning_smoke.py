@@ -1,9 +1,15 @@
+import optuna
+import pytest
+
+import numpy as np
 import pandas as pd
 
-from src.cv import run_cv
-from src.models import logreg_model
-from src.train import train_and_evaluate
-from src.tuning import tune_xgb_optuna
+from src.cv import FoldEngine, run_cv
+from src.metrics import roc_auc
+from src.models import EarlyStoppingXGBClassifier, bagged_xgb_model, logreg_model, xgb_model
+from src.train import BaggedUndersampleClassifier, train_and_evaluate, undersample_indices, undersample_train
+from src.tuning import make_pruner, make_storage, tune_xgb_optuna
+from src.xgb_native import XGBFoldData, cutoff_aucs, run_cv_xgb_native
 
 
 def test_train_and_evaluate_runs():
@@ -35,3 +41,246 @@ def test_optuna_tuning_returns_required_params():
     assert "n_estimators" in best
     assert best["objective"] == "binary:logistic"
     assert best["eval_metric"] == "auc"
+
+
+def _cv_data(n: int = 60):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"x1": rng.normal(size=n), "x2": rng.normal(size=n)})
+    y = pd.Series((X["x1"] + rng.normal(scale=0.5, size=n) > 0).astype(int))
+    return X, y
+
+
+def test_fold_engine_cv_summary_matches_run_cv():
+    X, y = _cv_data()
+    engine = FoldEngine(X, y, n_splits=3, random_state=42, n_jobs=1)
+
+    expected = run_cv(logreg_model(), X, y, n_splits=3)
+    summary = engine.cv_summary("logreg")
+    for k in expected:
+        assert abs(summary[k]["mean"] - expected[k]["mean"]) < 1e-9
+
+
+def test_fold_engine_caches_fold_models_and_holdout():
+    X, y = _cv_data()
+    engine = FoldEngine(X, y, n_splits=3, random_state=42, n_jobs=1)
+
+    first = engine.fold_results("xgb", {"scale_pos_weight": 1.0})
+    engine.cv_summary("xgb", {"scale_pos_weight": 1.0})
+    again = engine.fold_results("xgb", {"scale_pos_weight": 1.0})
+    assert all(a[0] is b[0] for a, b in zip(first, again))
+
+    oof = engine.oof_predictions("xgb", {"scale_pos_weight": 1.0})
+    assert oof.shape == (len(y),)
+
+    split = (X[:40], X[40:], y[:40], y[40:])
+    h1 = engine.holdout("logreg", None, *split, split="full")
+    h2 = engine.holdout("logreg", None, *split, split="full")
+    assert h1["model"] is h2["model"]
+
+    # ta sama etykieta splitu, inne dane -> nowy model, nie stary wynik
+    other = engine.holdout("logreg", None, X[10:40], X[:10], y[10:40], y[:10], split="full")
+    assert other["model"] is not h1["model"] and len(other["y_proba"]) == 10
+
+    # te same indeksy i kolumny, inne wartości -> cache nie może trafić
+    shifted = (X[:40] + 1.0, X[40:], y[:40], y[40:])
+    moved = engine.holdout("logreg", None, *shifted, split="full")
+    assert moved["model"] is not h1["model"]
+    assert engine.holdout("logreg", None, *split, split="full")["model"] is h1["model"]
+
+    bounded = FoldEngine(X, y, n_splits=3, random_state=42, n_jobs=1, holdout_cache_size=1)
+    b1 = bounded.holdout("logreg", None, *split)
+    bounded.holdout("rf", None, *split)
+    assert bounded.holdout("logreg", None, *split)["model"] is not b1["model"]
+
+    engine.clear_cache("xgb")
+    assert engine.fold_results("xgb", {"scale_pos_weight": 1.0})[0][0] is not first[0][0]
+    assert engine.holdout("logreg", None, *split, split="full")["model"] is h1["model"]
+    engine.clear_cache()
+    assert engine.holdout("logreg", None, *split, split="full")["model"] is not h1["model"]
+
+
+def test_optuna_tuning_native_path_with_early_stopping():
+    X, y = _cv_data(80)
+
+    best = tune_xgb_optuna(X, y, n_trials=2, n_splits=2, random_state=42, native=True, early_stopping_rounds=5)
+    assert best["objective"] == "binary:logistic"
+    assert 1 <= best["n_estimators"] <= 800
+
+
+def test_run_cv_xgb_native_returns_expected_keys():
+    X, y = _cv_data()
+    res = run_cv_xgb_native({"n_estimators": 20, "max_depth": 2, "objective": "binary:logistic"}, X, y, n_splits=3)
+    for k in ["roc_auc", "f1", "precision", "recall", "accuracy"]:
+        assert "mean" in res[k] and "std" in res[k]
+    assert res["roc_auc"]["mean"] > 0.5
+
+
+def test_fold_engine_native_xgb_cv_reuses_binned_folds():
+    X, y = _cv_data()
+    engine = FoldEngine(X, y, n_splits=3, random_state=42, n_jobs=1, xgb_native=True)
+    params = {"scale_pos_weight": 1.0, "early_stopping_rounds": 5}
+
+    summary = engine.cv_summary("xgb", params)
+    fold_data = engine.xgb_fold_data()
+    expected = run_cv_xgb_native(
+        xgb_model(scale_pos_weight=1.0).get_params(), fold_data=XGBFoldData(X, y, engine.folds), early_stopping_rounds=5,
+    )
+    for k in expected:
+        assert summary[k]["mean"] == pytest.approx(expected[k]["mean"])
+    engine.cv_summary("xgb", {"scale_pos_weight": 2.0})
+    assert engine.xgb_fold_data() is fold_data
+    assert not engine._fold_cache
+    assert {kind for kind, _ in fold_data._matrices} == {"train", "valid"}
+    engine.clear_cache("xgb")
+    assert engine.xgb_fold_data() is not fold_data
+
+
+def test_make_pruner_by_name():
+    assert isinstance(make_pruner("median", n_folds=5), optuna.pruners.MedianPruner)
+    assert isinstance(make_pruner("hyperband", n_folds=5), optuna.pruners.HyperbandPruner)
+    assert isinstance(make_pruner("successive_halving", n_folds=5), optuna.pruners.SuccessiveHalvingPruner)
+    with pytest.raises(ValueError):
+        make_pruner("nope", n_folds=5)
+
+
+def test_optuna_tuning_reports_per_fold_and_prunes():
+    X, y = _cv_data(80)
+
+    calls = []
+
+    class PruneAfterFirstTrial(optuna.pruners.BasePruner):
+        def prune(self, study, trial):
+            # pierwszy trial dochodzi do końca, kolejne ucinamy po 1. foldzie
+            calls.append((trial.number, trial.last_step))
+            return trial.number > 0
+
+    best = tune_xgb_optuna(X, y, n_trials=3, n_splits=3, random_state=42, native=True, pruner=PruneAfterFirstTrial())
+    assert best["objective"] == "binary:logistic"
+    assert calls == [(0, 0), (0, 1), (0, 2), (1, 0), (2, 0)]
+
+    best = tune_xgb_optuna(X, y, n_trials=2, n_splits=3, random_state=42, pruner="hyperband")
+    assert "n_estimators" in best
+
+
+def test_optuna_tuning_resumes_from_sqlite_storage(tmp_path):
+    X, y = _cv_data(80)
+    storage = tmp_path / "tuning.db"
+
+    tune_xgb_optuna(X, y, n_trials=2, n_splits=2, random_state=42, storage=storage, pruner="none")
+    best = tune_xgb_optuna(X, y, n_trials=3, n_splits=2, random_state=42, storage=storage, pruner="none")
+
+    study = optuna.load_study(study_name="xgb_tuning", storage=make_storage(storage))
+    assert len(study.trials) == 3
+    assert best["n_estimators"] == study.best_trial.user_attrs["n_estimators"]
+
+
+def test_optuna_tuning_parallel_workers_share_journal(tmp_path):
+    X, y = _cv_data(80)
+    storage = tmp_path / "tuning.log"
+
+    tune_xgb_optuna(X, y, n_trials=4, n_splits=2, random_state=42, storage=storage, n_workers=2, native=True)
+
+    study = optuna.load_study(study_name="xgb_tuning", storage=make_storage(storage))
+    finished = [t for t in study.trials if t.state.is_finished()]
+    assert len(finished) >= 4
+
+
+def test_optuna_workers_require_storage():
+    with pytest.raises(ValueError):
+        tune_xgb_optuna(*_cv_data(), n_workers=2)
+
+
+def test_undersample_indices_balanced_without_copying_x():
+    X, y = _cv_data(200)
+    idx = undersample_indices(y, random_state=0)
+    assert len(idx) == 2 * min(int(y.sum()), int((y == 0).sum()))
+    assert len(np.unique(idx)) == len(idx)
+    assert y.to_numpy()[idx].mean() == 0.5
+
+    X_bal, y_bal = undersample_train(X, y, random_state=0)
+    pd.testing.assert_frame_equal(X_bal, X.iloc[idx])
+    assert (X_bal.index == y_bal.index).all()
+
+
+def test_bagged_undersample_classifier_averages_bags():
+    X, y = _cv_data(200)
+    model = BaggedUndersampleClassifier(logreg_model(), n_bags=3, random_state=0).fit(X, y)
+
+    assert len(model.estimators_) == 3
+    expected = np.mean([est.predict_proba(X) for est in model.estimators_], axis=0)
+    np.testing.assert_allclose(model.predict_proba(X), expected)
+    assert set(model.predict(X)) <= {0, 1}
+
+    res = train_and_evaluate(bagged_xgb_model(n_bags=2, override_params={"n_estimators": 10}), X, X, y, y)
+    assert res["roc_auc"] > 0.5
+
+    default = BaggedUndersampleClassifier(n_bags=2).fit(X, y)
+    assert default.estimator is None and len(default.estimators_) == 2
+    assert default.estimators_[0].get_params()["scale_pos_weight"] == 1.0
+    assert roc_auc(y, default.predict_proba(X)[:, 1]) > 0.5
+
+
+def test_xgb_early_stopping_uses_validation_split_and_truncates_booster():
+    X, y = _cv_data(400)
+    model = xgb_model(early_stopping_rounds=5, override_params={"n_estimators": 500, "learning_rate": 0.3}, n_jobs=1)
+    assert isinstance(model, EarlyStoppingXGBClassifier)
+    assert "val_size" not in model.get_xgb_params()
+
+    res = train_and_evaluate(model, X[:300], X[300:], y[:300], y[300:])
+    assert model.get_booster().num_boosted_rounds() == model.best_n_estimators_ < 500
+    assert 0.0 <= res["roc_auc"] <= 1.0
+    assert "roc_auc" in run_cv(model, X, y, n_splits=3, n_jobs=1)
+
+
+def test_cutoff_aucs_match_predictions_at_each_round_count():
+    X, y = _cv_data(300)
+    folds = [(np.arange(200), np.arange(200, 300))]
+    fold_data = XGBFoldData(X, y, folds)
+    params = {"n_estimators": 60, "max_depth": 3, "learning_rate": 0.1, "objective": "binary:logistic", "n_jobs": 1}
+
+    aucs, n_rounds = fold_data.fold_cutoff_aucs(0, params, (20, 40, 60, 80))
+    booster, _ = fold_data.fit_fold(0, params)
+    dvalid = fold_data.fold(0)[1]
+    assert n_rounds == 60 and set(aucs) == {20, 40, 60, 80}
+    for c in (20, 40, 60):
+        expected = roc_auc(y[200:], booster.predict(dvalid, iteration_range=(0, c)))
+        assert aucs[c] == pytest.approx(expected)
+    assert aucs[80] == aucs[60]
+
+    model = xgb_model(override_params={"n_estimators": 30}, n_jobs=1).fit(X[:200], y[:200])
+    direct = cutoff_aucs(
+        lambda start, end: model.predict(X[200:], output_margin=True, iteration_range=(start, end)), y[200:], (10, 30), 30
+    )
+    assert direct[10] == pytest.approx(roc_auc(y[200:], model.predict_proba(X[200:], iteration_range=(0, 10))[:, 1]))
+
+
+def test_cutoff_aucs_exact_on_margins_above_histogram_limit():
+    from sklearn.metrics import roc_auc_score
+    from src.config import METRICS_EXACT_MAX_ROWS
+
+    rng = np.random.default_rng(0)
+    n = METRICS_EXACT_MAX_ROWS + 200_000
+    y = (rng.random(n) < 0.2).astype(int)
+    margins = rng.normal(-1.5 + y, 1.0)
+
+    aucs = cutoff_aucs(lambda start, end: margins * (end - start) / 10, y, (10,), 10)
+    assert aucs[10] == pytest.approx(roc_auc_score(y, margins))
+
+
+def test_native_early_stopping_holds_out_train_rows_not_the_scored_fold():
+    X, y = _cv_data(300)
+    folds = [(np.arange(200), np.arange(200, 300))]
+    fold_data = XGBFoldData(X, y, folds)
+    params = {"n_estimators": 200, "learning_rate": 0.3, "objective": "binary:logistic", "eval_metric": "auc", "n_jobs": 1}
+
+    fit_idx, stop_idx = fold_data.early_stopping_split(0)
+    assert len(stop_idx) == 40 and np.intersect1d(fit_idx, stop_idx).size == 0
+    assert set(fit_idx) | set(stop_idx) == set(range(200))
+
+    booster, n_rounds = fold_data.fit_fold(0, params, early_stopping_rounds=5)
+    # macierze uczenia / zatrzymania nie zostają w cache, valid foldu nie jest budowany
+    assert fold_data._matrices == {}
+    assert n_rounds == booster.best_iteration + 1 < 200
+    aucs, _ = fold_data.fold_cutoff_aucs(0, params, (n_rounds,), early_stopping_rounds=5)
+    expected = roc_auc(y[200:], booster.predict(fold_data.fold(0)[1], iteration_range=(0, n_rounds)))
+    assert aucs[n_rounds] == pytest.approx(expected)